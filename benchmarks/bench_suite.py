@@ -0,0 +1,251 @@
+"""
+节假日计算与查询热点路径的基准测试套件。
+
+完全离线运行：节日名称使用离线本地化，必应翻译被替换为一旦调用即报错的桩，
+保证测量结果不含网络耗时。每个用例报告单次耗时（取多轮最优）、tracemalloc 统计的峰值内存
+与返回值常驻的内存（用于比较不同的内存布局），并与基线文件 `benchmarks/baseline.json` 对比。
+整年构建与 `store_get_year_*` 用例调用插件实际的入口 `get_year_holidays` 与 `HolidayStore.get_year`，
+缓存读写用例调用插件实际使用的 `persistence`（临时文件 + fsync + 原子重命名）；
+插件目录按测试中的方式注册为包导入，无需安装 AstrBot。用法：
+
+    python benchmarks/bench_suite.py                 # 运行并与基线对比
+    python benchmarks/bench_suite.py --save          # 运行并更新基线
+    python benchmarks/bench_suite.py --fail-over 25  # 任一用例比基线慢 25% 以上时返回非零
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PACKAGE = 'blessingholidays'
+
+# 插件模块之间使用相对导入，与 tests/conftest.py 一样把插件目录注册为包
+if PACKAGE not in sys.modules:
+    _package = types.ModuleType(PACKAGE)
+    _package.__path__ = [ROOT]
+    sys.modules[PACKAGE] = _package
+
+
+class _OfflineTranslator:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def process(self, text):
+        raise RuntimeError("基准测试不允许联网翻译")
+
+
+sys.modules['cn_bing_translator'] = types.SimpleNamespace(Translator=_OfflineTranslator)
+
+from blessingholidays.holiday_builder import calendar_meta, calendar_version, supported_years  # noqa: E402
+from blessingholidays.holiday_index import HolidayIndex, summarize_holidays  # noqa: E402
+from blessingholidays.holiday_records import get_year_holidays  # noqa: E402
+from blessingholidays.holiday_snapshot import (  # noqa: E402
+    HolidayBundle, HolidaySnapshot, encode_snapshot, load_snapshot,
+)
+from blessingholidays.holiday_store import HolidayStore  # noqa: E402
+from blessingholidays.holiday_year import HolidayYear  # noqa: E402
+from blessingholidays.persistence import atomic_write, atomic_write_json, read_json  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+BUNDLE_FILE = os.path.join(ROOT, 'data', 'holiday_tables.bin')
+
+
+def save_json(path: str, year: int, holidays: list):
+    """与 `HolidayStore` 保存 JSON 分片的方式相同。"""
+    atomic_write_json(path, {'year': year, 'meta': calendar_meta(year), 'holidays': [dict(h) for h in holidays]})
+
+
+def load_json(path: str) -> list:
+    """与 `HolidayStore` 读取 JSON 分片的方式相同。"""
+    return read_json(path).get('holidays', [])
+
+
+def make_cases(tmp_dir: str) -> dict:
+    run = asyncio.new_event_loop().run_until_complete
+    years = list(supported_years())
+    year = years[-1]
+    holidays = run(get_year_holidays(year))
+    days = [date(year, 1, 1) + timedelta(days=i) for i in range(len(holidays))]
+    iso_days = [d.isoformat() for d in days]
+    index = HolidayIndex(holidays)
+    model = HolidayYear.from_records(holidays)
+
+    json_file = os.path.join(tmp_dir, 'holidays.json')
+    # 与 `HolidayStore` 的分片同名，`store_get_year_snapshot` 直接读取它
+    snap_file = os.path.join(tmp_dir, f'holidays_{year}.bin')
+    save_json(json_file, year, holidays)
+    meta = calendar_meta(year)
+
+    def save_snapshot():
+        # 与 `HolidayStore` 保存二进制分片的方式相同
+        atomic_write(snap_file, encode_snapshot(year, holidays, meta))
+
+    save_snapshot()
+
+    build_dir = os.path.join(tmp_dir, 'build')
+    os.makedirs(build_dir)
+
+    def store_get_year(store_dir: str, bundle_file=None):
+        # 新建的仓库没有内存缓存，测量插件启动或跨年时加载一年的完整路径
+        store = HolidayStore(store_dir, get_year_holidays, bundle_file=bundle_file)
+        return run(store.get_year(year))
+
+    def store_build_year():
+        # 没有合集与分片：现场构建并写入分片
+        shard = os.path.join(build_dir, f'holidays_{year}.bin')
+        if os.path.exists(shard):
+            os.remove(shard)
+        return store_get_year(build_dir)
+
+    def lookup_linear():
+        # 原检查器中的写法：next(...) 线性扫描
+        for d in iso_days:
+            next((h for h in holidays if h['date'] == d), None)
+
+    def lookup_index():
+        for d in days:
+            index.get(d)
+
+    def lookup_model():
+        for d in days:
+            model.get(d)
+
+    def lookup_snapshot():
+        with HolidaySnapshot.open(snap_file) as snap:
+            for d in days:
+                snap.get(d)
+
+    def load_bundle_year():
+        with HolidayBundle(BUNDLE_FILE) as bundle:
+            bundle.records(year)
+
+    def resident_dicts():
+        # 原内存布局：逐日字典列表 + 日期索引
+        with HolidayBundle(BUNDLE_FILE) as bundle:
+            records = bundle.records(year)
+        return records, HolidayIndex(records)
+
+    def resident_columnar():
+        with HolidayBundle(BUNDLE_FILE) as bundle, bundle.snapshot(year) as snap:
+            return HolidayYear.from_snapshot(snap)
+
+    cases = {
+        'build_one_year': lambda: run(get_year_holidays(year)),
+        'build_all_years': lambda: [run(get_year_holidays(y)) for y in years],
+        'store_get_year_build': store_build_year,
+        'store_get_year_snapshot': lambda: store_get_year(tmp_dir),
+        'cache_save_json': lambda: save_json(json_file, year, holidays),
+        'cache_load_json': lambda: load_json(json_file),
+        'cache_save_snapshot': save_snapshot,
+        'cache_load_snapshot': lambda: load_snapshot(snap_file),
+        'index_build': lambda: HolidayIndex(holidays),
+        'year_model_build': lambda: HolidayYear.from_records(holidays),
+        'lookup_year_linear': lookup_linear,
+        'lookup_year_index': lookup_index,
+        'lookup_year_model': lookup_model,
+        'lookup_year_snapshot': lookup_snapshot,
+        'summary_stats': lambda: summarize_holidays(holidays),
+        'summary_stats_model': lambda: summarize_holidays(model),
+    }
+    if os.path.exists(BUNDLE_FILE):
+        cases['cache_load_bundle_year'] = load_bundle_year
+        cases['store_get_year_bundle'] = lambda: store_get_year(tmp_dir, bundle_file=BUNDLE_FILE)
+        cases['resident_year_dicts'] = resident_dicts
+        cases['resident_year_columnar'] = resident_columnar
+    return cases
+
+
+def measure(func, repeat: int) -> dict:
+    """返回最优单次耗时（毫秒）、峰值内存（KB）与返回值常驻的内存（KB）。"""
+    func()  # 预热
+    # 单次耗时太短时一轮内多次调用，减小计时误差
+    t0 = time.perf_counter()
+    func()
+    once = time.perf_counter() - t0
+    number = max(1, int(0.02 / once)) if once > 0 else 1000
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - t0) / number)
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    resident, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'time_ms': round(best * 1000, 4), 'peak_kb': round(peak / 1024, 1),
+            'resident_kb': round(resident / 1024, 1)}
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'chinese_calendar': calendar_version(),
+    }
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="节假日计算与查询的基准测试")
+    parser.add_argument('--repeat', type=int, default=5, help="每个用例的轮数，取最优")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument('--save', action='store_true', help="将本次结果写入基线文件")
+    parser.add_argument('--fail-over', type=float, default=None, metavar='PCT',
+                        help="任一用例比基线慢超过 PCT%% 时返回非零")
+    parser.add_argument('cases', nargs='*', help="只运行指定用例")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    env = environment()
+    print(f"Python {env['python']}，chinese_calendar {env['chinese_calendar']}，取 {args.repeat} 轮最优")
+    print(f"{'用例':<24} {'耗时(ms)':>12} {'峰值内存(KB)':>14} {'常驻内存(KB)':>14} {'相对基线':>10}")
+
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, func in make_cases(tmp_dir).items():
+            if args.cases and name not in args.cases:
+                continue
+            result = measure(func, args.repeat)
+            results[name] = result
+            base = baseline.get(name)
+            delta = ''
+            if base and base.get('time_ms'):
+                change = (result['time_ms'] / base['time_ms'] - 1) * 100
+                delta = f"{change:+.1f}%"
+                if args.fail_over is not None and change > args.fail_over:
+                    regressions.append(f"{name} {delta}")
+            print(f"{name:<24} {result['time_ms']:>12.4f} {result['peak_kb']:>14.1f} "
+                  f"{result['resident_kb']:>14.1f} {delta:>10}")
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': env, 'results': results}, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"基线已保存到 {args.baseline}")
+    if regressions:
+        print(f"性能回退超过 {args.fail_over}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
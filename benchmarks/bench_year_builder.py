@@ -0,0 +1,81 @@
+"""
+整年构建基准：逐日调用 `chinese_calendar` 与 `holiday_builder` 位图批量构建的对比。
+
+两种方式都不做名称翻译，只比较标记计算本身。用法：
+
+    python benchmarks/bench_year_builder.py [重复次数]
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import chinese_calendar as ch_calendar  # noqa: E402
+from chinese_calendar import is_holiday, is_workday  # noqa: E402
+
+from holiday_builder import build_year_flags, flags_to_records, supported_years  # noqa: E402
+
+
+def legacy_year(year: int) -> list:
+    """原 `get_year_holidays` 的逐日循环（去掉翻译）。"""
+    holidays = []
+    current = date(year, 1, 1)
+    end = date(year, 12, 31)
+    while current <= end:
+        on_holiday, name = ch_calendar.get_holiday_detail(current)
+        info = {
+            'date': current.isoformat(),
+            'holiday_name': '',
+            'is_holiday': is_holiday(current),
+            'is_workday': is_workday(current),
+            'is_in_lieu': ch_calendar.is_in_lieu(current),
+            'is_first_day': False,
+            'is_last_day': False,
+        }
+        if on_holiday and name:
+            info['holiday_name'] = name
+            if not holidays or not holidays[-1]['is_holiday'] or holidays[-1]['holiday_name'] != name:
+                info['is_first_day'] = True
+        holidays.append(info)
+        current += timedelta(days=1)
+    for i in range(len(holidays) - 1, -1, -1):
+        if holidays[i]['is_holiday'] and (i == len(holidays) - 1 or not holidays[i + 1]['is_holiday']):
+            holidays[i]['is_last_day'] = True
+    return holidays
+
+
+def batch_year(year: int) -> list:
+    return flags_to_records(build_year_flags(year))
+
+
+def flags_only(year: int):
+    return build_year_flags(year)
+
+
+def run(label: str, func, years, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for y in years:
+            func(y)
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<28} {best * 1000:9.2f} ms  ({len(years)} 年)")
+    return best
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    years = list(supported_years())
+    for y in years:
+        assert legacy_year(y) == batch_year(y), f"{y} 年结果不一致"
+    print(f"chinese_calendar {ch_calendar.__version__}，年份 {years[0]}-{years[-1]}，取 {repeat} 次最优")
+    legacy = run("逐日循环", legacy_year, years, repeat)
+    batch = run("位图批量 + 展开为字典", batch_year, years, repeat)
+    flags = run("位图批量（仅标记）", flags_only, years, repeat)
+    print(f"加速比：展开为字典 {legacy / batch:.1f}x，仅标记 {legacy / flags:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import os
+import time
+from datetime import date, timedelta
+
+from astrbot.api import logger
+
+from .persistence import WriteBehind, atomic_write, dump_json, read_json
+
+
+class BlessingCache:
+    """
+    预生成祝福语的磁盘缓存。
+
+    以 (节日, 日期, 类型, 受众) 为键保存祝福语文本（一条或多条变体）。发送时只需读取缓存，
+    不必等待 LLM；重启后缓存仍在，不会重新生成。
+    """
+
+    def __init__(self, cache_file, keep_days: int = 7, writer: WriteBehind | None = None):
+        """
+        Args:
+            cache_file: 缓存文件路径。
+            keep_days (int): 过期条目在发送日期之后保留的天数。
+            writer (WriteBehind, optional): 延迟写盘器，缺省时同步原子写入。
+        """
+        self.cache_file = str(cache_file)
+        self.keep_days = keep_days
+        self.writer = writer
+        self._entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def make_key(holiday: str, day: str, kind: str, audience: str) -> str:
+        return f"{day}|{kind}|{audience}|{holiday}"
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            self._entries = dict(read_json(self.cache_file).get('entries', {}))
+        except Exception as e:
+            logger.warning(f"读取祝福语缓存 {self.cache_file} 失败，将重新生成: {e}")
+
+    def _save(self):
+        render = lambda: dump_json({'version': 2, 'entries': self._entries})
+        if self.writer is not None:
+            self.writer.schedule(self.cache_file, render)
+            return
+        try:
+            atomic_write(self.cache_file, render())
+        except Exception as e:
+            logger.error(f"保存祝福语缓存到 {self.cache_file} 失败: {e}")
+
+    def get(self, holiday: str, day: str, kind: str, audience: str) -> list[str] | None:
+        """读取缓存的祝福语变体，未命中返回 None。"""
+        entry = self._entries.get(self.make_key(holiday, day, kind, audience))
+        # 旧版缓存每个条目只有一条 'text'
+        texts = (entry.get('texts') or ([entry['text']] if entry.get('text') else [])) if entry else []
+        if texts:
+            self.hits += 1
+            return list(texts)
+        self.misses += 1
+        return None
+
+    def contains(self, holiday: str, day: str, kind: str, audience: str) -> bool:
+        return self.make_key(holiday, day, kind, audience) in self._entries
+
+    def put(self, holiday: str, day: str, kind: str, audience: str, texts: list[str]):
+        """写入祝福语变体并保存。"""
+        self._entries[self.make_key(holiday, day, kind, audience)] = {
+            'holiday': holiday, 'date': day, 'kind': kind, 'audience': audience,
+            'texts': list(texts), 'created': round(time.time()),
+        }
+        self._save()
+
+    def prune(self, today: date):
+        """删除发送日期早于 `keep_days` 天前的条目。"""
+        cutoff = (today - timedelta(days=self.keep_days)).isoformat()
+        stale = [k for k, v in self._entries.items() if v.get('date', '') < cutoff]
+        for k in stale:
+            del self._entries[k]
+        if stale:
+            self._save()
@@ -0,0 +1,260 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable
+
+from astrbot.api import logger
+
+from .broadcast_journal import BroadcastJournal, JournalRun
+from .broadcast_report import RunTimeline
+from .metrics import METRICS
+
+
+class TokenBucket:
+    """
+    自适应令牌桶限速器。
+
+    以 `rate` 条/秒的速度补充令牌，最多积攒 `burst` 个。发送失败时速率减半
+    （不低于 `min_rate`），连续成功时逐步恢复到配置的速率。
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.2, recover_step: float = 0.1,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate (float): 目标速率（条/秒），也是自适应调整的上限。
+            burst (int): 令牌桶容量，即允许的突发条数。
+            min_rate (float): 退避时的最低速率。
+            recover_step (float): 每次成功后恢复的速率，占目标速率的比例。
+            clock (Callable[[], float]): 单调时钟，缺省为 `time.monotonic`。
+        """
+        self.max_rate = max(rate, 0.01)
+        self.min_rate = min(max(min_rate, 0.01), self.max_rate)
+        self.rate = self.max_rate
+        self.burst = max(1, int(burst))
+        self.recover_step = recover_step
+        self.tokens = float(self.burst)
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """等待直到取得一个令牌。等待者按到达顺序依次获得令牌。"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self):
+        """发送成功：逐步恢复速率。"""
+        if self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recover_step)
+
+    def on_error(self):
+        """发送失败：速率减半并清空积攒的令牌。"""
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+
+
+@dataclass
+class BroadcastTarget:
+    """
+    一次广播中的单个发送目标。
+
+    Attributes:
+        platform (str): 平台实例 ID，用于选择限速器；同一适配器的多个账号各有一个限速器。
+        session (str): 统一会话标识，例如 `aiocqhttp:GroupMessage:123`。
+        chain (Any): 要发送的消息链。
+        label (str): 日志中使用的目标描述，例如 "群组 123"。
+        audience (str): 受众类型，'friend' 或 'group'，用于投递排序。
+        member_count (int): 群成员数，好友或未知时为 0，用于投递排序。
+    """
+    platform: str
+    session: str
+    chain: Any
+    label: str
+    audience: str = ''
+    member_count: int = 0
+
+
+@dataclass
+class BroadcastResult:
+    """广播结果统计。"""
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+
+class BroadcastEngine:
+    """
+    并发、限速的广播引擎。
+
+    使用固定数量的发送协程从队列中取目标，每个平台一个自适应令牌桶，
+    总并发不超过 `concurrency`，单个平台的发送速率不超过其令牌桶速率。
+    """
+
+    def __init__(self, send: Callable[[str, Any], Awaitable[Any]], concurrency: int = 5,
+                 rate: float = 2.0, burst: int = 5, min_rate: float = 0.2):
+        """
+        Args:
+            send: 发送函数，签名同 `context.send_message(session, chain)`。
+            concurrency (int): 同时进行的发送数上限。
+            rate (float): 每个平台的目标发送速率（条/秒）。
+            burst (int): 每个平台允许的突发条数。
+            min_rate (float): 出错退避时每个平台的最低速率（条/秒）。
+        """
+        self.send = send
+        self.concurrency = max(1, int(concurrency))
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self._buckets: dict[str, TokenBucket] = {}
+
+    @classmethod
+    def from_config(cls, send: Callable[[str, Any], Awaitable[Any]], config: dict) -> 'BroadcastEngine':
+        """根据 `broadcast` 配置项创建引擎，缺失或非法的值使用默认值。"""
+        config = config or {}
+
+        def number(key, default, cast):
+            try:
+                value = cast(config.get(key, default))
+                return value if value > 0 else default
+            except (TypeError, ValueError):
+                return default
+
+        return cls(
+            send,
+            concurrency=number('concurrency', 5, int),
+            rate=number('rate_per_second', 2.0, float),
+            burst=number('burst', 5, int),
+            min_rate=number('min_rate_per_second', 0.2, float),
+        )
+
+    def bucket(self, platform: str) -> TokenBucket:
+        """返回指定平台的令牌桶，不存在时创建。速率状态在多次广播之间保留。"""
+        bucket = self._buckets.get(platform)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, self.min_rate)
+            self._buckets[platform] = bucket
+        return bucket
+
+    def rates(self) -> dict[str, float]:
+        """返回各平台令牌桶当前的发送速率（条/秒）。"""
+        return {platform: bucket.rate for platform, bucket in self._buckets.items()}
+
+    async def _deliver(self, target: BroadcastTarget, description: str, result: BroadcastResult,
+                       journal: BroadcastJournal | None, run: JournalRun | None, timeline: RunTimeline | None,
+                       guard):
+        if run is not None and not run.should_send(target.session):
+            result.skipped += 1
+            if timeline is not None:
+                timeline.record_skip(target.platform)
+            return
+        bucket = self.bucket(target.platform)
+        waited = time.perf_counter()
+        await bucket.acquire()
+        waited = time.perf_counter() - waited
+        METRICS.observe('rate_limit_wait_seconds', waited, platform=target.platform)
+        if guard is not None and not await guard.claim(target.session):
+            # 其他实例已经发送过该会话
+            result.skipped += 1
+            if timeline is not None:
+                timeline.record_skip(target.platform)
+            return
+        if journal is not None and run is not None:
+            journal.attempt(run, target.session)
+        started = time.perf_counter()
+        try:
+            ok = await self.send(target.session, target.chain)
+            error = '' if ok is not False else "平台未接受该会话。"
+        except Exception as e:
+            ok, error = False, str(e)
+        elapsed = time.perf_counter() - started
+        METRICS.observe('send_seconds', elapsed, platform=target.platform)
+        METRICS.inc('send_total', platform=target.platform, outcome='error' if ok is False else 'ok')
+        if timeline is not None:
+            timeline.record_send(target.platform, target.session, waited, elapsed, ok is not False, error)
+        if journal is not None and run is not None:
+            journal.record(run, target.session, ok is not False, error)
+        if guard is not None:
+            try:
+                await guard.settle(target.session, ok is not False)
+            except Exception as e:
+                logger.warning(f"记录{target.label}的投递结果失败: {e}")
+        if ok is False:
+            bucket.on_error()
+            result.failed += 1
+            logger.error(f"发送{description}到{target.label}失败: {error}")
+            return
+        bucket.on_success()
+        result.sent += 1
+        logger.info(f"{description}已发送到{target.label}")
+
+    async def run(self, targets: Iterable[BroadcastTarget] | AsyncIterable[BroadcastTarget], description: str = "消息",
+                  journal: BroadcastJournal | None = None, run: JournalRun | None = None,
+                  timeline: RunTimeline | None = None, guard=None) -> BroadcastResult:
+        """
+        向所有目标发送消息，返回成功与失败的数量。
+
+        `targets` 可以是异步迭代器，目标一产出即开始发送。
+        提供 `journal` 与 `run` 时，每个会话的发送都会记入广播日志，
+        日志中已投递的会话会被跳过。提供 `timeline` 时记录每次发送的限速等待与耗时。
+        提供 `guard` 时，每个会话发送前调用 `await guard.claim(session)`，返回 False 则跳过，
+        发送后调用 `await guard.settle(session, ok)`，用于多实例之间避免重复发送。
+
+        Args:
+            targets (Iterable[BroadcastTarget] | AsyncIterable[BroadcastTarget]): 发送目标。
+            description (str): 日志中使用的消息描述，例如 "祝福消息"。
+            journal (BroadcastJournal, optional): 广播日志。
+            run (JournalRun, optional): 本次广播在日志中的记录。
+            timeline (RunTimeline, optional): 本次广播的时间线。
+            guard (optional): 投递登记钩子，例如 `coordination.ShardGuard`。
+
+        Returns:
+            BroadcastResult: 广播结果统计。
+        """
+        result = BroadcastResult()
+        started = time.monotonic()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker():
+            while True:
+                target = await queue.get()
+                try:
+                    if target is None:
+                        return
+                    await self._deliver(target, description, result, journal, run, timeline, guard)
+                finally:
+                    queue.task_done()
+
+        async def produce():
+            if hasattr(targets, '__aiter__'):
+                async for target in targets:
+                    await queue.put(target)
+            else:
+                for target in targets:
+                    await queue.put(target)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        # 生产者与发送协程一起等待，任一方异常退出时其余任务也会被取消，不会互相卡住
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        result.elapsed = time.monotonic() - started
+        return result
@@ -0,0 +1,220 @@
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from astrbot.api import logger
+
+
+@dataclass
+class JournalRun:
+    """
+    一次广播的计划与投递状态。
+
+    Attributes:
+        run_id (str): 广播标识，由日期和类型组成，同一天同一类型只有一次广播。
+        holiday (str): 节日名称。
+        date (str): 广播日期（ISO 格式）。
+        kind (str): 广播类型，'start' 为假期首日祝福，'end' 为假期结束提醒。
+        texts (dict[str, list[str]]): 各受众的消息文本（一条或多条变体），恢复时直接复用。
+        attempted (set[str]): 已开始发送的会话。
+        delivered (set[str]): 已确认发送成功的会话。
+        failed (set[str]): 明确发送失败的会话，恢复时会重试。
+        done (bool): 广播是否已完成。
+    """
+    run_id: str
+    holiday: str
+    date: str
+    kind: str
+    texts: dict[str, list[str]] = field(default_factory=dict)
+    attempted: set[str] = field(default_factory=set)
+    delivered: set[str] = field(default_factory=set)
+    failed: set[str] = field(default_factory=set)
+    done: bool = False
+
+    def variants(self, audience: str) -> list[str]:
+        """
+        返回某类受众的消息文本列表，该受众没有文本时使用另一类受众的文本。
+
+        旧版日志中每类受众只有一个字符串，读取时转换为单元素列表。
+        """
+        for key in (audience, 'group' if audience == 'friend' else 'friend'):
+            value = self.texts.get(key)
+            variants = [t for t in ([value] if isinstance(value, str) else value or ()) if t]
+            if variants:
+                return variants
+        return []
+
+    def should_send(self, session: str) -> bool:
+        """
+        判断会话是否仍需发送。
+
+        已开始但未确认结果的会话可能已送达（例如发送途中进程被终止），
+        为了绝不重复发送，这类会话视为已投递；只有明确失败的会话会重试。
+        """
+        return session not in self.attempted or session in self.failed
+
+
+class BroadcastJournal:
+    """
+    只追加的广播日志（JSONL）。
+
+    每次广播先写入计划，发送每个会话前写入 attempt，结束后写入 sent/failed，
+    广播完成后写入 done。重启后重放日志即可得知哪些会话尚未投递。
+    """
+
+    def __init__(self, journal_file, keep_days: int = 7):
+        """
+        Args:
+            journal_file: 日志文件路径。
+            keep_days (int): 压缩日志时保留已完成广播的天数。
+        """
+        self.journal_file = str(journal_file)
+        self.keep_days = keep_days
+        self._runs: dict[str, JournalRun] = {}
+        self._fh = None
+        self._load()
+
+    @staticmethod
+    def make_run_id(day: str, kind: str) -> str:
+        return f"{day}:{kind}"
+
+    def _load(self):
+        if not os.path.exists(self.journal_file):
+            return
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._apply(json.loads(line))
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # 进程中断可能留下半行记录，忽略即可
+                        continue
+        except Exception as e:
+            logger.error(f"读取广播日志 {self.journal_file} 失败: {e}")
+
+    def _apply(self, record: dict):
+        op = record['op']
+        if op == 'plan':
+            self._runs[record['run']] = JournalRun(
+                run_id=record['run'], holiday=record.get('holiday', ''), date=record['date'],
+                kind=record['kind'], texts=record.get('texts', {}),
+            )
+            return
+        run = self._runs.get(record['run'])
+        if run is None:
+            return
+        if op == 'attempt':
+            run.attempted.add(record['session'])
+            run.failed.discard(record['session'])
+        elif op == 'sent':
+            run.delivered.add(record['session'])
+        elif op == 'failed':
+            run.failed.add(record['session'])
+        elif op == 'done':
+            run.done = True
+
+    def _append(self, record: dict, sync: bool = False):
+        record['ts'] = round(time.time(), 3)
+        self._apply(record)
+        try:
+            if self._fh is None:
+                self._fh = open(self.journal_file, 'a', encoding='utf-8')
+            self._fh.write(json.dumps(record, ensure_ascii=False) + '\n')
+            # flush 保证进程崩溃后记录仍在；计划与完成记录额外 fsync
+            self._fh.flush()
+            if sync:
+                os.fsync(self._fh.fileno())
+        except Exception as e:
+            logger.error(f"写入广播日志失败: {e}")
+
+    def get(self, run_id: str) -> JournalRun | None:
+        return self._runs.get(run_id)
+
+    def begin(self, day: str, kind: str, holiday: str, texts: dict[str, list[str]]) -> JournalRun:
+        """
+        记录一次广播计划；同一广播已存在时直接返回已有记录。
+
+        Args:
+            day (str): 广播日期（ISO 格式）。
+            kind (str): 广播类型。
+            holiday (str): 节日名称。
+            texts (dict[str, list[str]]): 各受众的消息文本。
+
+        Returns:
+            JournalRun: 广播记录。
+        """
+        run_id = self.make_run_id(day, kind)
+        run = self._runs.get(run_id)
+        if run is None:
+            self._append({'op': 'plan', 'run': run_id, 'date': day, 'kind': kind,
+                          'holiday': holiday, 'texts': texts}, sync=True)
+            run = self._runs[run_id]
+        return run
+
+    def attempt(self, run: JournalRun, session: str):
+        """在发送前记录会话，之后即使进程中断也不会再次发送。"""
+        self._append({'op': 'attempt', 'run': run.run_id, 'session': session})
+
+    def record(self, run: JournalRun, session: str, ok: bool, error: str = ''):
+        """记录会话的发送结果。"""
+        if ok:
+            self._append({'op': 'sent', 'run': run.run_id, 'session': session})
+        else:
+            self._append({'op': 'failed', 'run': run.run_id, 'session': session, 'error': error[:200]})
+
+    def finish(self, run: JournalRun):
+        """标记广播完成。"""
+        self._append({'op': 'done', 'run': run.run_id}, sync=True)
+
+    def pending_runs(self) -> list[JournalRun]:
+        """返回已计划但尚未完成的广播。"""
+        return [r for r in self._runs.values() if not r.done]
+
+    def compact(self, today: str):
+        """
+        重写日志，只保留最近 `keep_days` 天内的广播，避免文件无限增长。
+
+        Args:
+            today (str): 今天的日期（ISO 格式）。
+        """
+        try:
+            cutoff = (date.fromisoformat(today) - timedelta(days=self.keep_days)).isoformat()
+        except ValueError:
+            return
+        keep = {k: r for k, r in self._runs.items() if r.date >= cutoff}
+        if len(keep) == len(self._runs):
+            return
+        tmp = self.journal_file + '.tmp'
+        try:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for r in keep.values():
+                    lines = [{'op': 'plan', 'run': r.run_id, 'date': r.date, 'kind': r.kind,
+                              'holiday': r.holiday, 'texts': r.texts}]
+                    lines += [{'op': 'attempt', 'run': r.run_id, 'session': s} for s in sorted(r.attempted)]
+                    lines += [{'op': 'sent', 'run': r.run_id, 'session': s} for s in sorted(r.delivered)]
+                    lines += [{'op': 'failed', 'run': r.run_id, 'session': s} for s in sorted(r.failed)]
+                    if r.done:
+                        lines.append({'op': 'done', 'run': r.run_id})
+                    for line in lines:
+                        f.write(json.dumps(line, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.journal_file)
+            self._runs = keep
+        except Exception as e:
+            logger.error(f"压缩广播日志失败: {e}")
+
+    def close(self):
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            finally:
+                self._fh = None
@@ -0,0 +1,243 @@
+import heapq
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from astrbot.api import logger
+
+# 各阶段在报告中的中文名称
+PHASE_LABELS = {
+    'generate': "生成祝福语",
+    'list_fetch': "获取会话列表",
+    'send': "发送",
+}
+
+
+class RunTimeline:
+    """
+    一次广播的时间线。
+
+    记录各阶段（生成祝福语、获取会话列表、发送）的起止时间，按平台汇总发送数量、
+    限速等待与发送耗时，保留最慢的若干次发送，并按错误信息统计失败次数。
+    """
+
+    def __init__(self, run_id: str, holiday: str, day: str, kind: str, resumed: bool = False, slowest: int = 10):
+        """
+        Args:
+            run_id (str): 广播标识，与广播日志相同。
+            holiday (str): 节日名称。
+            day (str): 广播日期（ISO 格式）。
+            kind (str): 广播类型，'start' 或 'end'。
+            resumed (bool): 是否为重启后的续发。
+            slowest (int): 保留的最慢发送条数。
+        """
+        self.run_id = run_id
+        self.holiday = holiday
+        self.date = day
+        self.kind = kind
+        self.resumed = resumed
+        self.started = time.time()
+        self.finished: float | None = None
+        self.outcome = 'running'
+        self.phases: list[dict] = []
+        self.platforms: dict[str, dict] = {}
+        self.errors: dict[str, int] = {}
+        self.slowest = slowest
+        # 最小堆，只保留耗时最长的 `slowest` 次发送
+        self._slow: list[tuple[float, str, str, bool]] = []
+
+    @contextmanager
+    def phase(self, name: str, **details):
+        """
+        记录一个阶段的起止时间，代码块内可向产出的字典补充详情。
+
+        Args:
+            name (str): 阶段名称，见 `PHASE_LABELS`。
+            **details: 阶段详情，例如平台名称或受众。
+        """
+        entry = {'phase': name, 'start': round(time.time(), 3), **details}
+        self.phases.append(entry)
+        try:
+            yield entry
+        except BaseException as e:
+            entry['error'] = str(e)[:200] or type(e).__name__
+            raise
+        finally:
+            entry['end'] = round(time.time(), 3)
+
+    def _platform(self, platform: str) -> dict:
+        totals = self.platforms.get(platform)
+        if totals is None:
+            totals = self.platforms[platform] = {
+                'sent': 0, 'failed': 0, 'skipped': 0,
+                'wait_seconds': 0.0, 'max_wait': 0.0, 'send_seconds': 0.0,
+                'first_send': None, 'last_send': None,
+            }
+        return totals
+
+    def record_skip(self, platform: str):
+        self._platform(platform)['skipped'] += 1
+
+    def record_send(self, platform: str, session: str, waited: float, elapsed: float, ok: bool, error: str = ''):
+        """
+        记录一次发送。
+
+        Args:
+            platform (str): 平台名称。
+            session (str): 会话标识。
+            waited (float): 等待限速令牌的秒数。
+            elapsed (float): 发送调用的耗时（秒）。
+            ok (bool): 是否发送成功。
+            error (str): 失败时的错误信息。
+        """
+        totals = self._platform(platform)
+        totals['sent' if ok else 'failed'] += 1
+        totals['wait_seconds'] += waited
+        totals['max_wait'] = max(totals['max_wait'], waited)
+        totals['send_seconds'] += elapsed
+        now = round(time.time(), 3)
+        if totals['first_send'] is None:
+            totals['first_send'] = now
+        totals['last_send'] = now
+        if not ok:
+            key = (error or "未知错误")[:100]
+            self.errors[key] = self.errors.get(key, 0) + 1
+        item = (elapsed, session, platform, ok)
+        if len(self._slow) < self.slowest:
+            heapq.heappush(self._slow, item)
+        elif elapsed > self._slow[0][0]:
+            heapq.heapreplace(self._slow, item)
+
+    def finish(self, outcome: str):
+        """结束时间线，`outcome` 为 ok、no_blessing、no_targets 或 error。"""
+        self.outcome = outcome
+        self.finished = time.time()
+
+    def to_record(self) -> dict:
+        """转换为写入报告文件的字典。"""
+        platforms = {}
+        for name, totals in self.platforms.items():
+            platforms[name] = {k: round(v, 3) if isinstance(v, float) else v for k, v in totals.items()}
+        return {
+            'run': self.run_id,
+            'holiday': self.holiday,
+            'date': self.date,
+            'kind': self.kind,
+            'resumed': self.resumed,
+            'outcome': self.outcome,
+            'start': round(self.started, 3),
+            'end': round(self.finished or time.time(), 3),
+            'phases': self.phases,
+            'platforms': platforms,
+            'slowest_sends': [
+                {'seconds': round(s, 3), 'session': session, 'platform': platform, 'ok': ok}
+                for s, session, platform, ok in sorted(self._slow, reverse=True)
+            ],
+            'errors': dict(sorted(self.errors.items(), key=lambda kv: -kv[1])),
+        }
+
+
+class BroadcastReport:
+    """
+    广播时间线报告文件（JSONL，每次广播一行）。
+
+    文件超过 `max_bytes` 后轮转为 `<文件名>.1`、`<文件名>.2` …，最多保留 `backups` 个旧文件。
+    """
+
+    def __init__(self, report_file, max_bytes: int = 1024 * 1024, backups: int = 3):
+        """
+        Args:
+            report_file: 报告文件路径。
+            max_bytes (int): 单个文件的最大字节数。
+            backups (int): 保留的轮转文件个数。
+        """
+        self.report_file = str(report_file)
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def _files(self) -> list[str]:
+        """从新到旧返回现有的报告文件。"""
+        paths = [self.report_file] + [f"{self.report_file}.{i}" for i in range(1, self.backups + 1)]
+        return [p for p in paths if os.path.exists(p)]
+
+    def _rotate(self):
+        for i in range(self.backups, 0, -1):
+            src = self.report_file if i == 1 else f"{self.report_file}.{i - 1}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.report_file}.{i}")
+
+    def append(self, record: dict):
+        """追加一条广播记录，必要时先轮转文件。"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        try:
+            if self.backups > 0 and os.path.exists(self.report_file) \
+                    and os.path.getsize(self.report_file) + len(line.encode('utf-8')) > self.max_bytes:
+                self._rotate()
+            with open(self.report_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except Exception as e:
+            logger.error(f"写入广播报告 {self.report_file} 失败: {e}")
+
+    def find(self, day: str | None = None) -> list[dict]:
+        """
+        读取广播记录。
+
+        Args:
+            day (str, optional): 广播日期（ISO 格式）；缺省时只返回最近一次广播。
+
+        Returns:
+            list[dict]: 按开始时间排序的广播记录。
+        """
+        records = []
+        for path in self._files():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if day is None or record.get('date') == day:
+                            records.append(record)
+            except Exception as e:
+                logger.warning(f"读取广播报告 {path} 失败: {e}")
+        records.sort(key=lambda r: r.get('start', 0))
+        return records if day is not None else records[-1:]
+
+
+def _clock(ts: float | None) -> str:
+    return datetime.fromtimestamp(ts).strftime('%H:%M:%S') if ts else '-'
+
+
+def format_run(record: dict) -> list[str]:
+    """将一条广播记录整理为聊天中展示的多行摘要。"""
+    kind = "假期首日祝福" if record.get('kind') == 'start' else "假期结束提醒"
+    start, end = record.get('start', 0), record.get('end', 0)
+    outcome = {
+        'ok': "完成", 'no_blessing': "祝福语生成失败", 'no_targets': "未获取到任何会话", 'error': "异常中止",
+    }.get(record.get('outcome'), record.get('outcome', ''))
+    lines = [
+        f"【{record.get('date')} {record.get('holiday')} {kind}{'（续发）' if record.get('resumed') else ''}】",
+        f"{_clock(start)} - {_clock(end)}，共 {end - start:.1f} s，{outcome}",
+    ]
+    for p in sorted(record.get('phases', []), key=lambda p: p.get('start', 0)):
+        label = PHASE_LABELS.get(p.get('phase'), p.get('phase'))
+        extra = '，'.join(f"{k}={v}" for k, v in p.items() if k not in ('phase', 'start', 'end'))
+        lines.append(f"  {label}: +{p.get('start', start) - start:.1f}s ~ +{p.get('end', start) - start:.1f}s，"
+                     f"{p.get('end', 0) - p.get('start', 0):.2f} s{f'（{extra}）' if extra else ''}")
+    for name, t in record.get('platforms', {}).items():
+        attempts = t.get('sent', 0) + t.get('failed', 0)
+        avg = t.get('send_seconds', 0) / attempts * 1000 if attempts else 0
+        lines.append(f"  平台 {name}: 成功 {t.get('sent', 0)}，失败 {t.get('failed', 0)}，跳过 {t.get('skipped', 0)}；"
+                     f"限速等待共 {t.get('wait_seconds', 0):.1f} s（最长 {t.get('max_wait', 0):.2f} s），"
+                     f"平均发送 {avg:.0f} ms")
+    slowest = record.get('slowest_sends', [])[:3]
+    if slowest:
+        lines.append("  最慢发送: " + "；".join(
+            f"{s['session']} {s['seconds']:.2f} s{'' if s.get('ok') else '（失败）'}" for s in slowest))
+    errors = record.get('errors', {})
+    if errors:
+        lines.append("  失败原因: " + "；".join(f"{msg} ×{n}" for msg, n in list(errors.items())[:5]))
+    return lines
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from astrbot.api import logger
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    " run TEXT PRIMARY KEY, texts TEXT NOT NULL, created REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS shards ("
+    " run TEXT NOT NULL, shard INTEGER NOT NULL, owner TEXT, expires REAL NOT NULL DEFAULT 0,"
+    " done INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (run, shard))",
+    "CREATE TABLE IF NOT EXISTS deliveries ("
+    " run TEXT NOT NULL, session TEXT NOT NULL, owner TEXT NOT NULL, state TEXT NOT NULL,"
+    " updated REAL NOT NULL, PRIMARY KEY (run, session))",
+)
+
+
+def default_instance_id() -> str:
+    """默认的实例标识：主机名与进程号。"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class ShardLease:
+    """
+    当前实例持有的一个分片租约。
+
+    Attributes:
+        run_id (str): 广播标识。
+        shard (int): 分片编号。
+        lost (bool): 续约失败（租约已过期并被其他实例接管）时为 True，此后不再发送该分片。
+    """
+    run_id: str
+    shard: int
+    lost: bool = False
+
+
+class BroadcastCoordinator:
+    """
+    多实例广播协调器，基于共享目录中的 SQLite 租约表。
+
+    会话按 `crc32(会话标识) % shards` 划分为固定数量的分片。每个实例每次认领一个空闲分片
+    （未被持有，或租约已过期）并在发送期间定期续约，发送完毕后标记完成再认领下一个；
+    实例退出或崩溃后，其租约过期，其他实例会接管该分片。每个会话发送前还要在投递表中
+    登记，已被任何实例登记过的会话不会再次发送，即使两个实例短暂持有同一分片也不会重复。
+
+    同一次广播的祝福语也保存在数据库中，由最先生成的实例写入，其余实例直接复用。
+    租约过期时间使用墙上时钟，多台机器之间需要同步时间；数据库文件应放在所有实例
+    都能访问、且支持文件锁的本地或共享卷上。
+    """
+
+    def __init__(self, db_path, instance_id: str | None = None, shards: int = 16,
+                 lease_seconds: float = 30, keep_days: int = 7):
+        """
+        Args:
+            db_path: SQLite 数据库文件路径，所有实例使用同一个文件。
+            instance_id (str, optional): 实例标识，缺省为主机名与进程号。
+            shards (int): 分片数量，所有实例必须一致。
+            lease_seconds (float): 租约有效期（秒），持有期间每三分之一有效期续约一次。
+            keep_days (int): 清理时保留的广播天数。
+        """
+        self.db_path = str(db_path)
+        self.instance_id = instance_id or default_instance_id()
+        self.shards = max(1, int(shards))
+        self.lease_seconds = max(1.0, float(lease_seconds))
+        self.keep_days = keep_days
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @classmethod
+    def from_config(cls, config: dict, data_dir) -> 'BroadcastCoordinator | None':
+        """根据 `coordination` 配置项创建协调器，未启用时返回 None。"""
+        config = config or {}
+        if not config.get('enabled', False):
+            return None
+        db_path = str(config.get('db_path', '') or '').strip() or 'coordination.db'
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(str(data_dir), db_path)
+
+        def number(key, default, cast):
+            try:
+                value = cast(config.get(key, default))
+                return value if value > 0 else default
+            except (TypeError, ValueError):
+                return default
+
+        return cls(
+            db_path,
+            instance_id=str(config.get('instance_id', '') or '').strip() or None,
+            shards=number('shards', 16, int),
+            lease_seconds=number('lease_seconds', 30.0, float),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    def _run(self, func, *args):
+        with self._lock:
+            return func(self._connect(), *args)
+
+    async def _call(self, func, *args):
+        # SQLite 在等待其他实例的写锁时会阻塞，放到线程池中执行
+        return await asyncio.to_thread(self._run, func, *args)
+
+    def shard_of(self, session: str) -> int:
+        """会话所属的分片，所有实例的计算结果一致。"""
+        return zlib.crc32(session.encode('utf-8')) % self.shards
+
+    # ---- 祝福语 ----
+
+    async def shared_texts(self, run_id: str) -> dict | None:
+        """返回其他实例已为本次广播写入的祝福语，没有时返回 None。"""
+        def query(conn):
+            row = conn.execute("SELECT texts FROM runs WHERE run = ?", (run_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+        return await self._call(query)
+
+    async def publish_texts(self, run_id: str, texts: dict) -> dict:
+        """写入本次广播的祝福语；其他实例已先写入时返回已有的祝福语。"""
+        def upsert(conn):
+            conn.execute("INSERT OR IGNORE INTO runs (run, texts, created) VALUES (?, ?, ?)",
+                         (run_id, json.dumps(texts, ensure_ascii=False), time.time()))
+            return json.loads(conn.execute("SELECT texts FROM runs WHERE run = ?", (run_id,)).fetchone()[0])
+        return await self._call(upsert)
+
+    # ---- 分片租约 ----
+
+    async def acquire(self, run_id: str) -> ShardLease | None:
+        """认领一个未完成且空闲（或租约已过期）的分片，没有可认领的分片时返回 None。"""
+        def claim(conn):
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT OR IGNORE INTO shards (run, shard) VALUES (?, ?)",
+                                 [(run_id, i) for i in range(self.shards)])
+                row = conn.execute(
+                    "SELECT shard, owner FROM shards WHERE run = ? AND done = 0 AND shard < ?"
+                    " AND (owner IS NULL OR owner = ? OR expires < ?) ORDER BY shard LIMIT 1",
+                    (run_id, self.shards, self.instance_id, now),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE shards SET owner = ?, expires = ? WHERE run = ? AND shard = ?",
+                                 (self.instance_id, now + self.lease_seconds, run_id, row[0]))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return row
+        row = await self._call(claim)
+        if row is None:
+            return None
+        shard, previous = row
+        if previous and previous != self.instance_id:
+            logger.warning(f"实例 {previous} 持有的分片 {shard} 租约已过期，由本实例接管。")
+        return ShardLease(run_id, shard)
+
+    async def renew(self, lease: ShardLease) -> bool:
+        """续约，租约已被其他实例接管时返回 False。"""
+        def update(conn):
+            return conn.execute(
+                "UPDATE shards SET expires = ? WHERE run = ? AND shard = ? AND owner = ? AND done = 0",
+                (time.time() + self.lease_seconds, lease.run_id, lease.shard, self.instance_id),
+            ).rowcount == 1
+        return await self._call(update)
+
+    async def complete(self, lease: ShardLease):
+        """标记分片发送完毕。"""
+        def update(conn):
+            conn.execute("UPDATE shards SET done = 1 WHERE run = ? AND shard = ? AND owner = ?",
+                         (lease.run_id, lease.shard, self.instance_id))
+        await self._call(update)
+
+    async def progress(self, run_id: str) -> tuple[int, int]:
+        """返回 (已完成分片数, 分片总数)。"""
+        def query(conn):
+            row = conn.execute("SELECT COALESCE(SUM(done), 0) FROM shards WHERE run = ? AND shard < ?",
+                               (run_id, self.shards)).fetchone()
+            return int(row[0])
+        return await self._call(query), self.shards
+
+    @asynccontextmanager
+    async def hold(self, lease: ShardLease):
+        """持有租约期间在后台定期续约；续约失败时将 `lease.lost` 置为 True。"""
+        async def keep_alive():
+            while True:
+                await asyncio.sleep(self.lease_seconds / 3)
+                try:
+                    ok = await self.renew(lease)
+                except Exception as e:
+                    logger.warning(f"续约分片 {lease.shard} 失败: {e}")
+                    continue
+                if not ok:
+                    lease.lost = True
+                    logger.warning(f"分片 {lease.shard} 的租约已被其他实例接管，停止发送该分片。")
+                    return
+
+        task = asyncio.create_task(keep_alive())
+        try:
+            yield lease
+        finally:
+            task.cancel()
+
+    # ---- 会话投递 ----
+
+    async def claim(self, run_id: str, session: str) -> bool:
+        """
+        在发送前登记会话，返回是否应由本实例发送。
+
+        已被登记过的会话视为已投递（发送途中崩溃、结果未知的也一样），只有明确失败的会话可以重新登记。
+        """
+        def insert(conn):
+            now = time.time()
+            if conn.execute(
+                "INSERT OR IGNORE INTO deliveries (run, session, owner, state, updated) VALUES (?, ?, ?, 'attempt', ?)",
+                (run_id, session, self.instance_id, now),
+            ).rowcount == 1:
+                return True
+            return conn.execute(
+                "UPDATE deliveries SET owner = ?, state = 'attempt', updated = ?"
+                " WHERE run = ? AND session = ? AND state = 'failed'",
+                (self.instance_id, now, run_id, session),
+            ).rowcount == 1
+        return await self._call(insert)
+
+    async def settle(self, run_id: str, session: str, ok: bool):
+        """记录会话的发送结果。"""
+        def update(conn):
+            conn.execute("UPDATE deliveries SET state = ?, updated = ? WHERE run = ? AND session = ? AND owner = ?",
+                         ('sent' if ok else 'failed', time.time(), run_id, session, self.instance_id))
+        await self._call(update)
+
+    async def prune(self):
+        """删除 `keep_days` 天前的广播记录。"""
+        def delete(conn):
+            cutoff = time.time() - self.keep_days * 86400
+            old = [row[0] for row in conn.execute("SELECT run FROM runs WHERE created < ?", (cutoff,))]
+            for table in ('deliveries', 'shards', 'runs'):
+                conn.executemany(f"DELETE FROM {table} WHERE run = ?", [(run,) for run in old])
+            return len(old)
+        try:
+            removed = await self._call(delete)
+            if removed:
+                logger.info(f"已清理 {removed} 次过期广播的协调记录。")
+        except Exception as e:
+            logger.warning(f"清理协调数据库失败: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ShardGuard:
+    """广播引擎在发送每个会话前后调用的钩子，把投递登记到协调数据库。"""
+
+    def __init__(self, coordinator: BroadcastCoordinator, lease: ShardLease):
+        self.coordinator = coordinator
+        self.lease = lease
+
+    async def claim(self, session: str) -> bool:
+        if self.lease.lost:
+            return False
+        return await self.coordinator.claim(self.lease.run_id, session)
+
+    async def settle(self, session: str, ok: bool):
+        await self.coordinator.settle(self.lease.run_id, session, ok)
@@ -0,0 +1,115 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable
+
+from astrbot.api import logger
+
+from .broadcast import BroadcastTarget
+
+
+class DeliveryQueue:
+    """
+    按优先级排序、按截止时间匀速放行的广播投递队列。
+
+    默认（`order` 为 'listed' 且没有 VIP 与截止时间）不排序，会话边获取边发送，第一条消息不必等待
+    所有平台的好友/群组列表拉取完毕。否则依次按：VIP 列表中的顺序（不在列表中的排在所有 VIP 之后）、
+    受众类型（'groups_first' 时群组在前，'friends_first' 时好友在前）、群成员数从多到少、
+    平台返回的原始顺序排序；排序与匀速发送都需要先拿到完整的会话列表。
+
+    指定截止时间时，每次放行后把上次放行到截止时间的这段时间按剩余会话数均分，得到下一次的间隔，
+    剩余的发送均匀铺满到截止时间之前；发送变慢时间隔随之缩短，已落后时不再等待。
+    """
+
+    ORDERS = ('listed', 'groups_first', 'friends_first')
+
+    def __init__(self, order: str = 'listed', vip: Iterable[str] = (), deadline_minutes: float = 0):
+        """
+        Args:
+            order (str): 受众顺序，'listed'、'groups_first' 或 'friends_first'，其他值按 'listed' 处理。
+            vip (Iterable[str]): 优先发送的会话，可写会话 ID（如 `123456`）、带类型的 ID
+                （如 `group:123456`、`friend:123456`）或完整的会话标识。
+            deadline_minutes (float): 从计划发送时间起算的完成时限（分钟），0 表示不限制、尽快发送。
+        """
+        self.order = order if order in self.ORDERS else 'listed'
+        self.vip: dict[str, int] = {}
+        for entry in vip:
+            entry = str(entry).strip()
+            if entry and entry not in self.vip:
+                self.vip[entry] = len(self.vip)
+        self.deadline_minutes = max(0.0, deadline_minutes)
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'DeliveryQueue':
+        """根据 `broadcast` 配置项创建投递队列，缺失或非法的值使用默认值。"""
+        config = config or {}
+        try:
+            deadline = float(config.get('deadline_minutes', 0) or 0)
+        except (TypeError, ValueError):
+            deadline = 0.0
+        vip = config.get('vip_sessions') or []
+        if isinstance(vip, str):
+            vip = vip.replace('，', ',').split(',')
+        return cls(str(config.get('priority_order', 'listed')), vip, deadline)
+
+    @property
+    def passthrough(self) -> bool:
+        """既不排序也不限定截止时间时为 True，目标原样流式放行。"""
+        return self.order == 'listed' and not self.vip and not self.deadline_minutes
+
+    def _vip_rank(self, target: BroadcastTarget) -> int:
+        rid = target.session.rsplit(':', 1)[-1]
+        ranks = [self.vip.get(key) for key in (target.session, f"{target.audience}:{rid}", rid)]
+        ranks = [r for r in ranks if r is not None]
+        return min(ranks) if ranks else len(self.vip)
+
+    def sort_key(self, target: BroadcastTarget, seq: int) -> tuple:
+        """目标的排序键，越小越先发送。"""
+        if self.order == 'listed':
+            audience_rank = 0
+        else:
+            first = 'group' if self.order == 'groups_first' else 'friend'
+            audience_rank = 0 if target.audience == first else 1
+        members = target.member_count if self.order != 'listed' else 0
+        return self._vip_rank(target), audience_rank, -members, seq
+
+    async def arrange(self, targets: AsyncIterable[BroadcastTarget], deadline: float | None = None,
+                      pending: Callable[[str], bool] | None = None) -> AsyncIterator[BroadcastTarget]:
+        """
+        按优先级与截止时间放行目标。
+
+        Args:
+            targets (AsyncIterable[BroadcastTarget]): 待发送的目标。
+            deadline (float, optional): 截止时间（事件循环时钟 `loop.time()`），缺省或已过时尽快放行。
+            pending (Callable[[str], bool], optional): 判断会话是否仍需发送，例如 `JournalRun.should_send`。
+                不需要发送的会话立即放行（由广播引擎跳过），不占用匀速发送的名额。
+
+        Yields:
+            BroadcastTarget: 按顺序放行的目标。
+        """
+        if self.passthrough:
+            async for target in targets:
+                yield target
+            return
+
+        collected = [target async for target in targets]
+        ordered = [t for _key, t in sorted(((self.sort_key(t, i), t) for i, t in enumerate(collected)),
+                                           key=lambda pair: pair[0])]
+        pending = pending or (lambda session: True)
+        remaining = sum(1 for t in ordered if pending(t.session))
+        loop = asyncio.get_running_loop()
+        if deadline is not None and deadline > loop.time() and remaining:
+            logger.info(f"将在 {deadline - loop.time():.0f} 秒内匀速发送 {remaining} 个会话，"
+                        f"间隔约 {(deadline - loop.time()) / remaining:.1f} 秒。")
+        else:
+            deadline = None
+        released: float | None = None
+        for target in ordered:
+            if not pending(target.session):
+                yield target
+                continue
+            if deadline is not None and released is not None:
+                wait = released + max(0.0, deadline - released) / (remaining + 1) - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            released = loop.time()
+            remaining -= 1
+            yield target
@@ -0,0 +1,345 @@
+import asyncio
+import json
+import re
+import time
+import zlib
+from collections import deque
+from typing import Any, Callable
+
+from astrbot.api import logger
+
+from .metrics import METRICS
+
+# 少于该样本数时使用配置的对冲等待时间，而不是观测到的 p90
+_MIN_SAMPLES = 5
+
+
+class CircuitBreaker:
+    """
+    单个提供商的熔断器。
+
+    连续失败 `threshold` 次后熔断，`cooldown` 秒内跳过该提供商；冷却结束后放行一次试探调用，
+    成功则恢复，失败则再次熔断。
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 300):
+        """
+        Args:
+            threshold (int): 触发熔断的连续失败次数。
+            cooldown (float): 熔断持续的秒数。
+        """
+        self.threshold = max(1, int(threshold))
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """'closed'（正常）、'open'（熔断中）或 'half-open'（等待试探结果）。"""
+        if self.opened_at is None:
+            return 'closed'
+        if self._probing or time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """是否可以调用该提供商；冷却结束后只放行一次试探调用。"""
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """调用被取消、结果未知时归还试探机会。"""
+        self._probing = False
+
+
+class ProviderStats:
+    """单个提供商最近若干次成功调用的耗时与熔断状态。"""
+
+    def __init__(self, breaker: CircuitBreaker, window: int = 50):
+        self.breaker = breaker
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.wins = 0
+
+    def p90(self) -> float | None:
+        if len(self.latencies) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+
+class GenerationEngine:
+    """
+    多提供商的祝福语生成引擎。
+
+    按顺序尝试提供商，整次生成不超过 `timeout` 秒。当前提供商在其观测到的 p90 延迟内
+    仍未返回时，同时请求下一个提供商（对冲），取最先返回的有效结果并取消其余请求；
+    某个提供商失败时立即改用下一个。连续失败的提供商由熔断器暂时跳过。
+    所有提供商都失败时返回空字符串，由调用方回退到模板。
+    """
+
+    def __init__(self, timeout: float = 30, hedge_delay: float = 8, breaker_threshold: int = 3,
+                 breaker_cooldown: float = 300, min_length: int = 10):
+        """
+        Args:
+            timeout (float): 单次生成的总时间预算（秒）。
+            hedge_delay (float): 样本不足时，发出对冲请求前等待的秒数。
+            breaker_threshold (int): 触发熔断的连续失败次数。
+            breaker_cooldown (float): 熔断持续的秒数。
+            min_length (int): 有效祝福语的最短长度，更短的回复视为失败。
+        """
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.min_length = min_length
+        self.providers: dict[str, ProviderStats] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'GenerationEngine':
+        """根据 `llm_generation` 配置项创建引擎，缺失或非法的值使用默认值。"""
+        config = config or {}
+
+        def number(key, default, cast):
+            try:
+                value = cast(config.get(key, default))
+                return value if value > 0 else default
+            except (TypeError, ValueError):
+                return default
+
+        return cls(
+            timeout=number('timeout_seconds', 30.0, float),
+            hedge_delay=number('hedge_delay_seconds', 8.0, float),
+            breaker_threshold=number('circuit_failures', 3, int),
+            breaker_cooldown=number('circuit_cooldown_minutes', 5.0, float) * 60,
+        )
+
+    def stats_for(self, key: str) -> ProviderStats:
+        stats = self.providers.get(key)
+        if stats is None:
+            stats = self.providers[key] = ProviderStats(CircuitBreaker(self.breaker_threshold, self.breaker_cooldown))
+        return stats
+
+    def hedge_after(self, key: str) -> float:
+        """等待提供商 `key` 多少秒后发出对冲请求。"""
+        p90 = self.stats_for(key).p90()
+        return self.hedge_delay if p90 is None else max(0.2, p90)
+
+    def _accept(self, text: str) -> str | None:
+        return text if len(text) >= self.min_length else None
+
+    async def _call(self, key: str, provider, prompt: str, system_prompt: str, kind: str, state: dict,
+                    parse: Callable[[str], Any]):
+        stats = self.stats_for(key)
+        stats.calls += 1
+        state['started'] = True
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            resp = await provider.text_chat(prompt=prompt, system_prompt=system_prompt)
+            text = (resp.completion_text or '').strip() if resp else ''
+            result = parse(text)
+            if result:
+                outcome = 'ok'
+                stats.latencies.append(time.perf_counter() - started)
+                stats.breaker.record_success()
+                return result
+            outcome = 'empty'
+            logger.warning(f"提供商 {key} 返回的祝福语为空、过短或格式不符。")
+        except asyncio.CancelledError:
+            # 超时视为失败；被对冲请求抢先时结果未知，不计入熔断
+            outcome = state.get('cancel', 'cancelled')
+            if outcome == 'timeout':
+                stats.breaker.record_failure()
+            else:
+                stats.breaker.release()
+            raise
+        except Exception as e:
+            logger.warning(f"提供商 {key} 生成祝福语失败: {e}")
+        finally:
+            METRICS.observe('llm_request_seconds', time.perf_counter() - started, kind=kind, provider=key)
+            METRICS.inc('llm_request_total', kind=kind, provider=key, outcome=outcome)
+        stats.breaker.record_failure()
+        return None
+
+    async def generate(self, providers: list[tuple[str, Any]], prompt: str, system_prompt: str,
+                       kind: str = 'start', parse: Callable[[str], Any] | None = None):
+        """
+        依次（必要时对冲）调用提供商生成祝福语。
+
+        Args:
+            providers (list[tuple[str, Any]]): (标识, 提供商) 列表，按优先级排列。
+            prompt (str): 提示词。
+            system_prompt (str): 系统提示词。
+            kind (str): 祝福类型，用于统计。
+            parse (Callable[[str], Any], optional): 将回复解析为结果的函数，返回假值表示回复无效。
+                缺省时回复本身即结果，长度短于 `min_length` 视为无效。
+
+        Returns:
+            生成的祝福语（或 `parse` 的结果）；全部失败、超时或被熔断时为空字符串。
+        """
+        parse = parse or self._accept
+        queue = [(key, p) for key, p in providers if self.stats_for(key).breaker.allow()]
+        skipped = len(providers) - len(queue)
+        if skipped:
+            logger.info(f"{skipped} 个提供商处于熔断状态，已跳过。")
+        if not queue:
+            return ''
+
+        deadline = time.monotonic() + self.timeout
+        pending: dict[asyncio.Task, tuple[str, dict]] = {}
+        last_key, last_started = '', 0.0
+
+        def launch():
+            nonlocal last_key, last_started
+            key, provider = queue.pop(0)
+            state = {}
+            task = asyncio.create_task(self._call(key, provider, prompt, system_prompt, kind, state, parse))
+            pending[task] = (key, state)
+            last_key, last_started = key, time.monotonic()
+
+        launch()
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    logger.warning(f"生成祝福语超过 {self.timeout:g} 秒仍未完成，放弃等待。")
+                    for _key, state in pending.values():
+                        state['cancel'] = 'timeout'
+                    break
+                wait = deadline - now
+                if queue:
+                    wait = min(wait, max(0.0, last_started + self.hedge_after(last_key) - now))
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    key, _state = pending.pop(task)
+                    result = task.result()
+                    if result:
+                        self.stats_for(key).wins += 1
+                        return result
+                if queue and (done or not pending or time.monotonic() - last_started >= self.hedge_after(last_key)):
+                    if not done:
+                        logger.info(f"提供商 {last_key} 在 {self.hedge_after(last_key):.1f} 秒内未返回，同时请求 {queue[0][0]}。")
+                    launch()
+            return ''
+        finally:
+            # 未用到的提供商归还熔断器的试探机会
+            for key, _provider in queue:
+                self.stats_for(key).breaker.release()
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for key, state in pending.values():
+                if not state.get('started'):
+                    self.stats_for(key).breaker.release()
+
+    def summary_lines(self) -> list[str]:
+        """供 `blessings stats` 展示的各提供商状态。"""
+        state_names = {'closed': "正常", 'open': "熔断中", 'half-open': "试探中"}
+        lines = []
+        for key, stats in self.providers.items():
+            p90 = stats.p90()
+            lines.append(
+                f"{key}: 调用 {stats.calls}，采用 {stats.wins}，p90 "
+                f"{f'{p90:.1f} s' if p90 is not None else '样本不足'}，{state_names[stats.breaker.state]}"
+            )
+        return lines
+
+
+def variants_prompt(prompt: str, count: int) -> str:
+    """在单条祝福的提示词后追加批量生成 `count` 条不同祝福语的要求。"""
+    return (
+        f"{prompt}\n请一次写出 {count} 条祝福语，每条都要符合上述要求，且用词、句式和侧重点互不相同。"
+        f"只输出一个 JSON 字符串数组，例如 [\"第一条\", \"第二条\"]，不要输出编号、解释或其他内容。"
+    )
+
+
+# 逐行回退解析时去掉的行首编号与项目符号，例如 "1." "2、" "- "
+_LINE_PREFIX = re.compile(r'^\s*(?:[-*•]|\d+\s*[.、:：)）]|[（(]\d+[)）])\s*')
+
+
+def parse_variants(text: str, count: int, min_length: int = 10) -> list[str]:
+    """
+    解析批量生成的回复。
+
+    优先按 JSON 字符串数组解析（允许数组前后有多余文字或代码块标记），没有得到字符串条目时按行拆分：
+    有编号或项目符号的行时只取这些行并去掉编号，否则取所有行。
+    过短的条目丢弃，重复的条目只保留一次，最多返回 `count` 条。
+
+    Args:
+        text (str): LLM 的回复。
+        count (int): 需要的条数。
+        min_length (int): 有效祝福语的最短长度，更短的条目被丢弃。
+
+    Returns:
+        list[str]: 有效的祝福语，可能少于 `count` 条；无法解析时为空列表。
+    """
+    items = None
+    start, end = text.find('['), text.rfind(']')
+    if 0 <= start < end:
+        try:
+            data = json.loads(text[start:end + 1])
+            if isinstance(data, list):
+                items = [item for item in data if isinstance(item, str)]
+        except json.JSONDecodeError:
+            pass
+    if not items:
+        # 没有 JSON 数组，或方括号里不是字符串（例如 "以下是 [3] 条祝福"）时按行拆分；
+        # 有编号的行时只取编号行，跳过 "以下是……" 之类的引导语
+        lines = text.splitlines()
+        numbered = [line for line in lines if _LINE_PREFIX.match(line)]
+        items = [_LINE_PREFIX.sub('', line) for line in (numbered or lines)]
+    variants: list[str] = []
+    for item in items:
+        item = item.strip().strip('"“”').strip()
+        if len(item) >= min_length and item not in variants:
+            variants.append(item)
+        if len(variants) >= count:
+            break
+    return variants
+
+
+class VariantAssigner:
+    """
+    为每个会话分配一条祝福语变体。
+
+    'hash' 按会话标识的 CRC32 取模，同一会话总是分到同一条，续发时也不会变化；
+    'round_robin' 按会话产出的顺序轮流分配，各变体的数量最均匀。
+    """
+
+    MODES = ('hash', 'round_robin')
+
+    def __init__(self, mode: str = 'hash'):
+        """
+        Args:
+            mode (str): 分配方式，'hash' 或 'round_robin'，其他值按 'hash' 处理。
+        """
+        self.mode = mode if mode in self.MODES else 'hash'
+        self._counters: dict[str, int] = {}
+
+    def pick(self, audience: str, session: str, variants: list):
+        """从 `variants` 中为会话选择一项。"""
+        if len(variants) == 1:
+            return variants[0]
+        if self.mode == 'round_robin':
+            index = self._counters.get(audience, 0)
+            self._counters[audience] = index + 1
+            return variants[index % len(variants)]
+        return variants[zlib.crc32(session.encode('utf-8')) % len(variants)]
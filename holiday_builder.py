@@ -0,0 +1,228 @@
+"""
+整年批量构建节假日标记。
+
+直接读取 `chinese_calendar` 内部的节假日/调休上班/调休假期三张表，
+每年的所有标记以位图（Python 整数，第 i 位对应当年第 i 天）表示，
+通过一次位运算同时得到全年的节假日、工作日、首日与末日标记，
+不再逐日调用 `get_holiday_detail`/`is_holiday`/`is_workday`/`is_in_lieu`。
+
+本模块只依赖 `chinese_calendar`，可在插件之外单独使用（例如基准测试）。
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import chinese_calendar
+from chinese_calendar import constants as cc_constants
+
+_year_tables_cache: dict = {}
+
+
+@dataclass
+class YearFlags:
+    """
+    某一年全部日期的标记位图。
+
+    Attributes:
+        year (int): 年份。
+        days (int): 当年天数。
+        holiday (int): 休息日（含周末）位图。
+        workday (int): 工作日位图。
+        in_lieu (int): 调休假期位图。
+        first_day (int): 假期第一天位图。
+        last_day (int): 假期最后一天位图。
+        names (dict[int, str]): 法定节假日在当年的序号 -> 英文名称。
+    """
+    year: int
+    days: int
+    holiday: int
+    workday: int
+    in_lieu: int
+    first_day: int
+    last_day: int
+    names: dict[int, str] = field(default_factory=dict)
+
+
+def supported_years() -> range:
+    """返回当前安装的 `chinese_calendar` 覆盖的年份范围。"""
+    years = [d.year for d in cc_constants.holidays]
+    return range(min(years), max(years) + 1)
+
+
+def calendar_version() -> str:
+    """返回当前安装的 `chinese_calendar` 版本号。"""
+    return getattr(chinese_calendar, '__version__', 'unknown')
+
+
+def source_hash(year: int) -> str:
+    """
+    返回某年在 `chinese_calendar` 源数据表（节假日、调休上班、调休假期）中的内容哈希。
+
+    升级 `chinese_calendar` 后只有安排确实变化的年份哈希才会改变，据此判断缓存是否过期。
+    """
+    names, workdays, in_lieu = _year_tables().get(year, ({}, 0, 0))
+    raw = json.dumps([sorted(names.items()), workdays, in_lieu], ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def calendar_meta(year: int) -> dict:
+    """随缓存保存的数据来源信息：`chinese_calendar` 版本与该年源数据的哈希。"""
+    meta = {'chinese_calendar': calendar_version()}
+    if year in supported_years():
+        meta['source_hash'] = source_hash(year)
+    return meta
+
+
+def is_current(year: int, meta: dict | None) -> bool:
+    """
+    判断按 `meta` 生成的缓存是否与当前安装的 `chinese_calendar` 一致。
+
+    只比较该年源数据的哈希，版本号不同但该年安排未变时仍视为一致；
+    `chinese_calendar` 不支持的年份无法重新计算，总是视为一致。
+    """
+    if year not in supported_years():
+        return True
+    return bool(meta) and meta.get('source_hash') == source_hash(year)
+
+
+def _year_tables() -> dict[int, tuple[dict[int, str], int, int]]:
+    """
+    将 `chinese_calendar` 的三张表按年份拆分为 (序号->名称, 调休上班位图, 调休假期位图)。
+
+    结果按表的大小缓存，整个进程只扫描一次。
+    """
+    key = (len(cc_constants.holidays), len(cc_constants.workdays), len(cc_constants.in_lieu_days))
+    cached = _year_tables_cache.get(key)
+    if cached is not None:
+        return cached
+    tables: dict[int, list] = {}
+
+    def slot(d: date) -> list:
+        if d.year not in tables:
+            tables[d.year] = [{}, 0, 0]
+        return tables[d.year]
+
+    for d, name in cc_constants.holidays.items():
+        slot(d)[0][d.timetuple().tm_yday - 1] = name
+    for d in cc_constants.workdays:
+        slot(d)[1] |= 1 << (d.timetuple().tm_yday - 1)
+    for d in cc_constants.in_lieu_days:
+        slot(d)[2] |= 1 << (d.timetuple().tm_yday - 1)
+    result = {y: (t[0], t[1], t[2]) for y, t in tables.items()}
+    _year_tables_cache.clear()
+    _year_tables_cache[key] = result
+    return result
+
+
+def _weekend_mask(year: int, days: int) -> int:
+    """当年所有周六、周日的位图。"""
+    # 以一周为单位的 7 位模式重复铺满全年，再按 1 月 1 日的星期对齐
+    offset = date(year, 1, 1).weekday()
+    week = 0b1100000  # 周一为第 0 位，第 5、6 位为周六、周日
+    pattern = 0
+    for _ in range(days // 7 + 2):
+        pattern = pattern << 7 | week
+    full = (1 << days) - 1
+    return (pattern >> offset) & full
+
+
+def build_year_flags(year: int) -> YearFlags:
+    """
+    一次性计算某年全部日期的标记。
+
+    与逐日调用 `chinese_calendar` 的结果一致：
+    - 调休上班日和非法定节假日的工作日为工作日，其余为休息日；
+    - 法定节假日在前一天不是休息日或名称不同时为“第一天”；
+    - 休息日在后一天不是休息日（或已到年末）时为“最后一天”。
+
+    Args:
+        year (int): 年份。
+
+    Returns:
+        YearFlags: 当年的标记位图。
+
+    Raises:
+        NotImplementedError: 安装的 `chinese_calendar` 不支持该年份。
+    """
+    years = supported_years()
+    if year not in years:
+        raise NotImplementedError(
+            f"no available data for year {year}, only year between [{years.start}, {years.stop - 1}] supported"
+        )
+    names, extra_workdays, in_lieu = _year_tables().get(year, ({}, 0, 0))
+    # 同时出现在调休上班表中的日期按上班处理，与 get_holiday_detail 一致
+    names = {i: n for i, n in names.items() if not extra_workdays >> i & 1}
+    days = (date(year, 12, 31) - date(year, 1, 1)).days + 1
+    full = (1 << days) - 1
+
+    named = 0
+    for i in names:
+        named |= 1 << i
+    weekdays = ~_weekend_mask(year, days) & full
+    workday = (weekdays & ~named | extra_workdays) & full
+    holiday = ~workday & full
+
+    # 名称变化：法定节假日的前一天名称不同（含前一天无名称的休息日）
+    name_change = 0
+    for i, name in names.items():
+        if i == 0 or names.get(i - 1) != name:
+            name_change |= 1 << i
+    prev_holiday = holiday << 1 & full
+    first_day = named & (~prev_holiday | name_change) & full
+    next_holiday = holiday >> 1
+    last_day = holiday & ~next_holiday & full
+
+    return YearFlags(
+        year=year, days=days, holiday=holiday, workday=workday, in_lieu=in_lieu & full,
+        first_day=first_day, last_day=last_day, names=names,
+    )
+
+
+def day_flags(flags: YearFlags, i: int) -> dict[str, bool]:
+    """返回当年第 i 天（从 0 开始）的五个标记。"""
+    return {
+        'is_holiday': bool(flags.holiday >> i & 1),
+        'is_workday': bool(flags.workday >> i & 1),
+        'is_in_lieu': bool(flags.in_lieu >> i & 1),
+        'is_first_day': bool(flags.first_day >> i & 1),
+        'is_last_day': bool(flags.last_day >> i & 1),
+    }
+
+
+def day_record(flags: YearFlags, i: int, translated: dict[str, str] | None = None) -> dict:
+    """返回当年第 i 天（从 0 开始）的字典记录，格式与 `flags_to_records` 相同。"""
+    name = flags.names.get(i)
+    return {
+        'date': (date(flags.year, 1, 1) + timedelta(days=i)).isoformat(),
+        'holiday_name': (translated or {}).get(name, name) if name else '',
+        **day_flags(flags, i),
+    }
+
+
+def flags_to_records(flags: YearFlags, translated: dict[str, str] | None = None) -> list:
+    """
+    将位图展开为插件使用的逐日字典列表。
+
+    Args:
+        flags (YearFlags): 当年的标记位图。
+        translated (dict[str, str], optional): 英文名称 -> 显示名称，缺省时使用英文名。
+
+    Returns:
+        list: 全年每一天的字典记录。
+    """
+    translated = translated or {}
+    start = date(flags.year, 1, 1)
+    records = []
+    for i in range(flags.days):
+        name = flags.names.get(i)
+        records.append({
+            'date': (start + timedelta(days=i)).isoformat(),
+            'holiday_name': translated.get(name, name) if name else '',
+            'is_holiday': bool(flags.holiday >> i & 1),
+            'is_workday': bool(flags.workday >> i & 1),
+            'is_in_lieu': bool(flags.in_lieu >> i & 1),
+            'is_first_day': bool(flags.first_day >> i & 1),
+            'is_last_day': bool(flags.last_day >> i & 1),
+        })
+    return records
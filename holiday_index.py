@@ -0,0 +1,79 @@
+from datetime import date
+
+
+class HolidayIndex:
+    """
+    按日期序数索引的节假日记录，查询某天的信息为 O(1)。
+
+    由节假日列表构建，列表中每条记录需包含 ISO 格式的 'date' 字段。
+    列表被整体替换时应重新构建索引。
+    """
+
+    __slots__ = ('_by_ordinal',)
+
+    def __init__(self, holidays: list | None = None):
+        """
+        Args:
+            holidays (list, optional): 节假日记录列表，可跨多个年份。
+        """
+        self._by_ordinal: dict[int, dict] = {}
+        for h in holidays or ():
+            try:
+                self._by_ordinal[date.fromisoformat(h['date']).toordinal()] = h
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def get(self, day: date | str) -> dict | None:
+        """
+        返回指定日期的记录。
+
+        Args:
+            day (date | str): 日期对象或 ISO 格式日期字符串。
+
+        Returns:
+            dict | None: 该日期的记录，不存在时返回 None。
+        """
+        if isinstance(day, str):
+            try:
+                day = date.fromisoformat(day)
+            except ValueError:
+                return None
+        return self._by_ordinal.get(day.toordinal())
+
+    def __contains__(self, day: date) -> bool:
+        return self.get(day) is not None
+
+    def __len__(self) -> int:
+        return len(self._by_ordinal)
+
+
+def summarize_holidays(holidays) -> dict[str, int]:
+    """
+    一次遍历统计节假日数据。
+
+    Args:
+        holidays: 节假日记录的可迭代对象；带有预先统计的 `counts`（如 `HolidayYear`）时直接返回其副本。
+
+    Returns:
+        dict[str, int]: 总天数、节假日、工作日、调休日与假期第一天的数量。
+    """
+    counts = getattr(holidays, 'counts', None)
+    if counts is not None:
+        return dict(counts)
+    total = holiday = workday = in_lieu = first_day = 0
+    for h in holidays:
+        total += 1
+        holiday += bool(h['is_holiday'])
+        workday += bool(h['is_workday'])
+        in_lieu += bool(h['is_in_lieu'])
+        first_day += bool(h['is_first_day'])
+    return {'total': total, 'holiday': holiday, 'workday': workday, 'in_lieu': in_lieu, 'first_day': first_day}
+
+
+def as_index(holidays) -> 'HolidayIndex':
+    """
+    返回节假日数据的日期索引。
+
+    数据自身可按日期查询（如 `HolidayYear`，带有 `get` 方法）时直接返回，字典列表则构建 `HolidayIndex`。
+    """
+    return holidays if callable(getattr(holidays, 'get', None)) else HolidayIndex(holidays)
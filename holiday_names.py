@@ -0,0 +1,80 @@
+"""
+节日名称的离线本地化。
+
+依次使用 `chinese_calendar` 的 `Holiday` 枚举自带的中文名、本模块内置的对照表，
+把 "Dragon Boat Festival" 这样的英文名称转换为统一的中文名称（如“端午节”），无需联网。
+本模块只依赖 `chinese_calendar`，可在插件之外单独使用。
+"""
+from chinese_calendar.constants import Holiday
+
+# 统一使用带“节”字的全称，与祝福语模板的键一致
+_CANONICAL = {
+    '元旦': '元旦',
+    '春节': '春节',
+    '清明': '清明节',
+    '清明节': '清明节',
+    '劳动节': '劳动节',
+    '五一': '劳动节',
+    '端午': '端午节',
+    '端午节': '端午节',
+    '国庆': '国庆节',
+    '国庆节': '国庆节',
+    '中秋': '中秋节',
+    '中秋节': '中秋节',
+    '元宵': '元宵节',
+    '元宵节': '元宵节',
+}
+
+# 内置英文名称对照表（键为小写），覆盖 `Holiday` 枚举之外的常见写法
+BUNDLED_NAMES = {
+    "new year's day": '元旦',
+    'new year': '元旦',
+    'spring festival': '春节',
+    'chinese new year': '春节',
+    'lunar new year': '春节',
+    'lantern festival': '元宵节',
+    'tomb-sweeping day': '清明节',
+    'tomb sweeping day': '清明节',
+    'qingming festival': '清明节',
+    'labour day': '劳动节',
+    'labor day': '劳动节',
+    'may day': '劳动节',
+    'dragon boat festival': '端午节',
+    'national day': '国庆节',
+    'mid-autumn festival': '中秋节',
+    'mid autumn festival': '中秋节',
+    'anti-fascist 70th day': '中国人民抗日战争暨世界反法西斯战争胜利70周年纪念日',
+}
+
+_ENUM_NAMES = {h.value: h.chinese for h in Holiday}
+
+
+def _has_cjk(text: str) -> bool:
+    return any('一' <= ch <= '鿿' for ch in text)
+
+
+def canonical_holiday_name(name: str) -> str:
+    """将中文节日名称的简称统一为全称，例如“中秋” -> “中秋节”；未知名称原样返回。"""
+    name = (name or '').strip()
+    return _CANONICAL.get(name, name)
+
+
+def localize_holiday_name(name: str) -> str | None:
+    """
+    离线获取节日的中文名称。
+
+    Args:
+        name (str): `chinese_calendar` 给出的英文名称，也可以是中文名称。
+
+    Returns:
+        str | None: 统一后的中文名称；离线数据中找不到时返回 None。
+    """
+    if not name:
+        return ''
+    name = name.strip()
+    if _has_cjk(name):
+        return canonical_holiday_name(name)
+    chinese = _ENUM_NAMES.get(name)
+    if chinese:
+        return canonical_holiday_name(chinese)
+    return BUNDLED_NAMES.get(name.lower())
@@ -0,0 +1,168 @@
+"""
+逐年节假日记录的生成与增量更新。
+
+由 `holiday_builder` 的位图批量计算全年标记，节日名称优先离线本地化，
+必要时联网翻译（结果写入 `TranslationCache`）。`HolidayStore` 以这里的
+`get_year_holidays`/`refresh_year_holidays` 作为构建与更新函数。
+"""
+import asyncio
+from datetime import date, timedelta
+
+from cn_bing_translator import Translator
+
+try:
+    from astrbot.api import logger
+except ImportError:
+    # 在插件之外（例如基准测试）使用时
+    import logging
+    logger = logging.getLogger(__name__)
+
+from .holiday_builder import build_year_flags, day_flags, day_record, flags_to_records
+from .holiday_names import localize_holiday_name
+from .metrics import METRICS
+from .translation_cache import TranslationCache
+
+
+async def _translate_online(holiday_name: str) -> str | None:
+    """调用必应翻译获取中文名称，失败时返回 None。"""
+    try:
+        # 使用 to_thread 在单独的线程中运行同步的翻译函数
+        translator = Translator(toLang='zh-Hans')
+        with METRICS.timer('translation_seconds'):
+            result = await asyncio.to_thread(translator.process, holiday_name)
+        return result or None
+    except Exception as e:
+        logger.warning(f"翻译节日名称 '{holiday_name}' 失败: {e}")
+        return None
+
+
+async def translate_holiday_name(holiday_name: str, cache: TranslationCache | None = None,
+                                 online: bool = False) -> str:
+    """
+    将英文节假日名称转换为中文。
+
+    优先使用离线数据（`chinese_calendar` 的 `Holiday` 枚举与内置对照表），
+    离线数据中找不到且允许联网时才调用必应翻译。
+
+    Args:
+        holiday_name (str): 英文节假日名称。
+        cache (TranslationCache, optional): 翻译缓存，命中时不再访问网络。
+        online (bool): 离线数据中找不到时是否联网翻译。
+
+    Returns:
+        str: 中文名称，无法转换时返回原名称。
+    """
+    if not holiday_name:
+        return ''
+    localized = localize_holiday_name(holiday_name)
+    if localized:
+        return localized
+    if not online:
+        return holiday_name
+    if cache is not None:
+        result = await cache.get_or_translate(holiday_name, 'zh-Hans', _translate_online)
+    else:
+        result = await _translate_online(holiday_name)
+    return result if result else holiday_name
+
+
+async def get_year_holidays(year: int, translation_cache: TranslationCache | None = None,
+                            online: bool = False) -> list:
+    """
+    获取指定年份的完整节假日信息。
+
+    通过 `build_year_flags` 一次性计算全年的节假日、工作日、调休及
+    假期首日/末日标记，再对当年出现的每个节日名称各转换一次中文名称。
+
+    Args:
+        year (int): 要查询的年份。
+        translation_cache (TranslationCache, optional): 节日名称翻译缓存。
+        online (bool): 离线数据中找不到节日名称时是否联网翻译。
+
+    Returns:
+        list: 包含全年每一天详细信息的字典列表。
+    """
+    logger.info(f"正在获取 {year} 年的节假日信息...")
+    with METRICS.timer('year_build_seconds'):
+        return await _build_year_records(year, translation_cache, online)
+
+
+async def _build_year_records(year: int, translation_cache: TranslationCache | None, online: bool) -> list:
+    try:
+        flags = build_year_flags(year)
+    except Exception as e:
+        logger.warning(f"计算 {year} 年节假日标记失败，将使用默认记录: {e}")
+        # 出错时添加默认记录以保证数据完整性
+        start_date = date(year, 1, 1)
+        days = (date(year, 12, 31) - start_date).days + 1
+        return [{
+            'date': (start_date + timedelta(days=i)).isoformat(), 'holiday_name': '', 'is_holiday': False,
+            'is_workday': True, 'is_in_lieu': False, 'is_first_day': False, 'is_last_day': False
+        } for i in range(days)]
+
+    translated = {}
+    for name in dict.fromkeys(flags.names.values()):
+        translated[name] = await translate_holiday_name(name, translation_cache, online)
+    return flags_to_records(flags, translated)
+
+
+def _describe_change(old: dict, new: dict) -> str:
+    """单日变化的简写，例如 `10-08 班→休 +调休 国庆节`。"""
+    parts = []
+    if bool(old.get('is_holiday')) != new['is_holiday']:
+        parts.append("班→休" if new['is_holiday'] else "休→班")
+    for key, label in (('is_in_lieu', "调休"), ('is_first_day', "首日"), ('is_last_day', "末日")):
+        if bool(old.get(key)) != new[key]:
+            parts.append(f"{'+' if new[key] else '-'}{label}")
+    old_name = old.get('holiday_name') or ''
+    if old_name != new['holiday_name']:
+        parts.append(f"{old_name or '无'}→{new['holiday_name'] or '无'}")
+    return f"{new['date'][5:]} {' '.join(parts)}"
+
+
+async def refresh_year_holidays(year: int, holidays: list, translation_cache: TranslationCache | None = None,
+                                online: bool = False) -> list:
+    """
+    按当前安装的 `chinese_calendar` 增量更新某年的缓存数据。
+
+    重新计算全年标记后逐日比较，只有标记或节日名称变化的日期才重新翻译并替换记录，
+    其余记录原样保留；变化以紧凑的差异写入日志。旧数据的天数与该年不符时整年重新生成。
+
+    Args:
+        year (int): 年份。
+        holidays (list): 过期的全年记录。
+        translation_cache (TranslationCache, optional): 节日名称翻译缓存。
+        online (bool): 离线数据中找不到节日名称时是否联网翻译。
+
+    Returns:
+        list: 更新后的全年记录。
+    """
+    flags = build_year_flags(year)
+    if len(holidays) != flags.days:
+        logger.warning(f"{year} 年缓存的天数与日历不符，将整年重新生成。")
+        return await get_year_holidays(year, translation_cache, online)
+
+    changed = []
+    for i, old in enumerate(holidays):
+        name = flags.names.get(i)
+        if any(bool(old.get(key)) != value for key, value in day_flags(flags, i).items()) \
+                or bool(name) != bool(old.get('holiday_name')):
+            changed.append(i)
+        elif name and localize_holiday_name(name) not in (None, old.get('holiday_name')):
+            # 离线名称有变化（例如对照表更新）；联网翻译的名称无法离线核对，保持不变
+            changed.append(i)
+
+    translated = {}
+    for name in dict.fromkeys(flags.names[i] for i in changed if i in flags.names):
+        translated[name] = await translate_holiday_name(name, translation_cache, online)
+    refreshed = list(holidays)
+    for i in changed:
+        refreshed[i] = day_record(flags, i, translated)
+
+    if changed:
+        diff = [_describe_change(holidays[i], refreshed[i]) for i in changed]
+        shown = '；'.join(diff[:20]) + (f"；…等 {len(diff)} 天" if len(diff) > 20 else '')
+        logger.info(f"{year} 年节假日安排有 {len(changed)} 天变化，已增量更新: {shown}")
+    else:
+        logger.info(f"{year} 年节假日安排没有变化，已更新缓存的版本信息。")
+    return refreshed
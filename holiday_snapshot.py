@@ -0,0 +1,329 @@
+import json
+import mmap
+import struct
+import zlib
+from datetime import date, timedelta
+
+# 快照文件布局（小端序）：
+#   头部 16 字节：magic(4s) version(B) flag_count(B) year(H) days(H) name_count(H) crc32(I)
+#   位图：flag_count 个，每个 ceil(days / 8) 字节，第 i 位对应当年第 i 天
+#   名称序号：days 字节，0 表示无名称，n 表示名称表中第 n 个
+#   名称表：name_count 条，每条为 u16 长度 + UTF-8 字节
+#   元数据（版本 2 起）：u16 长度 + UTF-8 JSON，例如 chinese_calendar 版本与源数据哈希
+# crc32 覆盖头部之后的全部内容。一年的数据约 0.7 KB，JSON 分片约 60 KB。
+#
+# 多个年份可打包为一个合集文件：
+#   头部 11 字节：magic(4s) version(B) year_count(H) meta_len(I)
+#   元数据：meta_len 字节的 UTF-8 JSON，例如生成时使用的 chinese_calendar 版本
+#   索引：year_count 条，每条为 year(H) offset(I) length(I)，offset 从文件开头算起
+#   各年份的快照依次排列
+
+MAGIC = b'BHOL'
+VERSION = 2
+# 仍可读取的旧版本，版本 1 没有元数据
+_READABLE_VERSIONS = (1, 2)
+FLAG_FIELDS = ('is_holiday', 'is_workday', 'is_in_lieu', 'is_first_day', 'is_last_day')
+
+_HEADER = struct.Struct('<4sBBHHHI')
+
+BUNDLE_MAGIC = b'BHPK'
+BUNDLE_VERSION = 1
+_BUNDLE_HEADER = struct.Struct('<4sBHI')
+_BUNDLE_ENTRY = struct.Struct('<HII')
+
+
+class SnapshotError(ValueError):
+    """快照文件损坏或版本不受支持。"""
+
+
+def encode_snapshot(year: int, holidays: list, meta: dict | None = None) -> bytes:
+    """
+    将一年的逐日记录编码为二进制快照。
+
+    Args:
+        year (int): 年份。
+        holidays (list): 全年逐日记录，需按日期排序且从 1 月 1 日开始连续。
+        meta (dict, optional): 随快照保存的元数据。
+
+    Returns:
+        bytes: 快照内容。
+    """
+    days = len(holidays)
+    width = (days + 7) // 8
+    bitsets = []
+    for name in FLAG_FIELDS:
+        bits = 0
+        for i, h in enumerate(holidays):
+            if h.get(name):
+                bits |= 1 << i
+        bitsets.append(bits.to_bytes(width, 'little'))
+
+    names: list[str] = []
+    name_ids: dict[str, int] = {}
+    index = bytearray(days)
+    for i, h in enumerate(holidays):
+        name = h.get('holiday_name') or ''
+        if not name:
+            continue
+        if name not in name_ids:
+            names.append(name)
+            name_ids[name] = len(names)
+            if len(names) > 255:
+                raise SnapshotError("节日名称过多，无法编码")
+        index[i] = name_ids[name]
+
+    table = bytearray()
+    for name in names:
+        raw = name.encode('utf-8')
+        table += struct.pack('<H', len(raw)) + raw
+
+    meta_raw = json.dumps(meta or {}, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    table += struct.pack('<H', len(meta_raw)) + meta_raw
+
+    payload = b''.join(bitsets) + bytes(index) + bytes(table)
+    header = _HEADER.pack(MAGIC, VERSION, len(FLAG_FIELDS), year, days, len(names), zlib.crc32(payload))
+    return header + payload
+
+
+class HolidaySnapshot:
+    """
+    只读的二进制快照。
+
+    可由字节串或文件（通过 `mmap`）打开。打开时只解析头部、校验 crc32 并读取名称表，
+    单日信息在访问时才从位图中取出。
+    """
+
+    def __init__(self, buffer):
+        """
+        Args:
+            buffer: 支持缓冲区协议的对象，例如 bytes 或 mmap。
+
+        Raises:
+            SnapshotError: 文件损坏、魔数或版本不匹配。
+        """
+        self._buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < _HEADER.size:
+            raise SnapshotError("快照文件过短")
+        magic, version, flag_count, year, days, name_count, crc = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise SnapshotError("不是节假日快照文件")
+        if version not in _READABLE_VERSIONS or flag_count != len(FLAG_FIELDS):
+            raise SnapshotError(f"不支持的快照版本 {version}")
+        if zlib.crc32(view[_HEADER.size:]) != crc:
+            raise SnapshotError("快照校验失败")
+        self.year = year
+        self.days = days
+        self._width = (days + 7) // 8
+        self._flags_at = _HEADER.size
+        self._index_at = self._flags_at + flag_count * self._width
+        offset = self._index_at + days
+        self.names: list[str] = []
+        for _ in range(name_count):
+            (length,) = struct.unpack_from('<H', view, offset)
+            offset += 2
+            self.names.append(bytes(view[offset:offset + length]).decode('utf-8'))
+            offset += length
+        self.meta: dict = {}
+        if version >= 2:
+            (length,) = struct.unpack_from('<H', view, offset)
+            self.meta = json.loads(bytes(view[offset + 2:offset + 2 + length]).decode('utf-8'))
+        self._view = view
+
+    @classmethod
+    def open(cls, path) -> 'HolidaySnapshot':
+        """通过 `mmap` 打开快照文件。使用完毕后应调用 `close`。"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mapped)
+        except Exception:
+            mapped.close()
+            raise
+
+    def close(self):
+        """释放快照；由 mmap 或 memoryview 打开时一并关闭/释放它。"""
+        self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        elif isinstance(self._buffer, memoryview):
+            self._buffer.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _bit(self, field_no: int, i: int) -> bool:
+        return bool(self._view[self._flags_at + field_no * self._width + (i >> 3)] >> (i & 7) & 1)
+
+    def day(self, i: int) -> dict:
+        """返回当年第 i 天（从 0 开始）的记录。"""
+        if not 0 <= i < self.days:
+            raise IndexError(i)
+        name_no = self._view[self._index_at + i]
+        record = {
+            'date': (date(self.year, 1, 1) + timedelta(days=i)).isoformat(),
+            'holiday_name': self.names[name_no - 1] if name_no else '',
+        }
+        for field_no, name in enumerate(FLAG_FIELDS):
+            record[name] = self._bit(field_no, i)
+        return record
+
+    def get(self, day: date) -> dict | None:
+        """返回指定日期的记录，不属于该年时返回 None。"""
+        if day.year != self.year:
+            return None
+        return self.day(day.timetuple().tm_yday - 1)
+
+    def bitsets(self) -> tuple[int, ...]:
+        """按 `FLAG_FIELDS` 顺序返回各位图，每个位图整体转为一个整数。"""
+        bitsets = []
+        for field_no in range(len(FLAG_FIELDS)):
+            start = self._flags_at + field_no * self._width
+            bitsets.append(int.from_bytes(self._view[start:start + self._width], 'little'))
+        return tuple(bitsets)
+
+    def name_ids(self) -> bytes:
+        """每天的名称序号，0 表示无名称，n 表示 `names[n - 1]`。"""
+        return bytes(self._view[self._index_at:self._index_at + self.days])
+
+    def records(self) -> list:
+        """展开为全年逐日记录列表。"""
+        # 每个位图整体转为整数后再逐位读取，比逐日调用 `day` 快得多
+        holiday, workday, in_lieu, first_day, last_day = self.bitsets()
+        index = self.name_ids()
+        names = [''] + self.names
+        ordinal = date(self.year, 1, 1).toordinal()
+        return [{
+            'date': date.fromordinal(ordinal + i).isoformat(),
+            'holiday_name': names[index[i]],
+            'is_holiday': bool(holiday >> i & 1),
+            'is_workday': bool(workday >> i & 1),
+            'is_in_lieu': bool(in_lieu >> i & 1),
+            'is_first_day': bool(first_day >> i & 1),
+            'is_last_day': bool(last_day >> i & 1),
+        } for i in range(self.days)]
+
+
+def load_snapshot(path) -> tuple[int, list]:
+    """
+    读取快照文件并展开为逐日记录。
+
+    Returns:
+        tuple[int, list]: 年份与逐日记录列表。
+    """
+    with HolidaySnapshot.open(path) as snap:
+        return snap.year, snap.records()
+
+
+def encode_bundle(years: dict[int, list], meta: dict | None = None,
+                  year_meta: dict[int, dict] | None = None) -> bytes:
+    """
+    将多个年份的逐日记录打包为一个合集文件。
+
+    Args:
+        years (dict[int, list]): 年份 -> 全年逐日记录。
+        meta (dict, optional): 随合集保存的元数据。
+        year_meta (dict[int, dict], optional): 年份 -> 随该年快照保存的元数据。
+
+    Returns:
+        bytes: 合集内容。
+    """
+    meta_raw = json.dumps(meta or {}, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    year_meta = year_meta or {}
+    blobs = [(year, encode_snapshot(year, years[year], year_meta.get(year))) for year in sorted(years)]
+    offset = _BUNDLE_HEADER.size + len(meta_raw) + _BUNDLE_ENTRY.size * len(blobs)
+    index = bytearray()
+    for year, blob in blobs:
+        index += _BUNDLE_ENTRY.pack(year, offset, len(blob))
+        offset += len(blob)
+    header = _BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(blobs), len(meta_raw))
+    return header + meta_raw + bytes(index) + b''.join(blob for _, blob in blobs)
+
+
+class HolidayBundle:
+    """
+    只读的多年份快照合集，通过 `mmap` 打开。
+
+    打开时只读取头部、元数据和索引，某一年的快照在访问时才校验和解码。
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 合集文件路径。
+
+        Raises:
+            SnapshotError: 文件损坏、魔数或版本不匹配。
+        """
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._view = memoryview(self._mmap)
+            self._parse()
+        except Exception as e:
+            self.close()
+            if isinstance(e, SnapshotError):
+                raise
+            raise SnapshotError(f"无法解析快照合集: {e}") from e
+
+    def _parse(self):
+        view = self._view
+        if len(view) < _BUNDLE_HEADER.size:
+            raise SnapshotError("快照合集过短")
+        magic, version, count, meta_len = _BUNDLE_HEADER.unpack_from(view, 0)
+        if magic != BUNDLE_MAGIC:
+            raise SnapshotError("不是节假日快照合集")
+        if version != BUNDLE_VERSION:
+            raise SnapshotError(f"不支持的快照合集版本 {version}")
+        offset = _BUNDLE_HEADER.size
+        self.meta: dict = json.loads(bytes(view[offset:offset + meta_len]).decode('utf-8'))
+        offset += meta_len
+        self._entries: dict[int, tuple[int, int]] = {}
+        for _ in range(count):
+            year, start, length = _BUNDLE_ENTRY.unpack_from(view, offset)
+            offset += _BUNDLE_ENTRY.size
+            if start + length > len(view):
+                raise SnapshotError(f"快照合集中 {year} 年的数据不完整")
+            self._entries[year] = (start, length)
+
+    def close(self):
+        view = getattr(self, '_view', None)
+        if view is not None:
+            view.release()
+            self._view = None
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def years(self) -> list[int]:
+        return sorted(self._entries)
+
+    def __contains__(self, year: int) -> bool:
+        return year in self._entries
+
+    def snapshot(self, year: int) -> HolidaySnapshot | None:
+        """返回某年的快照（共享合集的内存映射），合集中没有该年时返回 None。"""
+        entry = self._entries.get(year)
+        if entry is None:
+            return None
+        start, length = entry
+        snap = HolidaySnapshot(self._view[start:start + length])
+        if snap.year != year:
+            snap.close()
+            raise SnapshotError(f"快照合集中 {year} 年的索引与数据不符")
+        return snap
+
+    def records(self, year: int) -> list | None:
+        """展开某年的逐日记录，合集中没有该年时返回 None。"""
+        snap = self.snapshot(year)
+        if snap is None:
+            return None
+        with snap:
+            return snap.records()
@@ -0,0 +1,412 @@
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable
+
+try:
+    from astrbot.api import logger
+except ImportError:
+    # 在插件之外（例如基准测试）使用时
+    import logging
+    logger = logging.getLogger(__name__)
+
+from .holiday_builder import calendar_meta, calendar_version, is_current
+from .holiday_index import HolidayIndex, as_index
+from .holiday_snapshot import HolidayBundle, HolidaySnapshot, SnapshotError, encode_snapshot
+from .holiday_year import HolidayYear, to_year
+from .metrics import METRICS
+from .persistence import WriteBehind, atomic_write, atomic_write_json, dump_json, read_json
+
+
+class HolidayStore:
+    """
+    按年份分片保存的节假日数据仓库。
+
+    每个年份保存为数据目录下的一个分片文件，默认使用二进制快照格式
+    （如 `holidays_2025.bin`，见 `holiday_snapshot`），也可使用 JSON 格式
+    （如 `holidays_2025.json`）。首次访问某年时才从磁盘加载，内存中只保留最近使用的
+    若干个年份。插件随附的预编译合集（见 `tools/build_holiday_tables.py`）中已有的
+    年份直接从合集读取；其余年份的分片不存在时调用构建函数生成并写回磁盘，之后不再重复计算。
+    异步接口在线程池中读取分片；写入经 `WriteBehind` 在事件循环外原子完成。
+
+    合集与分片都记录了生成时的 `chinese_calendar` 版本与该年源数据的哈希（见
+    `holiday_builder.calendar_meta`）。哈希与当前安装的版本不一致的数据视为过期，
+    异步加载时交给更新函数只重新计算变化的日期，并以新的元数据写回分片。
+
+    内存中的每一年保存为按列存储的 `HolidayYear`（快照直接转换，不展开为逐日字典），
+    它同时是该年的日期索引；记录不是完整一年的旧数据仍以字典列表加 `HolidayIndex` 保存。
+    """
+
+    def __init__(self, data_dir, builder: Callable[[int], Awaitable[list]],
+                 file_name: str = 'holidays.json', max_years: int = 3, binary: bool = True,
+                 writer: WriteBehind | None = None, bundle_file=None,
+                 refresher: Callable[[int, list], Awaitable[list]] | None = None):
+        """
+        Args:
+            data_dir: 分片所在目录。
+            builder: 生成某一年完整数据的协程函数，例如 `get_year_holidays`。
+            file_name (str): 配置中的数据文件名，分片名由其主干加年份组成。
+            max_years (int): 内存中最多保留的年份数。
+            binary (bool): 是否以二进制快照格式保存分片。为 False 时保存为 JSON。
+            writer (WriteBehind, optional): 延迟写盘器，缺省时同步原子写入。
+            bundle_file (optional): 预编译快照合集的路径。
+            refresher (optional): 增量更新过期数据的协程函数，参数为年份与旧数据，
+                例如 `refresh_year_holidays`；缺省时过期数据整年重新构建。
+        """
+        self.data_dir = Path(data_dir)
+        self.builder = builder
+        self.refresher = refresher
+        name = Path(file_name)
+        self._stem = name.stem or 'holidays'
+        self._suffix = name.suffix or '.json'
+        self.binary = binary
+        self.writer = writer
+        self.bundle_file = Path(bundle_file) if bundle_file else None
+        self._bundle_checked = False
+        self.max_years = max(1, max_years)
+        self._years: OrderedDict[int, tuple[HolidayYear | list, HolidayYear | HolidayIndex]] = OrderedDict()
+        self._locks: dict[int, asyncio.Lock] = {}
+        # 年份 -> 数据来源：'bundle'（预编译合集）、'snapshot'、'json'（分片）、'build'（现场构建）
+        # 或 'refresh'（过期数据增量更新）
+        self.sources: dict[int, str] = {}
+
+    def path_for(self, year: int) -> Path:
+        """返回指定年份分片文件的路径。"""
+        return self.binary_path_for(year) if self.binary else self.json_path_for(year)
+
+    def json_path_for(self, year: int) -> Path:
+        return self.data_dir / f"{self._stem}_{year}{self._suffix}"
+
+    def binary_path_for(self, year: int) -> Path:
+        return self.data_dir / f"{self._stem}_{year}.bin"
+
+    def _read_shard(self, year: int) -> tuple[list | None, str, bool]:
+        """
+        读取分片，返回 (数据, 来源, 是否与当前 `chinese_calendar` 一致)。
+
+        按合集、二进制分片、JSON 分片的顺序返回第一份未过期的数据，都已过期时返回第一份过期数据。
+        不修改仓库状态，可在线程中调用。
+        """
+        stale = None
+        for source, read in (('bundle', self._read_bundle),
+                             ('snapshot', self._read_binary_shard if self.binary else None),
+                             ('json', self._read_json_shard)):
+            if read is None:
+                continue
+            with METRICS.timer('cache_load_seconds', source=source) as state:
+                found = read(year)
+                if found is None:
+                    state['outcome'] = 'miss'
+                elif not is_current(year, found[1]):
+                    state['outcome'] = 'stale'
+            if found is None:
+                continue
+            if is_current(year, found[1]):
+                return found[0], source, True
+            if stale is None:
+                stale = (found[0], source, False)
+        return stale or (None, '', True)
+
+    def _adopt(self, year: int, holidays, source: str, fresh: bool = True) -> HolidayYear | list | None:
+        if holidays is None:
+            return None
+        if not fresh:
+            # 过期数据只供同步查询临时使用，不放入内存缓存，下次异步加载时更新
+            return holidays
+        if source == 'json' and self.binary:
+            # 旧的 JSON 分片转存为二进制快照，下次启动直接读取快照
+            self._write_shard(year, holidays)
+        self.sources[year] = source
+        return self._remember(year, holidays)
+
+    def _read_bundle(self, year: int) -> tuple[list, dict] | None:
+        if self.bundle_file is None or not self.bundle_file.exists():
+            return None
+        try:
+            with HolidayBundle(self.bundle_file) as bundle:
+                built_with = bundle.meta.get('chinese_calendar')
+                if built_with != calendar_version() and not self._bundle_checked:
+                    logger.info(
+                        f"预编译节假日数据由 chinese_calendar {built_with} 生成，已安装的是 "
+                        f"{calendar_version()}，安排有变化的年份将在首次使用时增量更新。"
+                    )
+                self._bundle_checked = True
+                snap = bundle.snapshot(year)
+                if snap is None:
+                    return None
+                with snap:
+                    # 旧合集的快照没有逐年元数据，只有合集级的版本号
+                    return HolidayYear.from_snapshot(snap), snap.meta or {'chinese_calendar': built_with}
+        except SnapshotError as e:
+            logger.warning(f"预编译节假日数据 {self.bundle_file} 无效: {e}")
+        except Exception as e:
+            logger.error(f"读取预编译节假日数据 {self.bundle_file} 失败: {e}")
+        return None
+
+    def _read_binary_shard(self, year: int) -> tuple[list, dict] | None:
+        path = self.binary_path_for(year)
+        if not path.exists():
+            return None
+        try:
+            with HolidaySnapshot.open(path) as snap:
+                snap_year, holidays, meta = snap.year, HolidayYear.from_snapshot(snap), snap.meta
+            if snap_year == year and holidays:
+                return holidays, meta
+            logger.warning(f"快照 {path} 的年份与文件名不符或数据为空，已忽略。")
+        except SnapshotError as e:
+            logger.warning(f"快照 {path} 无效，将重新生成: {e}")
+        except Exception as e:
+            logger.error(f"从 {path} 加载节假日快照失败: {e}")
+        return None
+
+    def _read_json_shard(self, year: int) -> tuple[list, dict] | None:
+        path = self.json_path_for(year)
+        if not path.exists():
+            return None
+        try:
+            data = read_json(path)
+            if data.get('year') == year and data.get('holidays'):
+                return data['holidays'], data.get('meta') or {}
+            logger.warning(f"分片 {path} 的年份与文件名不符或数据为空，已忽略。")
+        except Exception as e:
+            logger.error(f"从 {path} 加载节假日分片失败: {e}")
+        return None
+
+    def _write_shard(self, year: int, holidays: list):
+        path = self.path_for(year)
+        meta = calendar_meta(year)
+        if self.binary:
+            render = lambda: encode_snapshot(year, holidays, meta)
+        else:
+            render = lambda: dump_json({'year': year, 'meta': meta, 'holidays': [dict(h) for h in holidays]})
+        if self.writer is not None:
+            self.writer.schedule(path, render)
+            return
+        try:
+            atomic_write(path, render())
+            logger.info(f"{year} 年节假日分片已保存到 {path}")
+        except Exception as e:
+            logger.error(f"保存节假日分片到 {path} 失败: {e}")
+
+    def export_json(self, year: int, json_file) -> bool:
+        """
+        将内存或磁盘中已有的某年数据导出为 JSON 文件，格式与旧版缓存相同。
+
+        Args:
+            year (int): 年份。
+            json_file: 导出文件路径。
+
+        Returns:
+            bool: 是否导出成功。
+        """
+        holidays = self.peek_year(year)
+        if holidays is None:
+            return False
+        try:
+            atomic_write_json(json_file, {'year': year, 'meta': calendar_meta(year),
+                                          'holidays': [dict(h) for h in holidays]})
+            return True
+        except Exception as e:
+            logger.error(f"导出节假日数据到 {json_file} 失败: {e}")
+            return False
+
+    def _remember(self, year: int, holidays) -> HolidayYear | list:
+        holidays = to_year(holidays)
+        self._years[year] = (holidays, as_index(holidays))
+        self._years.move_to_end(year)
+        while len(self._years) > self.max_years:
+            self._years.popitem(last=False)
+        return holidays
+
+    def _cached(self, year: int) -> HolidayYear | list | None:
+        cached = self._years.get(year)
+        if cached is None:
+            return None
+        self._years.move_to_end(year)
+        return cached[0]
+
+    def peek_year(self, year: int) -> HolidayYear | list | None:
+        """
+        返回内存或磁盘中已有的某年数据，不触发构建。
+
+        磁盘上的数据已过期时原样返回，不做更新。
+
+        Args:
+            year (int): 年份。
+
+        Returns:
+            HolidayYear | list | None: 该年的数据，分片不存在时返回 None。
+        """
+        cached = self._cached(year)
+        if cached is not None:
+            return cached
+        return self._adopt(year, *self._read_shard(year))
+
+    async def load_year(self, year: int) -> HolidayYear | list | None:
+        """与 `peek_year` 相同，但在线程池中读取分片，不阻塞事件循环；过期的数据更新后再返回。"""
+        cached = self._cached(year)
+        if cached is not None:
+            return cached
+        holidays, source, fresh = await asyncio.to_thread(self._read_shard, year)
+        if holidays is not None and not fresh:
+            async with self._locks.setdefault(year, asyncio.Lock()):
+                cached = self._cached(year)
+                if cached is not None:
+                    return cached
+                refreshed = await self._refresh(year, holidays)
+                if refreshed is None:
+                    # 更新失败时临时使用旧数据，下次加载再试
+                    return holidays
+                refreshed = self.put_year(year, refreshed)
+                self.sources[year] = 'refresh'
+            return refreshed
+        return self._adopt(year, holidays, source)
+
+    async def _refresh(self, year: int, holidays: list) -> list | None:
+        """按当前 `chinese_calendar` 更新过期的数据，失败时返回 None。"""
+        try:
+            if self.refresher is not None:
+                return await self.refresher(year, holidays)
+            logger.info(f"{year} 年节假日数据已过期，正在重新生成...")
+            return await self.builder(year)
+        except Exception as e:
+            logger.error(f"更新 {year} 年过期的节假日数据失败: {e}")
+            return None
+
+    async def get_year(self, year: int) -> HolidayYear | list:
+        """
+        返回某年的数据，分片缺失时构建并保存。
+
+        Args:
+            year (int): 年份。
+
+        Returns:
+            HolidayYear | list: 该年的数据。
+        """
+        holidays = await self.load_year(year)
+        if holidays is not None:
+            return holidays
+        async with self._locks.setdefault(year, asyncio.Lock()):
+            holidays = self._cached(year)
+            if holidays is None:
+                logger.info(f"未找到 {year} 年的节假日分片，正在生成...")
+                holidays = self.put_year(year, await self.builder(year))
+                self.sources[year] = 'build'
+        return holidays
+
+    async def reload_year(self, year: int) -> HolidayYear | list:
+        """
+        丢弃内存中某年的数据，重新从合集或分片读取（过期时更新，缺失时重新构建）。
+
+        Args:
+            year (int): 年份。
+
+        Returns:
+            HolidayYear | list: 重新加载的数据。
+        """
+        if self.writer is not None:
+            # 先写出尚未落盘的分片，避免读到旧文件
+            await self.writer.flush()
+        self._years.pop(year, None)
+        self.sources.pop(year, None)
+        return await self.get_year(year)
+
+    def put_year(self, year: int, holidays) -> HolidayYear | list:
+        """保存某年的数据到分片并放入内存缓存，返回缓存中的数据。"""
+        holidays = to_year(holidays)
+        self._write_shard(year, holidays)
+        return self._remember(year, holidays)
+
+    async def import_legacy(self, json_file) -> int | None:
+        """
+        将旧版单文件缓存导入对应年份的分片（分片已存在时跳过）。
+
+        旧版缓存的元数据缺失或已过期时，先增量更新再导入。
+
+        Args:
+            json_file: 旧版缓存文件路径。
+
+        Returns:
+            int | None: 导入的年份，未导入时返回 None。
+        """
+        if json_file is None or not os.path.exists(json_file):
+            return None
+        try:
+            data = await asyncio.to_thread(read_json, json_file)
+        except Exception as e:
+            logger.warning(f"读取旧版节假日缓存 {json_file} 失败: {e}")
+            return None
+        year, holidays = data.get('year'), data.get('holidays')
+        if not isinstance(year, int) or not holidays or self.path_for(year).exists() \
+                or self.json_path_for(year).exists():
+            return None
+        if not is_current(year, data.get('meta')):
+            holidays = await self._refresh(year, holidays)
+            if holidays is None:
+                return None
+        self.put_year(year, holidays)
+        logger.info(f"已将旧版缓存 {json_file} 导入为 {year} 年分片。")
+        return year
+
+    async def get_day(self, day: date) -> dict | None:
+        """返回任意日期的记录，按需加载所在年份。"""
+        await self.get_year(day.year)
+        return self._years[day.year][1].get(day) if day.year in self._years else None
+
+    async def edge_flags(self, day: date) -> tuple[bool, bool]:
+        """
+        返回某天是否为假期第一天、最后一天，跨年的假期也能正确判断。
+
+        分片内的首/末日标记在年初和年末缺少相邻年份的信息，例如 12 月 30 日
+        至次年 1 月 1 日的元旦假期。对这两天会额外查看相邻年份的分片。
+
+        Args:
+            day (date): 要判断的日期。
+
+        Returns:
+            tuple[bool, bool]: (是否为第一天, 是否为最后一天)。
+        """
+        info = await self.get_day(day)
+        if not info:
+            return False, False
+        is_first = bool(info.get('is_first_day'))
+        is_last = bool(info.get('is_last_day'))
+        if not info.get('is_holiday'):
+            return is_first, is_last
+        if day.month == 1 and day.day == 1 and is_first:
+            prev = await self.get_day(day - timedelta(days=1))
+            if prev and prev.get('is_holiday') and prev.get('holiday_name') == info.get('holiday_name'):
+                is_first = False
+        if day.month == 12 and day.day == 31 and is_last:
+            nxt = await self.get_day(day + timedelta(days=1))
+            if nxt and nxt.get('is_holiday'):
+                is_last = False
+        return is_first, is_last
+
+    async def get_span(self, day: date) -> tuple[date, date] | None:
+        """
+        返回包含某天的连续假期区间，可跨越年份边界。
+
+        Args:
+            day (date): 区间内的任意一天。
+
+        Returns:
+            tuple[date, date] | None: (开始日期, 结束日期)，该天不是假期时返回 None。
+        """
+        info = await self.get_day(day)
+        if not info or not info.get('is_holiday'):
+            return None
+        start = end = day
+        while True:
+            prev = await self.get_day(start - timedelta(days=1))
+            if not prev or not prev.get('is_holiday'):
+                break
+            start -= timedelta(days=1)
+        while True:
+            nxt = await self.get_day(end + timedelta(days=1))
+            if not nxt or not nxt.get('is_holiday'):
+                break
+            end += timedelta(days=1)
+        return start, end
@@ -0,0 +1,166 @@
+from collections.abc import Mapping, Sequence
+from datetime import date
+
+# 五个标记字段，顺序与二进制快照中位图的顺序相同（见 `holiday_snapshot.FLAG_FIELDS`）
+FLAG_FIELDS = ('is_holiday', 'is_workday', 'is_in_lieu', 'is_first_day', 'is_last_day')
+_KEYS = ('date', 'holiday_name') + FLAG_FIELDS
+
+
+class DayRecord(Mapping):
+    """
+    `HolidayYear` 中某一天的只读视图，可以像原来的字典记录一样使用。
+
+    只保存所属年份与日序号，字段在访问时才从位图和名称表中取出。
+    与内容相同的字典比较时相等；需要可修改的副本或写入 JSON 时用 `dict(record)`。
+    """
+
+    __slots__ = ('_year', '_i')
+
+    def __init__(self, year: 'HolidayYear', i: int):
+        self._year = year
+        self._i = i
+
+    def __getitem__(self, key: str):
+        year, i = self._year, self._i
+        if key == 'date':
+            return date.fromordinal(year.ordinal + i).isoformat()
+        if key == 'holiday_name':
+            return year.names[year.name_ids[i]]
+        try:
+            return bool(year.bitsets[FLAG_FIELDS.index(key)] >> i & 1)
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(_KEYS)
+
+    def __len__(self) -> int:
+        return len(_KEYS)
+
+    def __repr__(self) -> str:
+        return f"DayRecord({dict(self)!r})"
+
+
+class HolidayYear(Sequence):
+    """
+    一年的逐日节假日数据，按列存储。
+
+    五个标记各是一个整数位图（第 i 位对应当年第 i 天），节日名称是一个去重后的名称表加
+    每天一个字节的序号，与二进制快照的布局相同。从合集加载一年常驻约 4 KB，原来的 366 个
+    字典加日期索引约 154 KB（`benchmarks/baseline.json` 中的 `resident_year_columnar` 与
+    `resident_year_dicts`）。
+    各标记的天数在构建时一次算好，见 `counts`。
+
+    作为序列使用时逐项产出 `DayRecord`，`get` 按日期 O(1) 查询，因此可以直接替代原来的
+    字典列表和 `HolidayIndex`。数据不可修改，更新时整体替换。
+    """
+
+    __slots__ = ('year', 'days', 'ordinal', 'bitsets', 'name_ids', 'names', 'counts')
+
+    def __init__(self, year: int, bitsets: tuple[int, ...], name_ids: bytes, names: tuple[str, ...]):
+        """
+        Args:
+            year (int): 年份。
+            bitsets (tuple[int, ...]): 按 `FLAG_FIELDS` 顺序的五个位图。
+            name_ids (bytes): 每天一个字节，0 表示无名称，n 表示 `names[n]`。
+            names (tuple[str, ...]): 名称表，第 0 项为空字符串。
+        """
+        self.year = year
+        self.days = len(name_ids)
+        self.ordinal = date(year, 1, 1).toordinal()
+        self.bitsets = tuple(bitsets)
+        self.name_ids = name_ids
+        self.names = names
+        holiday, workday, in_lieu, first_day, _last_day = self.bitsets
+        self.counts = {
+            'total': self.days, 'holiday': holiday.bit_count(), 'workday': workday.bit_count(),
+            'in_lieu': in_lieu.bit_count(), 'first_day': first_day.bit_count(),
+        }
+
+    @classmethod
+    def from_records(cls, records) -> 'HolidayYear':
+        """
+        由逐日记录（字典或 `DayRecord`）构建。
+
+        Raises:
+            ValueError: 记录不是从 1 月 1 日开始、逐日连续的一整年。
+        """
+        if isinstance(records, HolidayYear):
+            return records
+        if not records:
+            raise ValueError("节假日记录为空")
+        start = date.fromisoformat(records[0]['date'])
+        days = (date(start.year, 12, 31) - date(start.year, 1, 1)).days + 1
+        if (start.month, start.day) != (1, 1) or len(records) != days \
+                or date.fromisoformat(records[-1]['date']) != date(start.year, 12, 31):
+            raise ValueError(f"{start.year} 年的节假日记录不是完整的一年")
+        bitsets = [0] * len(FLAG_FIELDS)
+        names: list[str] = ['']
+        name_no: dict[str, int] = {'': 0}
+        name_ids = bytearray(days)
+        for i, record in enumerate(records):
+            for field_no, key in enumerate(FLAG_FIELDS):
+                if record.get(key):
+                    bitsets[field_no] |= 1 << i
+            name = record.get('holiday_name') or ''
+            if name not in name_no:
+                if len(names) > 255:
+                    raise ValueError("节日名称过多")
+                # 名称驻留后，同名的所有天共用一个字符串对象
+                name_no[name] = len(names)
+                names.append(name)
+            name_ids[i] = name_no[name]
+        return cls(start.year, tuple(bitsets), bytes(name_ids), tuple(names))
+
+    @classmethod
+    def from_snapshot(cls, snap) -> 'HolidayYear':
+        """直接由 `HolidaySnapshot` 的位图与名称表构建，不经过逐日字典。"""
+        return cls(snap.year, snap.bitsets(), snap.name_ids(), ('',) + tuple(snap.names))
+
+    def __len__(self) -> int:
+        return self.days
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [DayRecord(self, j) for j in range(*i.indices(self.days))]
+        if i < 0:
+            i += self.days
+        if not 0 <= i < self.days:
+            raise IndexError(i)
+        return DayRecord(self, i)
+
+    def __iter__(self):
+        for i in range(self.days):
+            yield DayRecord(self, i)
+
+    def get(self, day: date | str) -> DayRecord | None:
+        """返回指定日期的记录，不属于该年或日期格式错误时返回 None。"""
+        if isinstance(day, str):
+            try:
+                day = date.fromisoformat(day)
+            except ValueError:
+                return None
+        i = day.toordinal() - self.ordinal
+        return DayRecord(self, i) if 0 <= i < self.days else None
+
+    def __contains__(self, day) -> bool:
+        if isinstance(day, (date, str)):
+            return self.get(day) is not None
+        return super().__contains__(day)
+
+    def to_records(self) -> list[dict]:
+        """展开为原来的字典列表，例如用于写入 JSON。"""
+        return [dict(record) for record in self]
+
+    def __repr__(self) -> str:
+        return f"HolidayYear({self.year}, {self.days} 天)"
+
+
+def to_year(holidays) -> 'HolidayYear | list':
+    """尽量转换为 `HolidayYear`；记录不是完整的一年时原样返回。"""
+    if isinstance(holidays, HolidayYear):
+        return holidays
+    try:
+        return HolidayYear.from_records(holidays)
+    except (KeyError, TypeError, ValueError):
+        return holidays
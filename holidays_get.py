@@ -6,13 +6,33 @@ from chinese_calendar import is_holiday, is_workday
 import chinese_calendar as calendar
 from cn_bing_translator import Translator
 from astrbot.api import logger
+from translation_cache import TranslationCache
+from holiday_index import HolidayIndex
+from persistence import atomic_write_json
+from holiday_names import localize_holiday_name
 
 # JSON 文件路径，将在调用时动态设置
 JSON_FILE = None
+# 翻译缓存，将在调用时动态设置
+TRANSLATION_CACHE = None
+
+async def _translate_online(holiday_name: str) -> str | None:
+    """调用必应翻译，失败或译文与原文相同时返回 None。"""
+    try:
+        translator = Translator(toLang='zh-Hans')
+        # 在单独的线程中运行同步IO操作
+        result = await asyncio.to_thread(translator.process, holiday_name)
+        return result if result and result != holiday_name else None
+    except Exception as e:
+        logger.warning(f"警告: 翻译节日名称 '{holiday_name}' 失败: {e}")
+        return None
 
 async def translate_holiday_name(holiday_name: str) -> str:
     """
-    使用必应翻译将英文的节假日名称翻译成中文。
+    将英文的节假日名称转换为中文。
+
+    优先使用离线数据（`chinese_calendar` 的 `Holiday` 枚举与内置对照表），
+    找不到时才使用必应翻译；若已设置 `TRANSLATION_CACHE`，则优先使用缓存中的译文。
 
     Args:
         holiday_name (str): 英文节假日名称 (例如, 'New Year''s Day')。
@@ -22,14 +42,14 @@ async def translate_holiday_name(holiday_name: str) -> str:
     """
     if not holiday_name:
         return ''
-    try:
-        translator = Translator(toLang='zh-Hans')
-        # 在单独的线程中运行同步IO操作
-        result = await asyncio.to_thread(translator.process, holiday_name)
-        return result if result and result != holiday_name else holiday_name
-    except Exception as e:
-        logger.warning(f"警告: 翻译节日名称 '{holiday_name}' 失败: {e}")
-        return holiday_name
+    localized = localize_holiday_name(holiday_name)
+    if localized:
+        return localized
+    if TRANSLATION_CACHE is not None:
+        result = await TRANSLATION_CACHE.get_or_translate(holiday_name, 'zh-Hans', _translate_online)
+    else:
+        result = await _translate_online(holiday_name)
+    return result or holiday_name
 
 def load_holidays_from_json(json_file: str) -> tuple[int | None, list]:
     """
@@ -69,10 +89,9 @@ def save_holidays_to_json(year: int, holidays: list, json_file: str):
         'holidays': holidays
     }
     try:
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        atomic_write_json(json_file, data)
         logger.info(f"节假日数据已成功保存到 {json_file}")
-    except IOError as e:
+    except OSError as e:
         logger.error(f"错误: 保存节假日数据失败: {e}")
 
 async def get_year_holidays(year: int, json_file: str = None) -> list:
@@ -191,25 +210,25 @@ async def check_single_date(date_input: datetime.date, json_file: str = None):
     """
     # 此函数主要用于演示，直接加载数据
     holidays = await get_current_year_holidays(json_file)
-    
-    for h in holidays:
-        if h['date'] == date_input.isoformat():
-            if h['is_holiday']:
-                logger.info(f"\n查询结果: {date_input} 是假期 - {h['holiday_name']}")
-            else:
-                logger.info(f"\n查询结果: {date_input} 是工作日")
-            
-            if h['is_in_lieu']:
-                logger.info(f"  -> (调休)")
-            return
-            
-    logger.info(f"\n查询结果: 在 {date_input.year} 年的记录中未找到 {date_input}。")
+    h = HolidayIndex(holidays).get(date_input)
+    if h is None:
+        logger.info(f"\n查询结果: 在 {date_input.year} 年的记录中未找到 {date_input}。")
+        return
+
+    if h['is_holiday']:
+        logger.info(f"\n查询结果: {date_input} 是假期 - {h['holiday_name']}")
+    else:
+        logger.info(f"\n查询结果: {date_input} 是工作日")
+
+    if h['is_in_lieu']:
+        logger.info(f"  -> (调休)")
 
 async def main():
     """异步主函数，用于执行脚本逻辑。"""
     # 将JSON文件路径设置为脚本所在目录下的 'holidays.json'
-    global JSON_FILE
+    global JSON_FILE, TRANSLATION_CACHE
     JSON_FILE = os.path.join(os.path.dirname(__file__), 'holidays.json')
+    TRANSLATION_CACHE = TranslationCache(os.path.join(os.path.dirname(__file__), 'translations.json'))
     
     # 获取当前年份的节假日数据
     current_holidays = await get_current_year_holidays(JSON_FILE)
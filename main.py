@@ -4,216 +4,52 @@ from astrbot.api.platform import MessageType
 from astrbot.api import logger
 import astrbot.api.message_components as Comp
 import asyncio
-import json
-import os
-from datetime import datetime, date, timedelta
-from chinese_calendar import is_holiday, is_workday
-import chinese_calendar as ch_calendar
-from cn_bing_translator import Translator
+from datetime import datetime, date, time, timedelta
 from pathlib import Path
+from typing import AsyncIterator
+from .translation_cache import TranslationCache
+from .holiday_index import HolidayIndex, as_index, summarize_holidays
+from .holiday_year import HolidayYear, to_year
+from .holiday_store import HolidayStore
+from .holiday_records import get_year_holidays, refresh_year_holidays
+from .broadcast import BroadcastEngine, BroadcastResult, BroadcastTarget
+from .broadcast_journal import BroadcastJournal, JournalRun
+from .broadcast_report import BroadcastReport, RunTimeline, format_run
+from .coordination import BroadcastCoordinator, ShardGuard
+from .delivery_queue import DeliveryQueue
+from .recipients import RecipientDirectory
+from .recipient_filter import RecipientFilter
+from .blessing_cache import BlessingCache
+from .scheduler import EventScheduler, ScheduledEvent
+from .persistence import WriteBehind, atomic_write
+from .holiday_names import localize_holiday_name
+from .metrics import METRICS
+from .generation import GenerationEngine, VariantAssigner, parse_variants, variants_prompt
 # 已移除配图相关依赖，仅保留文本祝福功能
 
+# 提前多少天在后台准备下一年的节假日数据，跨年零点时直接切换
+ROLLOVER_PREPARE_DAYS = 7
 
 
-async def translate_holiday_name(holiday_name: str) -> str:
-    """
-    使用必应翻译将英文节假日名称翻译为中文。
-
-    Args:
-        holiday_name (str): 英文节假日名称。
-
-    Returns:
-        str: 翻译后的中文名称，失败时返回原名称。
-    """
-    if not holiday_name:
-        return ''
-    try:
-        # 使用 to_thread 在单独的线程中运行同步的翻译函数
-        translator = Translator(toLang='zh-Hans')
-        result = await asyncio.to_thread(translator.process, holiday_name)
-        return result if result else holiday_name
-    except Exception as e:
-        logger.warning(f"翻译节日名称 '{holiday_name}' 失败: {e}")
-        return holiday_name
-
-
-def load_holidays_from_json(json_file: str) -> tuple[int | None, list]:
-    """
-    从JSON文件加载缓存的节假日数据。
-
-    Args:
-        json_file (str): 缓存文件的路径。
-
-    Returns:
-        tuple[int | None, list]: 包含年份和节假日列表的元组，失败则返回 (None, [])。
-    """
-    if json_file is None:
-        json_file = 'holidays.json'
-    if os.path.exists(json_file):
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('year'), data.get('holidays', [])
-        except Exception as e:
-            logger.error(f"从 {json_file} 加载节假日数据失败: {e}")
-            return None, []
-    return None, []
-
-
-def save_holidays_to_json(year: int, holidays: list, json_file: str):
-    """
-    将节假日数据保存到JSON文件。
-
-    Args:
-        year (int): 数据对应的年份。
-        holidays (list): 全年的节假日信息列表。
-        json_file (str): 目标JSON文件的路径。
-    """
-    if json_file is None:
-        json_file = 'holidays.json'
-    data = {'year': year, 'holidays': holidays}
-    try:
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        logger.info(f"节假日数据已保存到 {json_file}")
-    except Exception as e:
-        logger.error(f"保存节假日数据到 {json_file} 失败: {e}")
-
-
-async def get_year_holidays(year: int) -> list:
-    """
-    获取指定年份的完整节假日信息。
-
-    遍历该年的每一天，使用 `chinese_calendar` 库确定日期类型，
-    并标记出每个连续假期的第一天。
-
-    Args:
-        year (int): 要查询的年份。
-
-    Returns:
-        list: 包含全年每一天详细信息的字典列表。
-    """
-    start_date = date(year, 1, 1)
-    end_date = date(year, 12, 31)
-    holidays = []
-    current_date = start_date
-    prev_holiday_name = None
-
-    logger.info(f"正在获取 {year} 年的节假日信息...")
-    while current_date <= end_date:
-        try:
-            on_holiday, holiday_name = ch_calendar.get_holiday_detail(current_date)
-            is_hol = is_holiday(current_date)
-            is_work = is_workday(current_date)
-            is_lieu = ch_calendar.is_in_lieu(current_date)
-            
-            holiday_info = {
-                'date': current_date.isoformat(),
-                'holiday_name': '',
-                'is_holiday': is_hol,
-                'is_workday': is_work,
-                'is_in_lieu': is_lieu,
-                'is_first_day': False,
-                'is_last_day': False
-            }
-            
-            if on_holiday and holiday_name:
-                translated_name = await translate_holiday_name(holiday_name)
-                holiday_info['holiday_name'] = translated_name
-                
-                # 检测是否为连续假期的第一天 (简化逻辑)
-                if not holidays or not holidays[-1]['is_holiday'] or holidays[-1]['holiday_name'] != translated_name:
-                    holiday_info['is_first_day'] = True
-                
-                # 不在逐日遍历中打印详细日志，避免重复与噪声
-                prev_holiday_name = translated_name
-            
-            holidays.append(holiday_info)
-            
-        except Exception as e:
-            logger.warning(f"处理日期 {current_date} 时出错: {e}")
-            # 出错时添加默认记录以保证数据完整性
-            holidays.append({
-                'date': current_date.isoformat(), 'holiday_name': '', 'is_holiday': False,
-                'is_workday': True, 'is_in_lieu': False, 'is_first_day': False, 'is_last_day': False
-            })
-        
-        current_date += timedelta(days=1)
-    
-    # 从后向前遍历，标记假期的最后一天
-    for i in range(len(holidays) - 1, -1, -1):
-        # 当前是假期，并且是最后一天或者后一天不是假期
-        if holidays[i]['is_holiday'] and (i == len(holidays) - 1 or not holidays[i+1]['is_holiday']):
-            holidays[i]['is_last_day'] = True
-            
-    return holidays
-
-
-async def get_current_year_holidays(json_file: str = None) -> list:
-    """
-    获取当前年份的节假日数据，优先从缓存加载。
-
-    Args:
-        json_file (str, optional): 缓存文件的路径。
-
-    Returns:
-        list: 当前年份的节假日数据列表。
-    """
-    current_year = datetime.now().year
-    saved_year, saved_holidays = load_holidays_from_json(json_file)
-
-    if saved_year == current_year and saved_holidays:
-        logger.info(f"已从缓存加载 {current_year} 年节假日数据，共 {len(saved_holidays)} 条记录。")
-        return saved_holidays
-    else:
-        logger.info(f"未找到 {current_year} 年的缓存或数据已过时，正在重新获取...")
-        holidays = await get_year_holidays(current_year)
-        save_holidays_to_json(current_year, holidays, json_file)
-        return holidays
 
-
-def print_holidays_summary(holidays: list, year: int):
+def print_holidays_summary(holidays: HolidayYear | list, year: int):
     """
     在日志中输出指定年份节假日数据的统计摘要。
 
     Args:
-        holidays (list): 节假日数据列表。
+        holidays (HolidayYear | list): 节假日数据，`HolidayYear` 直接使用预先算好的统计。
         year (int): 对应的年份。
     """
     logger.info(f"--- {year} 年节假日摘要 ---")
-    total_days = len(holidays)
-    holiday_count = sum(1 for h in holidays if h['is_holiday'])
-    workday_count = sum(1 for h in holidays if h['is_workday'])
-    lieu_count = sum(1 for h in holidays if h['is_in_lieu'])
-    first_day_count = sum(1 for h in holidays if h['is_first_day'])
-    logger.info(f"总天数: {total_days}")
-    logger.info(f"总节假日天数: {holiday_count}")
-    logger.info(f"总工作日天数: {workday_count}")
-    logger.info(f"其中调休日数: {lieu_count}")
-    logger.info(f"假期第一天总数: {first_day_count}")
+    summary = summarize_holidays(holidays)
+    logger.info(f"总天数: {summary['total']}")
+    logger.info(f"总节假日天数: {summary['holiday']}")
+    logger.info(f"总工作日天数: {summary['workday']}")
+    logger.info(f"其中调休日数: {summary['in_lieu']}")
+    logger.info(f"假期第一天总数: {summary['first_day']}")
     logger.info("--------------------------")
 
 
-def check_single_date(date_input: date, holidays: list):
-    """
-    在日志中打印单个日期的节假日状态（主要用于调试）。
-
-    Args:
-        date_input (date): 要查询的日期。
-        holidays (list): 已加载的节假日数据列表。
-    """
-    for h in holidays:
-        if h['date'] == date_input.isoformat():
-            if h['is_holiday']:
-                logger.info(f"查询结果: {date_input} 是假期 - {h['holiday_name']}")
-            else:
-                logger.info(f"查询结果: {date_input} 是工作日")
-            if h['is_in_lieu']:
-                logger.info(f"  -> (调休)")
-            return
-    logger.info(f"查询结果: 在 {date_input.year} 年的记录中未找到 {date_input}。")
-
-
 @register("BlessingHolidays", "Cheng-MaoMao", "在节假日自动送上祝福（纯文本）", "1.0.8")
 class BlessingHolidaysPlugin(Star):
     """
@@ -240,24 +76,112 @@ class BlessingHolidaysPlugin(Star):
         self.plugin_data_dir.mkdir(parents=True, exist_ok=True)
         
         self.json_file = self.plugin_data_dir / self.config.get('holidays_file', 'holidays.json')
+        # 所有缓存文件的写入都在事件循环外进行，短时间内的多次保存合并为一次
+        self.writer = WriteBehind()
+        # 节日名称优先离线转换；仅在开启时对离线数据中没有的名称联网翻译，结果缓存
+        self.online_translation = bool(self.config.get('online_translation', False))
+        self.translation_cache = TranslationCache(self.plugin_data_dir / 'translations.json', writer=self.writer)
+        # 按年份分片的节假日数据仓库，首次访问某年时才加载
+        self.holiday_store = HolidayStore(
+            self.plugin_data_dir,
+            lambda year: get_year_holidays(year, self.translation_cache, self.online_translation),
+            file_name=self.json_file.name,
+            binary=bool(self.config.get('holidays_binary', True)),
+            writer=self.writer,
+            bundle_file=Path(__file__).parent / 'data' / 'holiday_tables.bin',
+            refresher=lambda year, old: refresh_year_holidays(
+                year, old, self.translation_cache, self.online_translation),
+        )
         
         # LLM 选择（纯文本模式下用于生成祝福文案）
         self.llm_provider_id = str(config.get("llm_provider_id", "")).strip()
+        # 备用提供商、超时预算、对冲与熔断配置
+        llm_config = config.get("llm_generation", {}) or {}
+        self.fallback_provider_ids = [
+            str(pid).strip() for pid in llm_config.get("fallback_provider_ids", []) or [] if str(pid).strip()
+        ]
+        self.generation_engine = GenerationEngine.from_config(llm_config)
+        # 每类受众一次生成多条祝福语，发送时分配给不同会话
+        try:
+            self.blessing_variants = min(20, max(1, int(llm_config.get("variants", 1))))
+        except (TypeError, ValueError):
+            self.blessing_variants = 1
+        self.variant_assigner = VariantAssigner(str(llm_config.get("variant_assignment", "hash")))
 
         # 图片/文件传输相关配置已移除（纯文本模式）
         # 发送间隔（硬编码，保持原有逻辑）
         
         self.holidays = []
+        # 下一年的备用数据：(年份, (数据, 日期索引))，由后台任务提前准备，跨年零点整体切换
+        self._standby: tuple[int, tuple[HolidayYear | list, HolidayYear | HolidayIndex]] | None = None
+        self._standby_task: asyncio.Task | None = None
         self.logger = logger
 
         # 加载假期结束提醒配置
         self.end_of_holiday_config = config.get("end_of_holiday_blessing", {})
         # 加载假期首日祝福配置（仅时间）
         self.start_of_holiday_config = config.get("start_of_holiday_blessing", {})
+        # 事件调度器：只在假期首日/最后一天等事件到期时唤醒
+        self.scheduler = EventScheduler(self._plan_events, self._handle_event)
+        self._scheduler_task: asyncio.Task | None = None
+        # 广播并发与限速配置
+        self.broadcast_engine = BroadcastEngine.from_config(self.context.send_message, config.get("broadcast", {}))
+        # 投递顺序（VIP、群组优先、按群成员数）与完成时限
+        self.delivery_queue = DeliveryQueue.from_config(config.get("broadcast", {}))
+        # 广播日志：记录每次广播的计划与逐会话投递状态，重启后据此续发
+        self.broadcast_journal = BroadcastJournal(self.plugin_data_dir / 'broadcast_journal.jsonl')
+        self._active_runs: set[str] = set()
+        # 广播时间线报告：每次广播各阶段的耗时、各平台汇总与失败原因
+        self.broadcast_report = BroadcastReport(self.plugin_data_dir / 'broadcast_report.jsonl')
+        # 多实例协调：共享同一个租约数据库的实例分片发送同一次广播，未启用时为 None
+        self.coordinator = BroadcastCoordinator.from_config(config.get("coordination", {}), self.plugin_data_dir)
+        # 好友/群组列表缓存，同一晚的多次广播无需重复拉取
+        try:
+            ttl_minutes = float(config.get("broadcast", {}).get("recipient_cache_ttl_minutes", 360))
+        except (TypeError, ValueError):
+            ttl_minutes = 360
+        self.recipient_directory = RecipientDirectory(ttl_seconds=ttl_minutes * 60)
+        # 收件人名单：退订名单中的会话不再收到广播，开启 allow_list_only 时只发给白名单
+        self.recipient_filter = RecipientFilter(
+            self.plugin_data_dir / 'recipient_filter.bin', writer=self.writer,
+            allow_only=bool(config.get("broadcast", {}).get("allow_list_only", False)),
+        )
+        # 预生成祝福语缓存：提前若干天生成，发送时直接读取
+        self.blessing_cache = BlessingCache(self.plugin_data_dir / 'blessings_cache.json', writer=self.writer)
+        try:
+            self.pregenerate_days = max(0, int(config.get("blessing_pregenerate_days", 3)))
+        except (TypeError, ValueError):
+            self.pregenerate_days = 3
+        # Prometheus 文本格式的指标导出文件，留空则不导出
+        metrics_file = str(config.get("metrics_file", "") or "").strip()
+        self.metrics_file = self.plugin_data_dir / metrics_file if metrics_file else None
+        self._metrics_task: asyncio.Task | None = None
         
         # 在后台启动异步初始化任务
         asyncio.create_task(self.initialize())
 
+    @property
+    def holidays(self) -> HolidayYear | list:
+        """当前加载的节假日数据，完整的一年为按列存储的 `HolidayYear`。"""
+        return self._live[0]
+
+    @holidays.setter
+    def holidays(self, value):
+        value = to_year(value)
+        self._activate((value, as_index(value)))
+
+    @property
+    def holiday_index(self) -> HolidayYear | HolidayIndex:
+        """当前数据的日期索引，与 `holidays` 属于同一份快照；`HolidayYear` 本身即是索引。"""
+        return self._live[1]
+
+    def _activate(self, live: tuple[HolidayYear | list, HolidayYear | HolidayIndex]):
+        # 数据与日期索引作为一个元组一次性替换，读者不会看到新数据配旧索引的中间状态
+        self._live = live
+        scheduler = getattr(self, 'scheduler', None)
+        if scheduler is not None:
+            scheduler.invalidate()
+
     def _get_platform_name(self, platform) -> str:
         """稳健获取平台名称，兼容 meta 为属性或可调用对象。"""
         try:
@@ -273,6 +197,23 @@ class BlessingHolidaysPlugin(Star):
         except Exception:
             return 'unknown'
 
+    def _get_platform_id(self, platform) -> str:
+        """
+        获取平台实例 ID，即 `unified_msg_origin` 中的第一段，收件人名单按它区分平台。
+
+        没有 ID 时退回平台名称。
+        """
+        try:
+            meta = getattr(platform, 'meta', None)
+            if callable(meta):
+                meta = meta()
+            platform_id = getattr(meta, 'id', None)
+            if platform_id:
+                return str(platform_id)
+        except Exception:
+            pass
+        return self._get_platform_name(platform)
+
     async def initialize(self):
         """
         异步初始化插件，加载数据并启动后台任务。
@@ -282,79 +223,42 @@ class BlessingHolidaysPlugin(Star):
                 self.logger.info("插件已在配置中禁用，跳过初始化。")
                 return
             
-            # 加载或获取当前年份的节假日数据（默认快速模式：首次仅预计算 7 天，后台补齐整年）
+            # 当前年份的数据来自随插件发布的预编译合集（或已有分片），无需现场计算
             current_year = datetime.now().year
-            saved_year, saved = load_holidays_from_json(self.json_file)
-            if saved_year == current_year and saved:
-                self.holidays = saved
-                print_holidays_summary(self.holidays, current_year)
-            else:
-                self.logger.info("首次启动快速模式：预计算未来 7 天，整年在后台补齐…")
-                today = datetime.now().date()
-                quick_list = []
-                # 预加载 [今天, 今天+6]，简化首日/末日计算逻辑：
-                # - 仅对当天进行翻译；
-                # - 首日/末日判断用英文名比较，避免多次翻译；
-                # - 对非当天记录，首/末日标记暂缺省为 False，待后台预热覆盖。
-                for d in [today + timedelta(days=i) for i in range(7)]:
-                    try:
-                        on_hol, hol_name = ch_calendar.get_holiday_detail(d)
-                        is_hol = is_holiday(d)
-                        is_work = is_workday(d)
-                        is_lieu = ch_calendar.is_in_lieu(d)
-                        # 当天翻译显示名，其他天可由后台预热覆盖
-                        name_cn = await translate_holiday_name(hol_name) if (d == today and on_hol and hol_name) else ''
-                        # 简化的首/末日判断：仅用英文名比对，避免多次翻译
-                        prev_on, prev_name = ch_calendar.get_holiday_detail(d - timedelta(days=1))
-                        next_on, next_name = ch_calendar.get_holiday_detail(d + timedelta(days=1))
-                        is_first = bool(is_hol and (not prev_on or (prev_name != hol_name)))
-                        is_last = bool(is_hol and (not next_on or (next_name != hol_name)))
-                        # 仅当天保留首/末日信息，其余天先置 False，待后台预热覆盖
-                        if d != today:
-                            is_first = False
-                            is_last = False
-                        quick_list.append({
-                            'date': d.isoformat(),
-                            'holiday_name': name_cn if name_cn else '',
-                            'is_holiday': is_hol,
-                            'is_workday': is_work,
-                            'is_in_lieu': is_lieu,
-                            'is_first_day': is_first,
-                            'is_last_day': is_last,
-                        })
-                    except Exception as e:
-                        self.logger.warning(f"快速模式计算 {d} 失败: {e}")
-                        quick_list.append({
-                            'date': d.isoformat(), 'holiday_name': '', 'is_holiday': False,
-                            'is_workday': True, 'is_in_lieu': False, 'is_first_day': False, 'is_last_day': False
-                        })
-                self.holidays = quick_list
-                # 后台预热整年
-                asyncio.create_task(self._warm_holidays_full_year())
-            
-            # 启动每日祝福检查的后台循环任务
-            asyncio.create_task(self.daily_blessing_checker())
+            await self.holiday_store.import_legacy(self.json_file)
+            await asyncio.to_thread(self.recipient_filter.load)
+            self.holidays = await self.holiday_store.get_year(current_year)
+            print_holidays_summary(self.holidays, current_year)
             
-            # 启动假期结束提醒的后台任务
-            if self.end_of_holiday_config.get("enabled", False):
-                asyncio.create_task(self.end_of_holiday_checker())
+            # 续发重启前未完成的广播
+            asyncio.create_task(self._resume_broadcasts())
+            # 预生成近期假期的祝福语
+            asyncio.create_task(self._pregenerate_blessings())
+
+            # 启动节假日事件调度（假期首日祝福与假期结束提醒）
+            self._scheduler_task = asyncio.create_task(self.scheduler.run())
+            if self.metrics_file is not None:
+                self._metrics_task = asyncio.create_task(self._export_metrics_loop())
 
             self.logger.info("节假日祝福插件初始化完成。")
         except Exception as e:
             self.logger.error(f"插件初始化失败: {e}")
 
-    async def _warm_holidays_full_year(self):
-        """后台预热整年节假日数据并写入缓存。"""
-        try:
-            year = datetime.now().year
-            full = await get_year_holidays(year)
-            save_holidays_to_json(year, full, self.json_file)
-            self.holidays = full
-            # 统计更准确的节假日天数
-            holiday_days = sum(1 for h in full if h.get('is_holiday'))
-            self.logger.info(f"整年节假日预热完成：节假日天数 {holiday_days}，总记录 {len(full)}。")
-        except Exception as e:
-            self.logger.error(f"后台预热整年节假日失败: {e}")
+    async def _edge_flags(self, day: date, info: dict | None) -> tuple[bool, bool]:
+        """
+        返回某天是否为假期第一天/最后一天。
+
+        年初和年末两天借助分片仓库查看相邻年份，修正跨年假期的首/末日标记。
+        """
+        if not info:
+            return False, False
+        is_first, is_last = bool(info.get('is_first_day')), bool(info.get('is_last_day'))
+        if (day.month, day.day) in ((1, 1), (12, 31)):
+            try:
+                is_first, is_last = await self.holiday_store.edge_flags(day)
+            except Exception as e:
+                self.logger.warning(f"跨年首/末日判断失败，沿用当年数据: {e}")
+        return is_first, is_last
 
     @filter.command_group("blessings")
     def blessings(self):
@@ -368,8 +272,8 @@ class BlessingHolidaysPlugin(Star):
         [管理员指令] 重新加载节假日数据。
         """
         try:
-            self.holidays = await get_current_year_holidays(self.json_file)
-            yield event.plain_result(f"节假日数据已重新加载，共 {len(self.holidays)} 条记录。")
+            self.holidays = await self.holiday_store.reload_year(datetime.now().year)
+            yield event.plain_result(f"节假日数据已重新加载：{self._data_status()}。")
         except Exception as e:
             self.logger.error(f"重新加载节假日数据失败: {e}")
             yield event.plain_result(f"重新加载失败: {str(e)}")
@@ -382,10 +286,11 @@ class BlessingHolidaysPlugin(Star):
         """
         try:
             today = datetime.now().date()
-            today_info = next((h for h in self.holidays if h['date'] == today.isoformat()), None)
+            today_info = self.holiday_index.get(today)
+            is_first, _ = await self._edge_flags(today, today_info)
             
             if today_info:
-                if today_info['is_first_day'] and today_info['is_holiday']:
+                if is_first and today_info['is_holiday']:
                     yield event.plain_result(f"今天是 {today_info['holiday_name']} 的第一天！")
                 elif today_info['is_holiday']:
                     yield event.plain_result(f"今天是假期，但不是第一天：{today_info['holiday_name']}")
@@ -397,6 +302,132 @@ class BlessingHolidaysPlugin(Star):
             self.logger.error(f"检查今天节假日状态失败: {e}")
             yield event.plain_result(f"检查失败: {str(e)}")
     
+    @blessings.command("stats")
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    async def show_stats(self, event: AstrMessageEvent):
+        """
+        [管理员指令] 查看插件运行状态与各环节的调用次数、耗时统计。
+        """
+        try:
+            yield event.plain_result("\n".join(self._stats_lines()))
+        except Exception as e:
+            self.logger.error(f"获取统计信息失败: {e}")
+            yield event.plain_result(f"获取统计信息失败: {str(e)}")
+
+    @blessings.command("report")
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    async def show_report(self, event: AstrMessageEvent, day: str = ""):
+        """
+        [管理员指令] 查看广播时间线报告。
+
+        Args:
+            day (str, optional): 广播日期（YYYY-MM-DD）。默认为最近一次广播。
+        """
+        try:
+            day = day.strip() or None
+            if day is not None:
+                try:
+                    day = date.fromisoformat(day).isoformat()
+                except ValueError:
+                    yield event.plain_result("日期格式应为 YYYY-MM-DD。")
+                    return
+            records = await asyncio.to_thread(self.broadcast_report.find, day)
+            if not records:
+                yield event.plain_result(f"没有找到{f' {day} 的' if day else ''}广播记录。")
+                return
+            lines = []
+            for record in records:
+                lines.extend(format_run(record))
+            yield event.plain_result("\n".join(lines))
+        except Exception as e:
+            self.logger.error(f"获取广播报告失败: {e}")
+            yield event.plain_result(f"获取广播报告失败: {str(e)}")
+
+    def _resolve_recipient(self, event: AstrMessageEvent, kind: str, rid: str) -> tuple[str, str, str] | None:
+        """
+        解析名单指令的目标，返回 (平台实例 ID, 受众, 会话 ID)。
+
+        省略类型与 ID 时使用当前会话；给出 ID 时平台取当前会话所在的平台。
+        平台取 `unified_msg_origin` 的第一段（平台实例 ID），与广播时 `_get_platform_id` 的结果一致。
+        """
+        parts = str(getattr(event, 'unified_msg_origin', '') or '').split(':', 2)
+        if len(parts) != 3:
+            return None
+        platform, message_type, current = parts
+        kind = kind.strip().lower()
+        if not kind:
+            audience = 'group' if message_type == MessageType.GROUP_MESSAGE.value else 'friend'
+            return platform, audience, current
+        audience = {'friend': 'friend', '好友': 'friend', 'group': 'group', '群': 'group', '群组': 'group'}.get(kind)
+        if audience is None or not rid.strip():
+            return None
+        return platform, audience, rid.strip()
+
+    async def _update_recipient_lists(self, event: AstrMessageEvent, kind: str, rid: str, opt_in: bool):
+        target = self._resolve_recipient(event, kind, rid)
+        if target is None:
+            return "用法：/blessings optout|optin [friend|group <ID>]，省略时作用于当前会话。"
+        platform, audience, rid = target
+        if opt_in:
+            self.recipient_filter.update('deny', platform, audience, remove=[rid])
+            self.recipient_filter.update('allow', platform, audience, add=[rid])
+        else:
+            self.recipient_filter.update('allow', platform, audience, remove=[rid])
+            self.recipient_filter.update('deny', platform, audience, add=[rid])
+        who = f"{'群组' if audience == 'group' else '用户'} {rid}（{platform}）"
+        return f"{who}已{'恢复接收' if opt_in else '退订'}节假日广播。"
+
+    @blessings.command("optout")
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    async def opt_out(self, event: AstrMessageEvent, kind: str = "", rid: str = ""):
+        """
+        [管理员指令] 将会话加入退订名单，之后的广播不再发送给它。
+
+        Args:
+            kind (str, optional): 'friend' 或 'group'。省略时作用于当前会话。
+            rid (str, optional): 好友或群组 ID。
+        """
+        try:
+            yield event.plain_result(await self._update_recipient_lists(event, kind, rid, opt_in=False))
+        except Exception as e:
+            self.logger.error(f"更新收件人名单失败: {e}")
+            yield event.plain_result(f"更新收件人名单失败: {str(e)}")
+
+    @blessings.command("optin")
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    async def opt_in(self, event: AstrMessageEvent, kind: str = "", rid: str = ""):
+        """
+        [管理员指令] 将会话移出退订名单并加入白名单。
+
+        Args:
+            kind (str, optional): 'friend' 或 'group'。省略时作用于当前会话。
+            rid (str, optional): 好友或群组 ID。
+        """
+        try:
+            yield event.plain_result(await self._update_recipient_lists(event, kind, rid, opt_in=True))
+        except Exception as e:
+            self.logger.error(f"更新收件人名单失败: {e}")
+            yield event.plain_result(f"更新收件人名单失败: {str(e)}")
+
+    @blessings.command("optlist")
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    async def opt_list(self, event: AstrMessageEvent):
+        """
+        [管理员指令] 查看退订名单与白名单的条目数。
+        """
+        try:
+            mode = "只发给白名单" if self.recipient_filter.allow_only else "发给退订名单以外的全部会话"
+            lines = [f"【收件人名单】当前模式：{mode}"]
+            names = {'deny': "退订", 'allow': "白名单", 'friend': "好友", 'group': "群组"}
+            for (list_name, platform, audience), count in self.recipient_filter.counts().items():
+                lines.append(f"{platform} {names[audience]}{names[list_name]}：{count}")
+            if len(lines) == 1:
+                lines.append("名单为空。")
+            yield event.plain_result("\n".join(lines))
+        except Exception as e:
+            self.logger.error(f"获取收件人名单失败: {e}")
+            yield event.plain_result(f"获取收件人名单失败: {str(e)}")
+
     @blessings.command("manual")
     @filter.permission_type(filter.PermissionType.ADMIN)
     async def manual_bless(self, event: AstrMessageEvent, holiday_name: str = "手动测试"):
@@ -508,106 +539,609 @@ class BlessingHolidaysPlugin(Star):
         """
         插件终止时调用的清理方法。
         """
+        if self._scheduler_task is not None:
+            self._scheduler_task.cancel()
+        if self._standby_task is not None:
+            self._standby_task.cancel()
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            await self._export_metrics()
+        await self.writer.flush()
+        self.broadcast_journal.close()
+        if self.coordinator is not None:
+            self.coordinator.close()
         self.logger.info("节假日祝福插件已销毁。")
     
-    async def daily_blessing_checker(self):
+    def _data_status(self) -> str:
+        """描述当前节假日数据是否完整及其来源。"""
+        if not self.holidays:
+            return "未加载"
+        try:
+            year = date.fromisoformat(self.holidays[0]['date']).year
+        except (KeyError, TypeError, ValueError):
+            return f"{len(self.holidays)} 条（年份未知）"
+        expected = (date(year, 12, 31) - date(year, 1, 1)).days + 1
+        source = {
+            'bundle': "预编译合集", 'snapshot': "二进制分片", 'json': "JSON 分片", 'build': "现场构建",
+            'refresh': "增量更新",
+        }.get(self.holiday_store.sources.get(year, ''), "未知")
+        state = "完整" if len(self.holidays) == expected else f"不完整（应为 {expected} 条）"
+        return f"{year} 年 {len(self.holidays)} 条，{state}，来源：{source}"
+
+    def _stats_lines(self) -> list[str]:
+        lines = ["【节假日祝福插件状态】", f"节假日数据：{self._data_status()}"]
+        if self._standby is not None:
+            lines.append(f"跨年备用数据：{self._standby[0]} 年已就绪，共 {len(self._standby[1][0])} 条")
+        pending = self.scheduler.pending()
+        if pending:
+            nxt = pending[0]
+            lines.append(f"调度器：待执行 {len(pending)} 个事件，下一个 {nxt.when.strftime('%Y-%m-%d %H:%M')} "
+                         f"{nxt.kind} {nxt.holiday}".rstrip())
+        else:
+            lines.append("调度器：暂无待执行事件")
+        t = self.translation_cache.stats()
+        lines.append(f"翻译缓存：命中 {t['hits']}，未命中 {t['misses']}，联网 {t['calls']}，失败 {t['errors']}")
+        lines.append(f"祝福语缓存：命中 {self.blessing_cache.hits}，未命中 {self.blessing_cache.misses}")
+        lines.append(f"会话列表缓存：命中 {self.recipient_directory.hits}，刷新 {self.recipient_directory.refreshes}")
+        w = self.writer.stats()
+        lines.append(f"写盘：完成 {w['writes']}，合并 {w['coalesced']}，待写 {w['pending']}，失败 {w['errors']}")
+        if self.coordinator is not None:
+            lines.append(f"多实例协调：实例 {self.coordinator.instance_id}，{self.coordinator.shards} 个分片，"
+                         f"租约 {self.coordinator.lease_seconds:g} 秒")
+        rates = [f"{name} {rate:.2f}/s" for name, rate in self.broadcast_engine.rates().items()]
+        if rates:
+            lines.append(f"当前发送速率：{'，'.join(rates)}")
+        provider_lines = self.generation_engine.summary_lines()
+        if provider_lines:
+            lines.append("【LLM 提供商】")
+            lines.extend(provider_lines)
+        metric_lines = METRICS.summary_lines()
+        if metric_lines:
+            lines.append("【调用统计】")
+            lines.extend(metric_lines)
+        return lines
+
+    async def _export_metrics(self):
+        """将指标以 Prometheus 文本格式原子写入 `metrics_file`。"""
+        if self.metrics_file is None:
+            return
+        try:
+            await asyncio.to_thread(atomic_write, self.metrics_file, METRICS.render_prometheus().encode('utf-8'))
+        except Exception as e:
+            self.logger.warning(f"导出指标到 {self.metrics_file} 失败: {e}")
+
+    async def _export_metrics_loop(self, interval: float = 60):
+        while True:
+            await self._export_metrics()
+            await asyncio.sleep(interval)
+
+    async def _iter_targets(self, chains: dict[str, list], timeline: RunTimeline | None = None,
+                            shard: int | None = None) -> AsyncIterator[BroadcastTarget]:
         """
-        每日检查并向所有群组和好友发送祝福的核心后台任务。
+        逐个产出所有支持平台上的好友和群组发送目标。
+
+        会话列表来自带 TTL 的会话目录缓存，单个平台获取失败时跳过该平台。
+        每类受众有多条消息链（祝福语变体）时，由变体分配器为每个会话选择一条。
+        指定 `shard` 时只产出属于该分片的会话。
         """
-        self.logger.info("每日祝福检查任务已启动。")
-        while True:
+        for platform in self.context.platform_manager.get_insts():
+            # 仅针对支持 get_client 和 call_action 的平台 (如 aiocqhttp)
+            if not hasattr(platform, "get_client") or not platform.get_client() or not hasattr(platform.get_client().api, "call_action"):
+                continue
+            pname = self._get_platform_name(platform)
+            # 会话列表缓存、限速器与收件人名单都按平台实例 ID 区分：同一适配器的多个账号
+            # 名称相同，但各有自己的好友/群组与发送速率（ID 与名单指令中 unified_msg_origin 的平台段一致）
+            pid = self._get_platform_id(platform)
+            self.logger.info(f"正在通过平台 '{pname}' 进行广播...")
+            excluded = 0
             try:
-                # --- 根据配置计算下次运行时间 ---
-                now = datetime.now()
-                send_time_str = self.start_of_holiday_config.get("send_time", "00:05")
-                try:
-                    hour, minute = map(int, send_time_str.split(':'))
-                except Exception:
-                    hour, minute = 0, 5
-                target_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                if now >= target_time:
-                    target_time += timedelta(days=1)
-                wait_seconds = (target_time - now).total_seconds()
-                self.logger.info(f"下一次每日祝福检查将在 {target_time.strftime('%Y-%m-%d %H:%M:%S')} 进行，等待 {wait_seconds:.0f} 秒。")
-                await asyncio.sleep(wait_seconds)
-                # --- --------------------------- ---
-
-                today = datetime.now().date()
-                today_info = next((h for h in self.holidays if h['date'] == today.isoformat()), None)
-                
-                if today_info and today_info['is_first_day'] and today_info['is_holiday'] and self.config.get('enabled', True):
-                    holiday_name = today_info['holiday_name']
-                    self.logger.info(f"检测到假期第一天：{holiday_name}，开始发送祝福...")
-                    
-                    # 为好友与群组分别生成不同风格的祝福
-                    blessing_friend = await self.generate_blessing(holiday_name, None, audience='friend')
-                    blessing_group = await self.generate_blessing(holiday_name, None, audience='group')
-                    if not (blessing_friend or blessing_group):
-                        self.logger.error("祝福语生成失败，跳过本次发送。")
+                async for kind, rid, info in self.recipient_directory.iter_recipients(pid, platform.get_client(), timeline):
+                    if not self.recipient_filter.allows(pid, kind, rid):
+                        excluded += 1
                         continue
-                    
-                    # --- 平台无关的广播逻辑 ---
-                    sent_count = 0
-                    all_platforms = self.context.platform_manager.get_insts()
-                    for platform in all_platforms:
-                        # 仅针对支持 get_client 和 call_action 的平台 (如 aiocqhttp)
-                        if not hasattr(platform, "get_client") or not platform.get_client() or not hasattr(platform.get_client().api, "call_action"):
-                            continue
-                        pname = self._get_platform_name(platform)
-                        self.logger.info(f"正在通过平台 '{pname}' 进行广播...")
-                        client = platform.get_client()
-                        try:
-                            friend_list = await client.api.call_action("get_friend_list")
-                            group_list = await client.api.call_action("get_group_list")
-                            # 发送到好友
-                            for friend in friend_list:
-                                user_id = friend.get('user_id')
-                                if not user_id:
-                                    continue
-                                session_str = f"{pname}:{MessageType.FRIEND_MESSAGE.value}:{user_id}"
-                                try:
-                                    chain_friend = [Comp.Plain(blessing_friend or blessing_group)]
-                                    await self.context.send_message(session_str, chain_friend)
-                                    sent_count += 1
-                                    self.logger.info(f"祝福消息已发送到用户 {user_id}")
-                                    await asyncio.sleep(5)
-                                except Exception as e:
-                                    self.logger.error(f"发送祝福到用户 {user_id} 失败: {e}")
-                            # 发送到群组
-                            for group in group_list:
-                                group_id = group.get('group_id')
-                                if not group_id:
-                                    continue
-                                session_str = f"{pname}:{MessageType.GROUP_MESSAGE.value}:{group_id}"
-                                try:
-                                    chain_group = [Comp.Plain(blessing_group or blessing_friend)]
-                                    await self.context.send_message(session_str, chain_group)
-                                    sent_count += 1
-                                    self.logger.info(f"祝福消息已发送到群组 {group_id}")
-                                    await asyncio.sleep(5)
-                                except Exception as e:
-                                    self.logger.error(f"发送祝福到群组 {group_id} 失败: {e}")
-                        except Exception as e:
-                            self.logger.error(f"从平台 '{platform.meta.name}' 获取好友/群组列表失败: {e}")
-                    if sent_count > 0:
-                        self.logger.info(f"今日({holiday_name})祝福已成功发送到 {sent_count} 个会话。")
+                    if kind == 'friend':
+                        session, label = f"{pname}:{MessageType.FRIEND_MESSAGE.value}:{rid}", f"用户 {rid}"
                     else:
-                        self.logger.warning("未能获取到任何好友或群组，今日祝福未发送。")
-                
-                if today.month == 12 and today.day == 31:
-                    next_year = today.year + 1
-                    self.logger.info(f"正在预加载 {next_year} 年的节假日数据...")
-                    self.holidays = await get_year_holidays(next_year)
-                    save_holidays_to_json(next_year, self.holidays, self.json_file)
-                
-            except asyncio.CancelledError:
-                self.logger.info("每日祝福检查任务被取消。")
-                break
+                        session, label = f"{pname}:{MessageType.GROUP_MESSAGE.value}:{rid}", f"群组 {rid}"
+                    if shard is not None and self.coordinator.shard_of(session) != shard:
+                        continue
+                    try:
+                        members = int(info.get('member_count') or 0)
+                    except (TypeError, ValueError):
+                        members = 0
+                    yield BroadcastTarget(pid, session, self.variant_assigner.pick(kind, session, chains[kind]),
+                                          label, kind, members)
             except Exception as e:
-                self.logger.error(f"每日祝福检查任务发生严重错误: {e}")
-                await asyncio.sleep(3600)
-    
-    async def generate_blessing(self, holiday_name: str, event: AstrMessageEvent | None = None, audience: str | None = None) -> str:
+                self.logger.error(f"从平台 '{pname}' 获取好友/群组列表失败: {e}")
+            if excluded:
+                self.logger.info(f"平台 '{pname}' 按收件人名单跳过了 {excluded} 个会话。")
+
+    async def _broadcast(self, chains: dict[str, list], description: str, run: JournalRun | None = None,
+                         timeline: RunTimeline | None = None, shard: int | None = None, guard=None,
+                         deadline: float | None = None) -> BroadcastResult:
+        """
+        通过所有支持的平台向全部好友和群组广播消息。
+
+        会话经投递队列排序后交给广播引擎并发、限速地发送；指定 `deadline` 时匀速铺满到截止时间。
+
+        Args:
+            chains (dict[str, list]): 'friend'/'group' -> 可选的消息链列表。
+            description (str): 日志中使用的消息描述。
+            run (JournalRun, optional): 广播日志中的记录，已投递的会话会被跳过。
+            timeline (RunTimeline, optional): 广播时间线，记录列表获取与每次发送的耗时。
+            shard (int, optional): 只发送属于该分片的会话。
+            guard (ShardGuard, optional): 多实例投递登记钩子。
+            deadline (float, optional): 完成时限（事件循环时钟），见 `_delivery_deadline`。
+
+        Returns:
+            BroadcastResult: 广播结果统计。
+        """
+        self.logger.info(f"开始广播{description}{f'（分片 {shard}）' if shard is not None else ''}...")
+        targets = self.delivery_queue.arrange(self._iter_targets(chains, timeline, shard), deadline,
+                                              run.should_send if run is not None else None)
+        return await self.broadcast_engine.run(targets, description, self.broadcast_journal, run, timeline, guard)
+
+    async def _broadcast_sharded(self, chains: dict[str, list], description: str, run: JournalRun,
+                                 timeline: RunTimeline, deadline: float | None = None) -> BroadcastResult:
+        """
+        多实例协调模式下的广播：反复认领空闲分片并发送，直到所有分片都已完成。
+
+        没有空闲分片但仍有分片未完成时（其他实例正在发送），每半个租约期检查一次，
+        以便在其他实例退出后接管其分片；过了广播日期则停止等待。
+        有完成时限时，每个分片分到剩余时间除以未完成分片数的一段。
+        """
+        total = BroadcastResult()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while True:
+            lease = await self.coordinator.acquire(run.run_id)
+            if lease is None:
+                done, count = await self.coordinator.progress(run.run_id)
+                if done >= count or datetime.now().date().isoformat() != run.date:
+                    break
+                await asyncio.sleep(self.coordinator.lease_seconds / 2)
+                continue
+            shard_deadline = None
+            if deadline is not None and deadline > loop.time():
+                done, count = await self.coordinator.progress(run.run_id)
+                shard_deadline = loop.time() + (deadline - loop.time()) / max(1, count - done)
+            async with self.coordinator.hold(lease):
+                with timeline.phase('send', shard=lease.shard):
+                    result = await self._broadcast(chains, description, run, timeline, lease.shard,
+                                                   ShardGuard(self.coordinator, lease), shard_deadline)
+                if not lease.lost:
+                    await self.coordinator.complete(lease)
+            total.sent += result.sent
+            total.failed += result.failed
+            total.skipped += result.skipped
+        total.elapsed = loop.time() - started
+        return total
+
+    async def _run_broadcast(self, kind: str, holiday_name: str, day: date) -> BroadcastResult | None:
+        """
+        执行一次假期首日祝福（kind='start'）或假期结束提醒（kind='end'）广播。
+
+        计划与逐会话投递状态记入广播日志。同一天同一类型的广播已完成时直接跳过；
+        未完成时复用日志中的祝福语，只向尚未投递的会话发送，不会重复发送。
+        每次执行的时间线写入广播报告。
+
+        Args:
+            kind (str): 广播类型。
+            holiday_name (str): 节日名称。
+            day (date): 广播日期。
+
+        Returns:
+            BroadcastResult | None: 广播结果；跳过或祝福语生成失败时返回 None。
+        """
+        description = "祝福消息" if kind == 'start' else "假期结束提醒"
+        run_id = BroadcastJournal.make_run_id(day.isoformat(), kind)
+        if run_id in self._active_runs:
+            self.logger.info(f"{day} 的{description}广播正在进行，跳过重复触发。")
+            return None
+        run = self.broadcast_journal.get(run_id)
+        if run is not None and run.done:
+            self.logger.info(f"{day} 的{description}广播已完成，跳过。")
+            return None
+
+        self._active_runs.add(run_id)
+        timeline = RunTimeline(run_id, holiday_name, day.isoformat(), kind, resumed=run is not None)
+        outcome = 'error'
+        try:
+            shared = await self.coordinator.shared_texts(run_id) if self.coordinator and run is None else None
+            if shared:
+                # 其他实例已为本次广播生成祝福语，直接复用
+                run = self.broadcast_journal.begin(day.isoformat(), kind, holiday_name, shared)
+            elif run is None:
+                # 为好友与群组分别准备不同风格的祝福，优先使用预生成的缓存
+                texts = {}
+                for audience in ('friend', 'group'):
+                    with timeline.phase('generate', audience=audience) as entry:
+                        entry['cached'] = self.blessing_cache.contains(holiday_name, day.isoformat(), kind, audience)
+                        texts[audience] = await self._get_blessing(kind, holiday_name, day, audience)
+                        entry['variants'] = len(texts[audience])
+                if not (texts['friend'] or texts['group']):
+                    self.logger.error("祝福语生成失败，跳过本次发送。")
+                    outcome = 'no_blessing'
+                    return None
+                if self.coordinator is not None:
+                    texts = await self.coordinator.publish_texts(run_id, texts)
+                run = self.broadcast_journal.begin(day.isoformat(), kind, holiday_name, texts)
+            else:
+                self.logger.info(f"发现未完成的{description}广播（已尝试 {len(run.attempted)} 个会话），继续发送剩余会话...")
+
+            chains = {}
+            for audience in ('friend', 'group'):
+                variants = run.variants(audience)
+                if kind == 'start':
+                    chains[audience] = [[Comp.Plain(text)] for text in variants]
+                else:
+                    chains[audience] = [MessageChain().message(text) for text in variants]
+
+            deadline = self._delivery_deadline(kind, day)
+            if self.coordinator is not None:
+                result = await self._broadcast_sharded(chains, description, run, timeline, deadline)
+            else:
+                with timeline.phase('send', variants=len(chains['friend']) + len(chains['group'])):
+                    result = await self._broadcast(chains, description, run, timeline, deadline=deadline)
+            # 一个会话都没拿到时不标记完成，留待下次启动重试；协调模式下返回时所有分片都已完成
+            if result.sent or result.failed or result.skipped or self.coordinator is not None:
+                self.broadcast_journal.finish(run)
+                outcome = 'ok'
+            else:
+                outcome = 'no_targets'
+            return result
+        finally:
+            self._active_runs.discard(run_id)
+            timeline.finish(outcome)
+            await asyncio.to_thread(self.broadcast_report.append, timeline.to_record())
+
+    def _blessing_generator(self, kind: str):
+        return self.generate_blessing if kind == 'start' else self.generate_end_of_holiday_blessing
+
+    async def _get_blessing(self, kind: str, holiday_name: str, day: date, audience: str) -> list[str]:
+        """读取预生成的祝福语变体，缓存未命中时现场生成。"""
+        variants = self.blessing_cache.get(holiday_name, day.isoformat(), kind, audience)
+        if variants:
+            return variants
+        self.logger.info(f"未找到 {day} {holiday_name} 的预生成祝福语（{audience}），现场生成...")
+        return await self.generate_blessing_variants(kind, holiday_name, audience)
+
+    async def _pregenerate_blessings(self):
+        """
+        为未来 `pregenerate_days` 天内的假期首日和最后一天预生成祝福语。
+
+        只缓存 LLM 成功生成的文本；LLM 不可用时不写入缓存，发送时再现场生成或回退到模板。
+        """
+        if self.pregenerate_days <= 0:
+            return
+        try:
+            today = datetime.now().date()
+            self.blessing_cache.prune(today)
+            end_enabled = self.end_of_holiday_config.get("enabled", False)
+            index = self.holiday_index
+            for offset in range(self.pregenerate_days + 1):
+                day = today + timedelta(days=offset)
+                info = index.get(day)
+                standby = self._standby
+                if info is None and standby is not None and standby[0] == day.year:
+                    info = standby[1][1].get(day)
+                if info is None and day.year != today.year:
+                    info = await self.holiday_store.get_day(day)
+                if not info or not info.get('is_holiday') or not info.get('holiday_name'):
+                    continue
+                is_first, is_last = await self._edge_flags(day, info)
+                kinds = (['start'] if is_first else []) + (['end'] if is_last and end_enabled else [])
+                for kind in kinds:
+                    for audience in ('friend', 'group'):
+                        if self.blessing_cache.contains(info['holiday_name'], day.isoformat(), kind, audience):
+                            continue
+                        variants = await self.generate_blessing_variants(kind, info['holiday_name'], audience, fallback=False)
+                        if variants:
+                            self.blessing_cache.put(info['holiday_name'], day.isoformat(), kind, audience, variants)
+                            self.logger.info(f"已预生成 {day} {info['holiday_name']} 的祝福语（{kind}/{audience}）。")
+        except Exception as e:
+            self.logger.error(f"预生成祝福语失败: {e}")
+
+    async def _resume_broadcasts(self):
+        """启动时续发当天未完成的广播，更早的未完成广播直接作废。"""
+        try:
+            today = datetime.now().date()
+            for run in self.broadcast_journal.pending_runs():
+                if run.date != today.isoformat():
+                    self.logger.warning(f"放弃 {run.date} 未完成的广播（{run.holiday}），已过发送日期。")
+                    self.broadcast_journal.finish(run)
+                    continue
+                result = await self._run_broadcast(run.kind, run.holiday, today)
+                if result is not None:
+                    self.logger.info(f"续发完成：成功 {result.sent} 个，失败 {result.failed} 个，跳过已投递 {result.skipped} 个。")
+            self.broadcast_journal.compact(today.isoformat())
+            if self.coordinator is not None:
+                await self.coordinator.prune()
+        except Exception as e:
+            self.logger.error(f"续发未完成的广播失败: {e}")
+
+    @staticmethod
+    def _parse_send_time(value, default: time) -> time:
+        """解析 "HH:MM" 格式的发送时间，格式错误时返回默认值。"""
+        try:
+            hour, minute = map(int, str(value).split(':'))
+            return time(hour, minute)
+        except Exception:
+            return default
+
+    def _send_time(self, kind: str) -> time:
+        """假期首日祝福（'start'）或假期结束提醒（'end'）的计划发送时间。"""
+        if kind == 'start':
+            return self._parse_send_time(self.start_of_holiday_config.get("send_time", "00:05"), time(0, 5))
+        return self._parse_send_time(self.end_of_holiday_config.get("send_time", "22:00"), time(22, 0))
+
+    def _delivery_deadline(self, kind: str, day: date) -> float | None:
+        """
+        本次广播的完成时限，换算为事件循环时钟。
+
+        时限从计划发送时间起算，重启续发时沿用原来的时限；未配置或已经过了时限时返回 None（尽快发送）。
+        """
+        if not self.delivery_queue.deadline_minutes:
+            return None
+        deadline = datetime.combine(day, self._send_time(kind)) + timedelta(minutes=self.delivery_queue.deadline_minutes)
+        remaining = (deadline - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return None
+        return asyncio.get_running_loop().time() + remaining
+
+    async def _plan_events(self, now: datetime) -> list[ScheduledEvent]:
+        """
+        根据当前节假日数据计算接下来的事件。
+
+        - 'start'：法定节假日第一天的祝福发送时间；
+        - 'end'：法定节假日最后一天的提醒发送时间（功能启用时）；
+        - 'pregenerate'：提前 `pregenerate_days` 天预生成祝福语；
+        - 'prepare'：跨年前 `ROLLOVER_PREPARE_DAYS` 天（预生成提前量更长时取预生成天数）在后台准备
+          下一年的数据；准备就绪后，次年年初的上述事件也一并安排；
+        - 'rollover'：次年 1 月 1 日零点切换到已准备好的新一年数据。
+
+        当天已过发送时间但尚未完成的广播也会被安排，调度器会立即执行。
+        """
+        # 整个计划基于同一份数据快照，计算途中发生切换也不会混用两年的数据
+        holidays, standby = self.holidays, self._standby
+        today = now.date()
+        events = await self._holiday_events(holidays, now)
+        data_year = today.year
+        if holidays:
+            try:
+                data_year = date.fromisoformat(holidays[-1]['date']).year
+            except (KeyError, ValueError):
+                pass
+        if data_year < today.year:
+            # 跨年切换失败时仍停留在旧年份，立即重试
+            events.append(ScheduledEvent(now, 'rollover', date(today.year, 1, 1)))
+            return events
+        next_year = date(data_year + 1, 1, 1)
+        if standby is None or standby[0] != next_year.year:
+            lead_days = max(ROLLOVER_PREPARE_DAYS, self.pregenerate_days)
+            prepare_at = datetime.combine(next_year - timedelta(days=lead_days), time(0, 0))
+            events.append(ScheduledEvent(max(prepare_at, now), 'prepare', next_year))
+        else:
+            # 备用数据就绪后，次年年初的事件（例如 1 月 1 日假期的预生成）也在跨年前安排好
+            events += await self._holiday_events(standby[1][0], now)
+        events.append(ScheduledEvent(datetime.combine(next_year, time(0, 0)), 'rollover', next_year))
+        return events
+
+    async def _holiday_events(self, holidays, now: datetime) -> list[ScheduledEvent]:
+        """计算某一份节假日数据中尚未完成的首日/最后一天事件及其预生成事件。"""
+        today = now.date()
+        start_time, end_time = self._send_time('start'), self._send_time('end')
+        end_enabled = self.end_of_holiday_config.get("enabled", False)
+        events: list[ScheduledEvent] = []
+        for info in holidays:
+            try:
+                day = date.fromisoformat(info['date'])
+            except (KeyError, ValueError):
+                continue
+            # 只有法定节假日才有首日/最后一天事件，普通周末不发送
+            if day < today or not info.get('is_holiday') or not info.get('holiday_name'):
+                continue
+            is_first, is_last = await self._edge_flags(day, info)
+            for kind, flag, at in (('start', is_first, start_time), ('end', is_last and end_enabled, end_time)):
+                if not flag:
+                    continue
+                run = self.broadcast_journal.get(BroadcastJournal.make_run_id(day.isoformat(), kind))
+                if run is not None and run.done:
+                    continue
+                events.append(ScheduledEvent(datetime.combine(day, at), kind, day, info['holiday_name']))
+                pregen_at = datetime.combine(day - timedelta(days=self.pregenerate_days), time(0, 0))
+                if self.pregenerate_days > 0 and pregen_at > now:
+                    events.append(ScheduledEvent(pregen_at, 'pregenerate', day, info['holiday_name']))
+        return events
+
+    async def _prepare_standby(self, year: int):
+        """构建（或从分片加载）某年的数据与日期索引，放入备用缓冲区。"""
+        try:
+            holidays = to_year(await self.holiday_store.get_year(year))
+            self._standby = (year, (holidays, as_index(holidays)))
+            self.logger.info(f"{year} 年节假日数据已在后台准备就绪，共 {len(holidays)} 条，将于 {year}-01-01 零点切换。")
+            # 重新计划，把次年年初的事件加入调度
+            self.scheduler.invalidate()
+        except Exception as e:
+            self.logger.error(f"准备 {year} 年节假日数据失败，将在跨年时重试: {e}")
+
+    def _schedule_standby(self, year: int):
+        """在后台任务中准备某年的备用数据，已就绪或正在准备时不重复启动。"""
+        if self._standby is not None and self._standby[0] == year:
+            return
+        if self._standby_task is not None and not self._standby_task.done():
+            return
+        self._standby_task = asyncio.create_task(self._prepare_standby(year))
+
+    async def _rollover(self, year: int):
+        """切换到备用缓冲区中某年的数据；尚未准备好时先等待或现场准备。"""
+        if self._standby_task is not None and not self._standby_task.done():
+            await self._standby_task
+        if self._standby is None or self._standby[0] != year:
+            self.logger.warning(f"{year} 年节假日数据未提前准备好，现场加载...")
+            await self._prepare_standby(year)
+        standby, self._standby = self._standby, None
+        if standby is None or standby[0] != year:
+            return
+        self._activate(standby[1])
+        self.logger.info(f"已切换到 {year} 年的节假日数据。")
+
+    async def _handle_event(self, event: ScheduledEvent):
+        """执行调度器触发的事件。"""
+        today = datetime.now().date()
+        if event.kind == 'prepare':
+            # 在后台任务中准备，不阻塞调度器处理同一时段的其他事件
+            self._schedule_standby(event.day.year)
+            return
+        if event.kind == 'rollover':
+            await self._rollover(event.day.year)
+            await self._pregenerate_blessings()
+            return
+        if event.kind == 'pregenerate':
+            await self._pregenerate_blessings()
+            return
+        if not self.config.get('enabled', True):
+            return
+        if event.day != today:
+            self.logger.warning(f"已错过 {event.day} 的{event.holiday}广播（当前 {today}），跳过。")
+            return
+        if event.kind == 'start':
+            self.logger.info(f"检测到假期第一天：{event.holiday}，开始发送祝福...")
+            result = await self._run_broadcast('start', event.holiday, today)
+            if result is not None and result.sent > 0:
+                self.logger.info(f"今日({event.holiday})祝福已成功发送到 {result.sent} 个会话，失败 {result.failed} 个，耗时 {result.elapsed:.0f} 秒。")
+            elif result is not None and not result.skipped:
+                self.logger.warning("未能获取到任何好友或群组，今日祝福未发送。")
+        elif event.kind == 'end':
+            self.logger.info(f"检测到假期最后一天：{event.holiday}，准备发送结束提醒...")
+            result = await self._run_broadcast('end', event.holiday, today)
+            if result is not None and result.sent > 0:
+                self.logger.info(f"假期结束提醒已成功发送到 {result.sent} 个会话，失败 {result.failed} 个，耗时 {result.elapsed:.0f} 秒。")
+            elif result is not None and not result.skipped:
+                self.logger.warning("未能获取到任何好友或群组，假期结束提醒未发送。")
+        await self._pregenerate_blessings()
+
+    def _llm_providers(self, event: AstrMessageEvent | None = None) -> list[tuple[str, object]]:
+        """
+        按优先级返回用于生成祝福的 (标识, 提供商) 列表。
+
+        首选配置的 `llm_provider_id`，未配置或找不到时使用当前上下文正在使用的提供商；
+        其后依次是 `llm_generation.fallback_provider_ids` 中的备用提供商。
+        """
+        providers: list[tuple[str, object]] = []
+
+        def add(key: str, provider):
+            if provider is not None and all(provider is not p for _, p in providers):
+                providers.append((key, provider))
+
+        # 1) 优先使用配置中指定的提供商
+        if self.llm_provider_id:
+            try:
+                add(self.llm_provider_id, self.context.get_provider_by_id(provider_id=self.llm_provider_id))
+            except Exception as e:
+                self.logger.warning(f"按配置 provider_id 获取提供商失败，将回退到当前使用提供商: {e}")
+        # 2) 回退到当前上下文正在使用的提供商
+        if not providers:
+            try:
+                if event is not None and hasattr(event, 'unified_msg_origin'):
+                    add('current', self.context.get_using_provider(umo=event.unified_msg_origin))
+                else:
+                    add('current', self.context.get_using_provider())
+            except Exception as e:
+                self.logger.warning(f"获取当前使用的提供商失败: {e}")
+        # 3) 备用提供商，用于对冲与故障切换
+        for provider_id in self.fallback_provider_ids:
+            try:
+                add(provider_id, self.context.get_provider_by_id(provider_id=provider_id))
+            except Exception as e:
+                self.logger.warning(f"获取备用提供商 {provider_id} 失败: {e}")
+        return providers
+
+    async def _generate_with_llm(self, prompt: str, system_prompt: str, kind: str,
+                                 event: AstrMessageEvent | None = None, parse=None):
+        """通过生成引擎调用 LLM，全部提供商失败、超时或熔断时返回空字符串。"""
+        providers = self._llm_providers(event)
+        if not providers:
+            return ''
+        return await self.generation_engine.generate(providers, prompt, system_prompt, kind, parse)
+
+    @staticmethod
+    def _blessing_prompt(kind: str, holiday_name: str, audience: str | None = None) -> tuple[str, str]:
+        """
+        返回生成祝福语的提示词与系统提示词。
+
+        Args:
+            kind (str): 'start' 为假期首日祝福，'end' 为假期结束提醒。
+            holiday_name (str): 节日名称。
+            audience (str, optional): 'friend' 或 'group'，根据受众调整称呼与风格。
+
+        Returns:
+            tuple[str, str]: (提示词, 系统提示词)。
+        """
+        # 根据 audience 构建不同的提示词（私聊更亲切，群聊更面向“大家”）
+        if kind == 'start':
+            if audience == 'friend':
+                prompt = (
+                    f"请为“{holiday_name}”这个节日生成一段温暖、简短的中文祝福语（50-100字）。"
+                    f"请直接对收件人使用“你”的称呼，突出个体关怀，避免使用群体称呼或@。"
+                )
+            elif audience == 'group':
+                prompt = (
+                    f"请为“{holiday_name}”这个节日生成一段适合群聊的中文祝福语（50-100字）。"
+                    f"请面向“大家/各位”等群体称呼，营造节日氛围与互动感，避免使用@或特殊格式。"
+                )
+            else:
+                prompt = f"请为“{holiday_name}”这个节日生成一段温暖、简短的中文祝福语（50-100字），要体现节日特色和美好祝愿。"
+            return prompt, "你是一个专业的节日祝福生成器，你的回答应该只包含祝福语文本本身，不要添加任何额外的解释或引言。"
+        if audience == 'friend':
+            prompt = (
+                f"为“{holiday_name}”假期的最后一天晚上，生成一段简短温馨的中文祝福语（50-100字）。"
+                f"请直接对收件人使用“你”的称呼，包含温柔的祝愿与轻度鼓励，避免群体称呼。"
+            )
+        elif audience == 'group':
+            prompt = (
+                f"为“{holiday_name}”假期的最后一天晚上，生成一段适合群聊的简短温馨祝福（50-100字）。"
+                f"请面向“大家/各位”等群体称呼，包含对假期的简短回顾，并鼓励大家以积极状态迎接接下来的工作和生活。"
+            )
+        else:
+            prompt = (
+                f"为“{holiday_name}”假期的最后一天晚上，生成一段简短温馨的中文祝福语（50-100字）。"
+                f"内容应包含对假期的回顾，并鼓励大家以饱满的热情迎接接下来的工作和生活。"
+            )
+        return prompt, "你是一个善于鼓励和给予温暖祝福的AI助手。你的回答应该只包含祝福语文本本身，不要添加任何额外的解释或引言。"
+
+    async def generate_blessing_variants(self, kind: str, holiday_name: str, audience: str | None = None,
+                                         fallback: bool = True) -> list[str]:
+        """
+        生成 `blessing_variants` 条不同的祝福语。
+
+        变体数大于 1 时，一次请求让 LLM 以 JSON 数组返回全部变体；批量生成失败时
+        退回单条生成（含模板回退），此时只有一条。
+
+        Args:
+            kind (str): 'start' 为假期首日祝福，'end' 为假期结束提醒。
+            holiday_name (str): 节日名称。
+            audience (str, optional): 'friend' 或 'group'。
+            fallback (bool): LLM 失败时是否回退到模板；为 False 时可能返回空列表。
+
+        Returns:
+            list[str]: 祝福语变体。
+        """
+        if self.blessing_variants > 1:
+            prompt, system_prompt = self._blessing_prompt(kind, holiday_name, audience)
+            variants = await self._generate_with_llm(
+                variants_prompt(prompt, self.blessing_variants), system_prompt, kind, None,
+                parse=lambda text: parse_variants(text, self.blessing_variants),
+            )
+            if variants:
+                self.logger.info(f"已为 {holiday_name} 批量生成 {len(variants)} 条祝福语（{kind}/{audience}）。")
+                return variants
+            self.logger.warning(f"批量生成 {holiday_name} 的祝福语失败，改为生成单条。")
+        text = await self._blessing_generator(kind)(holiday_name, None, audience=audience, fallback=fallback)
+        return [text] if text else []
+
+    async def generate_blessing(self, holiday_name: str, event: AstrMessageEvent | None = None, audience: str | None = None,
+                                fallback: bool = True) -> str:
         """
         生成节日祝福语。
 
@@ -616,57 +1150,22 @@ class BlessingHolidaysPlugin(Star):
 
         Args:
             holiday_name (str): 节日名称。
+            fallback (bool): LLM 失败时是否回退到模板；为 False 时返回空字符串。
 
         Returns:
             str: 生成的祝福语。
         """
         try:
             # 尝试使用LLM生成
-            try:
-                provider = None
-                # 1) 优先使用配置中指定的提供商
-                if self.llm_provider_id:
-                    try:
-                        provider = self.context.get_provider_by_id(provider_id=self.llm_provider_id)
-                    except Exception as e:
-                        self.logger.warning(f"按配置 provider_id 获取提供商失败，将回退到当前使用提供商: {e}")
-                # 2) 回退到当前上下文正在使用的提供商
-                if provider is None:
-                    try:
-                        if event is not None and hasattr(event, 'unified_msg_origin'):
-                            provider = self.context.get_using_provider(umo=event.unified_msg_origin)
-                        else:
-                            provider = self.context.get_using_provider()
-                    except Exception as e:
-                        self.logger.warning(f"获取当前使用的提供商失败: {e}")
-
-                if provider:
-                    # 根据 audience 构建不同的提示词（私聊更亲切，群聊更面向“大家”）
-                    if audience == 'friend':
-                        prompt = (
-                            f"请为“{holiday_name}”这个节日生成一段温暖、简短的中文祝福语（50-100字）。"
-                            f"请直接对收件人使用“你”的称呼，突出个体关怀，避免使用群体称呼或@。"
-                        )
-                    elif audience == 'group':
-                        prompt = (
-                            f"请为“{holiday_name}”这个节日生成一段适合群聊的中文祝福语（50-100字）。"
-                            f"请面向“大家/各位”等群体称呼，营造节日氛围与互动感，避免使用@或特殊格式。"
-                        )
-                    else:
-                        prompt = f"请为“{holiday_name}”这个节日生成一段温暖、简短的中文祝福语（50-100字），要体现节日特色和美好祝愿。"
-                    resp = await provider.text_chat(
-                        prompt=prompt,
-                        system_prompt="你是一个专业的节日祝福生成器，你的回答应该只包含祝福语文本本身，不要添加任何额外的解释或引言。"
-                    )
-                    
-                    if resp and resp.completion_text:
-                        blessing = resp.completion_text.strip()
-                        if blessing and len(blessing) > 10:
-                            self.logger.info(f"成功使用LLM为 {holiday_name} 生成祝福语。")
-                            return blessing
-            except Exception as e:
-                self.logger.warning(f"LLM生成祝福语失败，将使用预设模板: {e}")
-            
+            prompt, system_prompt = self._blessing_prompt('start', holiday_name, audience)
+            blessing = await self._generate_with_llm(prompt, system_prompt, 'start', event)
+            if blessing:
+                self.logger.info(f"成功使用LLM为 {holiday_name} 生成祝福语。")
+                return blessing
+            self.logger.warning(f"LLM未能为 {holiday_name} 生成祝福语，将使用预设模板。")
+
+            if not fallback:
+                return ''
             # LLM失败或未配置，回退到模板
             blessing_templates = {
                 "春节": "新春快乐！祝您在新的一年里龙马精神，万事如意，阖家幸福！",
@@ -678,6 +1177,9 @@ class BlessingHolidaysPlugin(Star):
                 "清明节": "清明时节，缅怀先人，珍惜当下。愿逝者安息，生者奋发。",
                 "元宵节": "元宵节快乐！愿您人圆事圆花好月圆，甜甜蜜蜜，幸福团圆！"
             }
+            template = blessing_templates.get(localize_holiday_name(holiday_name) or holiday_name)
+            if template:
+                return template
             for key in blessing_templates:
                 if key in holiday_name:
                     return blessing_templates[key]
@@ -691,161 +1193,32 @@ class BlessingHolidaysPlugin(Star):
     
 
 
-    async def generate_end_of_holiday_blessing(self, holiday_name: str, event: AstrMessageEvent | None = None, audience: str | None = None) -> str:
+    async def generate_end_of_holiday_blessing(self, holiday_name: str, event: AstrMessageEvent | None = None, audience: str | None = None,
+                                               fallback: bool = True) -> str:
         """
         生成假期结束的祝福语。
 
         Args:
             holiday_name (str): 节日名称。
+            fallback (bool): LLM 失败时是否回退到模板；为 False 时返回空字符串。
 
         Returns:
             str: 生成的祝福语。
         """
         try:
             # 尝试使用LLM生成
-            try:
-                provider = None
-                if self.llm_provider_id:
-                    try:
-                        provider = self.context.get_provider_by_id(provider_id=self.llm_provider_id)
-                    except Exception as e:
-                        self.logger.warning(f"按配置 provider_id 获取提供商失败，将回退到当前使用提供商: {e}")
-                if provider is None:
-                    try:
-                        if event is not None and hasattr(event, 'unified_msg_origin'):
-                            provider = self.context.get_using_provider(umo=event.unified_msg_origin)
-                        else:
-                            provider = self.context.get_using_provider()
-                    except Exception as e:
-                        self.logger.warning(f"获取当前使用的提供商失败: {e}")
-
-                if provider:
-                    if audience == 'friend':
-                        prompt = (
-                            f"为“{holiday_name}”假期的最后一天晚上，生成一段简短温馨的中文祝福语（50-100字）。"
-                            f"请直接对收件人使用“你”的称呼，包含温柔的祝愿与轻度鼓励，避免群体称呼。"
-                        )
-                    elif audience == 'group':
-                        prompt = (
-                            f"为“{holiday_name}”假期的最后一天晚上，生成一段适合群聊的简短温馨祝福（50-100字）。"
-                            f"请面向“大家/各位”等群体称呼，包含对假期的简短回顾，并鼓励大家以积极状态迎接接下来的工作和生活。"
-                        )
-                    else:
-                        prompt = (
-                            f"为“{holiday_name}”假期的最后一天晚上，生成一段简短温馨的中文祝福语（50-100字）。"
-                            f"内容应包含对假期的回顾，并鼓励大家以饱满的热情迎接接下来的工作和生活。"
-                        )
-                    resp = await provider.text_chat(
-                        prompt=prompt,
-                        system_prompt="你是一个善于鼓励和给予温暖祝福的AI助手。你的回答应该只包含祝福语文本本身，不要添加任何额外的解释或引言。"
-                    )
-                    
-                    if resp and resp.completion_text:
-                        blessing = resp.completion_text.strip()
-                        if blessing and len(blessing) > 10:
-                            self.logger.info(f"成功使用LLM为 {holiday_name} 假期结束生成祝福语。")
-                            return blessing
-            except Exception as e:
-                self.logger.warning(f"LLM生成假期结束祝福语失败，将使用预设模板: {e}")
-
+            prompt, system_prompt = self._blessing_prompt('end', holiday_name, audience)
+            blessing = await self._generate_with_llm(prompt, system_prompt, 'end', event)
+            if blessing:
+                self.logger.info(f"成功使用LLM为 {holiday_name} 假期结束生成祝福语。")
+                return blessing
+            self.logger.warning(f"LLM未能为 {holiday_name} 生成假期结束祝福语，将使用预设模板。")
+
+            if not fallback:
+                return ''
             # LLM失败或未配置，回退到模板
             return f"{holiday_name}假期即将结束，希望您度过了一个愉快而充实的时光！让我们整理好心情，带着满满的能量和美好的回忆，迎接新的挑战。祝您在未来的工作和生活中一切顺利，天天开心！"
 
         except Exception as e:
             self.logger.error(f"生成假期结束祝福语时发生未知错误: {e}")
             return "假期即将结束，祝您未来一切顺利！"
-
-    async def end_of_holiday_checker(self):
-        """
-        每日在指定时间检查是否为假期最后一天，并发送祝福。
-        """
-        self.logger.info("假期结束提醒任务已启动。")
-        while True:
-            try:
-                now = datetime.now()
-                send_time_str = self.end_of_holiday_config.get("send_time", "22:00")
-                hour, minute = map(int, send_time_str.split(':'))
-                
-                send_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                
-                if now > send_time:
-                    send_time += timedelta(days=1)
-                
-                wait_seconds = (send_time - now).total_seconds()
-                self.logger.info(f"下一次假期结束检查将在 {send_time.strftime('%Y-%m-%d %H:%M:%S')} 进行，等待 {wait_seconds:.0f} 秒。")
-                await asyncio.sleep(wait_seconds)
-
-                today = datetime.now().date()
-                today_info = next((h for h in self.holidays if h['date'] == today.isoformat()), None)
-
-                if today_info and today_info['is_last_day']:
-                    holiday_name = today_info['holiday_name']
-                    self.logger.info(f"检测到假期最后一天：{holiday_name}，准备发送结束提醒...")
-
-                    # 1. 生成祝福语
-                    blessing_friend = await self.generate_end_of_holiday_blessing(holiday_name, None, audience='friend')
-                    blessing_group = await self.generate_end_of_holiday_blessing(holiday_name, None, audience='group')
-                    
-                    # 2. 构建消息链（纯文本）
-                    chain_friend = MessageChain().message(blessing_friend or blessing_group)
-                    chain_group = MessageChain().message(blessing_group or blessing_friend)
-
-                    # 4. 发送到所有目标会话
-                    sent_count = 0
-                    all_platforms = self.context.platform_manager.get_insts()
-                    # 跨平台去重集合（用户/群组）
-                    sent_user_ids: set[str] = set()
-                    sent_group_ids: set[str] = set()
-                    for platform in all_platforms:
-                        if not hasattr(platform, "get_client") or not platform.get_client() or not hasattr(platform.get_client().api, "call_action"):
-                            continue
-                        
-                        pname = self._get_platform_name(platform)
-                        self.logger.info(f"正在通过平台 '{platform.meta.name}' 发送假期结束提醒...")
-                        client = platform.get_client()
-                        
-                        try:
-                            friend_list = await client.api.call_action("get_friend_list")
-                            group_list = await client.api.call_action("get_group_list")
-
-                            # 发送到好友
-                            for friend in friend_list:
-                                user_id = friend.get('user_id')
-                                if not user_id:
-                                    continue
-                                session_str = f"{pname}:{MessageType.FRIEND_MESSAGE.value}:{user_id}"
-                                try:
-                                    await self.context.send_message(session_str, chain_friend)
-                                    sent_count += 1
-                                    self.logger.info(f"假期结束提醒已发送到用户 {user_id}")
-                                    await asyncio.sleep(3)
-                                except Exception as e:
-                                    self.logger.error(f"发送假期结束提醒到用户 {user_id} 失败: {e}")
-                            
-                            # 发送到群组
-                            for group in group_list:
-                                group_id = group.get('group_id')
-                                if not group_id:
-                                    continue
-                                session_str = f"{pname}:{MessageType.GROUP_MESSAGE.value}:{group_id}"
-                                try:
-                                    await self.context.send_message(session_str, chain_group)
-                                    sent_count += 1
-                                    self.logger.info(f"假期结束提醒已发送到群组 {group_id}")
-                                    await asyncio.sleep(3)
-                                except Exception as e:
-                                    self.logger.error(f"发送假期结束提醒到群组 {group_id} 失败: {e}")
-                        except Exception as e:
-                            self.logger.error(f"从平台 '{platform.meta.name}' 获取好友/群组列表失败: {e}")
-
-                    if sent_count > 0:
-                        self.logger.info(f"假期结束提醒已成功发送到 {sent_count} 个会话。")
-                    else:
-                        self.logger.warning("未能获取到任何好友或群组，假期结束提醒未发送。")
-
-            except asyncio.CancelledError:
-                self.logger.info("假期结束提醒任务被取消。")
-                break
-            except Exception as e:
-                self.logger.error(f"假期结束提醒任务发生严重错误: {e}")
-                await asyncio.sleep(3600) # 出错时等待1小时后重试
@@ -0,0 +1,190 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+# 延迟直方图的默认桶上界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 各指标的说明，用于 Prometheus 的 HELP 行
+DESCRIPTIONS = {
+    'translation_seconds': "联网翻译节日名称的耗时",
+    'translation_total': "联网翻译节日名称的次数",
+    'llm_request_seconds': "LLM 生成祝福语（text_chat）的耗时",
+    'llm_request_total': "LLM 生成祝福语（text_chat）的次数",
+    'send_seconds': "单次 context.send_message 的耗时",
+    'send_total': "context.send_message 的调用次数",
+    'rate_limit_wait_seconds': "发送前等待限速令牌的时间",
+    'list_fetch_seconds': "获取好友/群组列表的耗时",
+    'list_fetch_total': "获取好友/群组列表的次数",
+    'year_build_seconds': "构建一整年节假日数据的耗时",
+    'year_build_total': "构建一整年节假日数据的次数",
+    'cache_load_seconds': "从预编译合集或分片读取一年数据的耗时",
+    'cache_load_total': "从预编译合集或分片读取一年数据的次数",
+    'cache_save_seconds': "缓存文件写盘的耗时",
+    'cache_save_total': "缓存文件写盘的次数",
+    'recipient_cache_total': "会话列表缓存的命中与刷新次数",
+}
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """按标签分组的单调递增计数器。"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+
+class Histogram:
+    """按标签分组的固定桶直方图，记录次数、总和与各桶计数。"""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（最后一个为 +Inf）, 次数, 总和, 最大值]
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * (len(self.buckets) + 1), 0, 0.0, 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += 1
+        series[2] += value
+        series[3] = max(series[3], value)
+
+    def quantile(self, q: float, key: tuple = ()) -> float:
+        """按桶估算分位数（返回所在桶的上界，超出最大桶时返回观测到的最大值）。"""
+        series = self.series.get(key)
+        if not series or not series[1]:
+            return 0.0
+        rank = q * series[1]
+        seen = 0
+        for i, count in enumerate(series[0]):
+            seen += count
+            if seen >= rank:
+                return min(self.buckets[i], series[3]) if i < len(self.buckets) else series[3]
+        return series[3]
+
+
+class MetricsRegistry:
+    """
+    插件内部的指标注册表。
+
+    指标在首次使用时创建。`render_prometheus` 输出 Prometheus 文本格式，
+    可写入文件供 node_exporter 的 textfile collector 采集。
+    """
+
+    def __init__(self, prefix: str = 'blessings_'):
+        self.prefix = prefix
+        self.counters: dict[str, Counter] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self.started = time.time()
+
+    def counter(self, name: str, help_text: str = '') -> Counter:
+        metric = self.counters.get(name)
+        if metric is None:
+            metric = self.counters[name] = Counter(name, help_text or DESCRIPTIONS.get(name, ''))
+        return metric
+
+    def histogram(self, name: str, help_text: str = '', buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = self.histograms.get(name)
+        if metric is None:
+            metric = self.histograms[name] = Histogram(name, help_text or DESCRIPTIONS.get(name, ''), buckets)
+        return metric
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        self.counter(name).inc(amount, **labels)
+
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name).observe(value, **labels)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        记录代码块的耗时（秒）到直方图 `name`，并按结果计数到 `<name 去掉 _seconds>_total`。
+
+        代码块抛出异常时结果标签为 error，否则为 ok；可在代码块内修改
+        产出的字典中的 'outcome' 以记录其他结果（如 empty）。
+        """
+        state = {'outcome': 'ok'}
+        start = time.perf_counter()
+        try:
+            yield state
+        except BaseException:
+            state['outcome'] = 'error'
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+            total_name = (name[:-len('_seconds')] if name.endswith('_seconds') else name) + '_total'
+            self.inc(total_name, outcome=state['outcome'], **labels)
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+        self.started = time.time()
+
+    def render_prometheus(self) -> str:
+        """输出 Prometheus 文本格式（0.0.4）。"""
+        lines = []
+        for metric in sorted(self.counters.values(), key=lambda m: m.name):
+            name = self.prefix + metric.name
+            lines.append(f"# HELP {name} {metric.help or metric.name}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(metric.values.items()):
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        for metric in sorted(self.histograms.values(), key=lambda m: m.name):
+            name = self.prefix + metric.name
+            lines.append(f"# HELP {name} {metric.help or metric.name}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, (counts, count, total, _max) in sorted(metric.series.items()):
+                cumulative = 0
+                for bound, c in zip(metric.buckets + (float('inf'),), counts):
+                    cumulative += c
+                    le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total:.6f}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+        lines.append(f"# TYPE {self.prefix}start_time_seconds gauge")
+        lines.append(f"{self.prefix}start_time_seconds {self.started:.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def summary_lines(self) -> list[str]:
+        """供聊天指令展示的简要统计，每个序列一行。"""
+        lines = []
+        for metric in sorted(self.histograms.values(), key=lambda m: m.name):
+            for key, (_counts, count, total, peak) in sorted(metric.series.items()):
+                labels = ','.join(v for _, v in key)
+                lines.append(
+                    f"{metric.name}{f'[{labels}]' if labels else ''}: {count} 次，平均 {total / count * 1000:.0f} ms，"
+                    f"p95≈{metric.quantile(0.95, key) * 1000:.0f} ms，最大 {peak * 1000:.0f} ms"
+                )
+        for metric in sorted(self.counters.values(), key=lambda m: m.name):
+            parts = [f"{','.join(v for _, v in key) or '-'}={value:g}" for key, value in sorted(metric.values.items())]
+            lines.append(f"{metric.name}: {' '.join(parts)}")
+        return lines
+
+
+# 进程内共享的指标注册表
+METRICS = MetricsRegistry()
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import tempfile
+from typing import Callable
+
+try:
+    from astrbot.api import logger
+except ImportError:
+    # 在插件之外（例如基准测试）使用时
+    import logging
+    logger = logging.getLogger(__name__)
+
+try:
+    from .metrics import METRICS
+except ImportError:
+    # 作为独立脚本 holidays_get.py 的顶层模块导入时
+    from metrics import METRICS
+
+
+def atomic_write(path, data: bytes):
+    """
+    原子地写入文件：先写入同目录下的临时文件并 fsync，再重命名覆盖目标文件。
+
+    进程在任何时刻崩溃，目标文件要么是旧内容，要么是完整的新内容。
+
+    Args:
+        path: 目标文件路径。
+        data (bytes): 文件内容。
+    """
+    path = os.fspath(path)
+    directory = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    try:
+        # 目录项也落盘，保证重命名本身不会因断电丢失
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def dump_json(data) -> bytes:
+    """以插件统一的 JSON 格式（UTF-8、缩进 2）序列化。"""
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def atomic_write_json(path, data):
+    """原子地写入 JSON 文件。"""
+    atomic_write(path, dump_json(data))
+
+
+def read_json(path):
+    """读取 JSON 文件，文件不存在时返回 None。"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class WriteBehind:
+    """
+    延迟合并写盘。
+
+    `schedule` 只记录某个文件需要保存，等待 `delay` 秒后在事件循环中生成文件内容，
+    再放到线程池中原子写入。等待期间对同一文件的多次保存合并为一次，只写最新内容；
+    同一文件的写入串行进行，不会出现旧内容覆盖新内容。
+    没有运行中的事件循环时（例如独立脚本中）直接同步写入。
+    """
+
+    def __init__(self, delay: float = 1.0):
+        """
+        Args:
+            delay (float): 首次请求保存到实际写盘之间的等待秒数。
+        """
+        self.delay = delay
+        self._pending: dict[str, Callable[[], bytes]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.writes = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def schedule(self, path, render: Callable[[], bytes]):
+        """
+        请求保存文件。
+
+        Args:
+            path: 目标文件路径。
+            render: 返回文件内容的函数，在写盘前才调用，因此总是写入最新状态。
+        """
+        key = os.fspath(path)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._pending.pop(key, None)
+            self._write_now(key, render)
+            return
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = render
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            self._tasks[key] = asyncio.create_task(self._flush_later(key))
+
+    def _write_now(self, key: str, render: Callable[[], bytes]):
+        try:
+            with METRICS.timer('cache_save_seconds', file=os.path.basename(key)):
+                atomic_write(key, render())
+            self.writes += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"保存文件 {key} 失败: {e}")
+
+    async def _flush_later(self, key: str):
+        try:
+            while key in self._pending:
+                await asyncio.sleep(self.delay)
+                await self._flush_key(key)
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+
+    async def _flush_key(self, key: str):
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            render = self._pending.pop(key, None)
+            if render is None:
+                return
+            try:
+                with METRICS.timer('cache_save_seconds', file=os.path.basename(key)):
+                    data = render()
+                    await asyncio.to_thread(atomic_write, key, data)
+                self.writes += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"保存文件 {key} 失败: {e}")
+
+    async def flush(self):
+        """立即写入所有待保存的文件，用于插件停止前。"""
+        for key in list(self._pending):
+            await self._flush_key(key)
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks.clear()
+
+    def stats(self) -> dict:
+        return {'pending': len(self._pending), 'writes': self.writes,
+                'coalesced': self.coalesced, 'errors': self.errors}
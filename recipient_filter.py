@@ -0,0 +1,232 @@
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from astrbot.api import logger
+
+from .persistence import WriteBehind, atomic_write
+
+# 名单文件布局（小端序）：
+#   头部 11 字节：magic(4s) version(B) section_count(H) crc32(I)，crc32 覆盖头部之后的全部内容
+#   每个分段：list(B) audience(B) platform_len(H) platform(UTF-8) int_count(I) str_count(I)
+#             int_count 个升序 u64 会话 ID，再接 str_count 条 u16 长度 + UTF-8 的非数字 ID（升序）
+# 10 万个数字 ID 约 0.8 MB。打开时只读取分段索引，某个分段在首次查询时才解码为集合。
+
+MAGIC = b'BHRF'
+VERSION = 1
+LISTS = ('deny', 'allow')
+AUDIENCES = ('friend', 'group')
+
+_HEADER = struct.Struct('<4sBHI')
+_SECTION = struct.Struct('<BBH')
+_COUNTS = struct.Struct('<II')
+_U64_MAX = (1 << 64) - 1
+
+
+def _normalize(rid) -> int | str:
+    """数字 ID 转为整数（紧凑存储），其余保持字符串。"""
+    rid = str(rid).strip()
+    if rid.isdigit() and int(rid) <= _U64_MAX:
+        return int(rid)
+    return rid
+
+
+class RecipientFilter:
+    """
+    广播收件人名单：按平台与受众（好友/群组）保存的退订名单（deny）与白名单（allow）。
+
+    在退订名单中的会话不会收到广播；`allow_only` 为 True 时只向白名单中的会话发送。
+    名单以升序整数数组的二进制文件保存，启动时只读取分段索引，不需要解析一个巨大的 JSON；
+    某个平台的名单在首次查询时才解码为集合，之后每次判断都是常数时间。
+    """
+
+    def __init__(self, path, writer: WriteBehind | None = None, allow_only: bool = False):
+        """
+        Args:
+            path: 名单文件路径。
+            writer (WriteBehind, optional): 延迟写盘器，缺省时同步原子写入。
+            allow_only (bool): 是否只向白名单中的会话发送。
+        """
+        self.path = str(path)
+        self.writer = writer
+        self.allow_only = allow_only
+        self._data: bytes = b''
+        # (名单, 平台, 受众) -> 分段在文件中的 (起始, 结束) 偏移
+        self._index: dict[tuple[str, str, str], tuple[int, int]] | None = None
+        self._sets: dict[tuple[str, str, str], set] = {}
+
+    def load(self):
+        """读取名单文件的分段索引，文件不存在或损坏时视为空名单。可在线程中调用。"""
+        index: dict[tuple[str, str, str], tuple[int, int]] = {}
+        data = b''
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    data = f.read()
+                index = self._parse_index(data)
+            except Exception as e:
+                logger.error(f"读取收件人名单 {self.path} 失败，按空名单处理: {e}")
+                data, index = b'', {}
+        self._data = data
+        self._index = index
+        self._sets.clear()
+
+    @staticmethod
+    def _parse_index(data: bytes) -> dict[tuple[str, str, str], tuple[int, int]]:
+        if len(data) < _HEADER.size:
+            raise ValueError("名单文件过短")
+        magic, version, count, crc = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("不是收件人名单文件")
+        if version != VERSION:
+            raise ValueError(f"不支持的名单文件版本 {version}")
+        if zlib.crc32(memoryview(data)[_HEADER.size:]) != crc:
+            raise ValueError("名单文件校验失败")
+        index = {}
+        offset = _HEADER.size
+        for _ in range(count):
+            list_no, audience_no, name_len = _SECTION.unpack_from(data, offset)
+            start = offset
+            offset += _SECTION.size
+            platform = data[offset:offset + name_len].decode('utf-8')
+            offset += name_len
+            int_count, str_count = _COUNTS.unpack_from(data, offset)
+            offset += _COUNTS.size + int_count * 8
+            for _ in range(str_count):
+                (length,) = struct.unpack_from('<H', data, offset)
+                offset += 2 + length
+            index[(LISTS[list_no], platform, AUDIENCES[audience_no])] = (start, offset)
+        return index
+
+    def _decode(self, start: int) -> set:
+        data = self._data
+        _list_no, _audience_no, name_len = _SECTION.unpack_from(data, start)
+        offset = start + _SECTION.size + name_len
+        int_count, str_count = _COUNTS.unpack_from(data, offset)
+        offset += _COUNTS.size
+        ids = array('Q')
+        ids.frombytes(data[offset:offset + int_count * 8])
+        if sys.byteorder != 'little':
+            ids.byteswap()
+        members: set = set(ids)
+        offset += int_count * 8
+        for _ in range(str_count):
+            (length,) = struct.unpack_from('<H', data, offset)
+            offset += 2
+            members.add(data[offset:offset + length].decode('utf-8'))
+            offset += length
+        return members
+
+    def _members(self, list_name: str, platform: str, audience: str, create: bool = False) -> set | None:
+        key = (list_name, platform, audience)
+        members = self._sets.get(key)
+        if members is not None:
+            return members
+        if self._index is None:
+            self.load()
+        span = self._index.get(key)
+        if span is not None:
+            members = self._decode(span[0])
+        elif create:
+            members = set()
+        else:
+            return None
+        self._sets[key] = members
+        return members
+
+    def allows(self, platform: str, audience: str, rid) -> bool:
+        """判断是否可以向某个会话广播。"""
+        rid = _normalize(rid)
+        deny = self._members('deny', platform, audience)
+        if deny and rid in deny:
+            return False
+        if self.allow_only:
+            allow = self._members('allow', platform, audience)
+            return bool(allow) and rid in allow
+        return True
+
+    def contains(self, list_name: str, platform: str, audience: str, rid) -> bool:
+        members = self._members(list_name, platform, audience)
+        return bool(members) and _normalize(rid) in members
+
+    def update(self, list_name: str, platform: str, audience: str, add=(), remove=()) -> int:
+        """
+        修改名单并保存。
+
+        Args:
+            list_name (str): 'deny' 或 'allow'。
+            platform (str): 平台名称。
+            audience (str): 'friend' 或 'group'。
+            add: 要加入的会话 ID。
+            remove: 要移除的会话 ID。
+
+        Returns:
+            int: 实际变化的条目数。
+        """
+        members = self._members(list_name, platform, audience, create=True)
+        changed = 0
+        for rid in map(_normalize, remove):
+            if rid in members:
+                members.discard(rid)
+                changed += 1
+        for rid in map(_normalize, add):
+            if rid not in members:
+                members.add(rid)
+                changed += 1
+        if changed:
+            self.save()
+        return changed
+
+    def counts(self) -> dict[tuple[str, str, str], int]:
+        """各名单的条目数：(名单, 平台, 受众) -> 数量。只统计索引时不解码分段。"""
+        if self._index is None:
+            self.load()
+        result = {}
+        for key, (start, _end) in self._index.items():
+            if key not in self._sets:
+                name_len = _SECTION.unpack_from(self._data, start)[2]
+                int_count, str_count = _COUNTS.unpack_from(self._data, start + _SECTION.size + name_len)
+                result[key] = int_count + str_count
+        for key, members in self._sets.items():
+            result[key] = len(members)
+        return {key: n for key, n in sorted(result.items()) if n}
+
+    def _render(self) -> bytes:
+        """生成名单文件内容；未解码的分段原样复制。"""
+        keys = set(self._index or {}) | set(self._sets)
+        payload = bytearray()
+        count = 0
+        for key in sorted(keys):
+            list_name, platform, audience = key
+            members = self._sets.get(key)
+            if members is None:
+                start, end = self._index[key]
+                payload += self._data[start:end]
+                count += 1
+                continue
+            if not members:
+                continue
+            ints = array('Q', sorted(m for m in members if isinstance(m, int)))
+            if sys.byteorder != 'little':
+                ints.byteswap()
+            strs = sorted(m for m in members if isinstance(m, str))
+            name = platform.encode('utf-8')
+            payload += _SECTION.pack(LISTS.index(list_name), AUDIENCES.index(audience), len(name)) + name
+            payload += _COUNTS.pack(len(ints), len(strs)) + ints.tobytes()
+            for s in strs:
+                raw = s.encode('utf-8')
+                payload += struct.pack('<H', len(raw)) + raw
+            count += 1
+        return _HEADER.pack(MAGIC, VERSION, count, zlib.crc32(payload)) + bytes(payload)
+
+    def save(self):
+        """保存名单（经延迟写盘器合并写入）。"""
+        if self.writer is not None:
+            self.writer.schedule(self.path, self._render)
+            return
+        try:
+            atomic_write(self.path, self._render())
+        except Exception as e:
+            logger.error(f"保存收件人名单到 {self.path} 失败: {e}")
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from astrbot.api import logger
+
+from .broadcast_report import RunTimeline
+from .metrics import METRICS
+
+# 每类会话保留的字段，其余字段丢弃以减小快照占用
+_ID_KEYS = {'friend': 'user_id', 'group': 'group_id'}
+_KEEP_FIELDS = {'friend': (), 'group': ('member_count',)}
+_ACTIONS = {'friend': 'get_friend_list', 'group': 'get_group_list'}
+
+
+@dataclass
+class DirectorySnapshot:
+    """
+    某个平台的好友/群组快照。
+
+    Attributes:
+        fetched_at (float): 获取时间（`time.monotonic()`）。
+        members (dict[str, dict[str, dict]]): 'friend'/'group' -> 会话 ID -> 保留的字段。
+    """
+    fetched_at: float
+    members: dict[str, dict[str, dict]] = field(default_factory=dict)
+
+
+class RecipientDirectory:
+    """
+    按平台实例缓存好友/群组列表。
+
+    缓存键应为平台实例 ID 而不是适配器名称，同一适配器的多个账号各有自己的列表。
+
+    快照在 TTL 内直接复用；过期后重新获取并与上一份快照比较，记录增减。
+    列表以异步迭代器的形式产出，好友列表一到就开始产出，发送无需等待全部列表处理完。
+    """
+
+    def __init__(self, ttl_seconds: float = 6 * 3600):
+        """
+        Args:
+            ttl_seconds (float): 快照有效期（秒）。
+        """
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: dict[str, DirectorySnapshot] = {}
+        self.hits = 0
+        self.refreshes = 0
+
+    def invalidate(self, platform: str | None = None):
+        """丢弃指定平台（缺省为全部平台）的快照。"""
+        if platform is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(platform, None)
+
+    def snapshot(self, platform: str) -> DirectorySnapshot | None:
+        return self._snapshots.get(platform)
+
+    def _fresh(self, platform: str) -> DirectorySnapshot | None:
+        snap = self._snapshots.get(platform)
+        if snap is not None and time.monotonic() - snap.fetched_at < self.ttl_seconds:
+            return snap
+        return None
+
+    async def iter_recipients(self, platform: str, client,
+                              timeline: RunTimeline | None = None) -> AsyncIterator[tuple[str, str, dict]]:
+        """
+        逐个产出平台上的会话。
+
+        Args:
+            platform (str): 平台实例 ID，作为缓存键。
+            client: 平台客户端，需支持 `api.call_action`。
+            timeline (RunTimeline, optional): 广播时间线，记录列表获取的耗时。
+
+        Yields:
+            tuple[str, str, dict]: (类型 'friend'/'group', 会话 ID, 保留的字段)。
+        """
+        snap = self._fresh(platform)
+        if snap is not None:
+            self.hits += 1
+            METRICS.inc('recipient_cache_total', result='hit')
+            if timeline is not None:
+                with timeline.phase('list_fetch', platform=platform, cached=True):
+                    pass
+            for kind in ('friend', 'group'):
+                for rid, info in snap.members.get(kind, {}).items():
+                    yield kind, rid, info
+            return
+
+        self.refreshes += 1
+        METRICS.inc('recipient_cache_total', result='refresh')
+        previous = self._snapshots.get(platform)
+        # 两个列表并发获取，好友列表先到先发
+        tasks = {kind: asyncio.create_task(self._fetch(kind, client, platform, timeline)) for kind in _ACTIONS}
+        members: dict[str, dict[str, dict]] = {}
+        try:
+            for kind in ('friend', 'group'):
+                try:
+                    raw = await tasks[kind]
+                except Exception as e:
+                    if previous is None or kind not in previous.members:
+                        raise
+                    # 获取失败时沿用上一份快照；该类会话在失败前尚未产出任何一个，不会重复
+                    logger.warning(f"获取平台 '{platform}' 的{_ACTIONS[kind]}失败，沿用上次的列表: {e}")
+                    members[kind] = previous.members[kind]
+                    for rid, info in members[kind].items():
+                        yield kind, rid, info
+                    continue
+                current: dict[str, dict] = {}
+                id_key, keep = _ID_KEYS[kind], _KEEP_FIELDS[kind]
+                for item in raw or ():
+                    rid = item.get(id_key)
+                    if not rid:
+                        continue
+                    rid = str(rid)
+                    info = {k: item[k] for k in keep if k in item}
+                    current[rid] = info
+                    yield kind, rid, info
+                members[kind] = current
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # 另一个列表先失败时，这里的异常不会再被等待，取出以免事件循环报未处理异常
+                    task.exception()
+
+        self._snapshots[platform] = DirectorySnapshot(time.monotonic(), members)
+        self._log_diff(platform, previous, members)
+
+    @staticmethod
+    async def _fetch(kind: str, client, platform: str, timeline: RunTimeline | None):
+        with METRICS.timer('list_fetch_seconds', kind=kind):
+            if timeline is None:
+                return await client.api.call_action(_ACTIONS[kind])
+            with timeline.phase('list_fetch', platform=platform, list=kind) as entry:
+                raw = await client.api.call_action(_ACTIONS[kind])
+                entry['count'] = len(raw or ())
+                return raw
+
+    @staticmethod
+    def _log_diff(platform: str, previous: DirectorySnapshot | None, members: dict[str, dict[str, dict]]):
+        if previous is None:
+            logger.info(
+                f"平台 '{platform}' 会话列表已缓存：好友 {len(members.get('friend', {}))} 个，"
+                f"群组 {len(members.get('group', {}))} 个。"
+            )
+            return
+        parts = []
+        for kind, label in (('friend', '好友'), ('group', '群组')):
+            old = previous.members.get(kind, {}).keys()
+            new = members.get(kind, {}).keys()
+            parts.append(f"{label} +{len(new - old)}/-{len(old - new)}")
+        logger.info(f"平台 '{platform}' 会话列表已刷新：{'，'.join(parts)}。")
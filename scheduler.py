@@ -0,0 +1,123 @@
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Awaitable, Callable
+
+from astrbot.api import logger
+
+
+@dataclass(order=True)
+class ScheduledEvent:
+    """
+    调度器中的一个事件，按触发时间排序。
+
+    Attributes:
+        when (datetime): 触发时间（本地时间）。
+        kind (str): 事件类型，例如 'start'、'end'、'pregenerate'、'rollover'。
+        day (date): 事件所属日期。
+        holiday (str): 相关的节日名称。
+    """
+    when: datetime
+    kind: str = field(compare=False)
+    day: date = field(compare=False)
+    holiday: str = field(compare=False, default='')
+
+
+class EventScheduler:
+    """
+    基于最小堆的事件调度器。
+
+    由 `plan` 根据节假日数据计算出接下来的事件并放入最小堆，只在事件到期时
+    调用 `handle`。等待时每次睡眠到下一个事件剩余时间的一半（不少于 `min_slice`、
+    不超过 `max_slice` 秒），离事件越近醒得越勤，一年只需几百次唤醒。每次醒来都用
+    墙上时钟重新计算剩余时间，并与单调时钟对比以发现系统休眠或时钟调整；醒来时已
+    错过的事件会立即执行。数据变化时调用 `invalidate` 重新计算事件。
+    """
+
+    def __init__(self, plan: Callable[[datetime], Awaitable[list[ScheduledEvent]]],
+                 handle: Callable[[ScheduledEvent], Awaitable[None]], min_slice: float = 5,
+                 max_slice: float = 7 * 86400, clock: Callable[[], datetime] = datetime.now):
+        """
+        Args:
+            plan: 根据当前时间返回待执行事件列表的协程函数。
+            handle: 执行单个事件的协程函数。
+            min_slice (float): 单次睡眠的最短秒数，剩余时间更短时直接睡到事件时间。
+            max_slice (float): 单次睡眠的最长秒数，没有事件时也按此间隔检查。
+            clock: 返回当前本地时间的函数。
+        """
+        self.plan = plan
+        self.handle = handle
+        self.min_slice = min_slice
+        self.max_slice = max_slice
+        self.clock = clock
+        self._heap: list[ScheduledEvent] = []
+        self._dirty = True
+        self._changed = asyncio.Event()
+        self.wakeups = 0
+        self.fired = 0
+
+    def invalidate(self):
+        """节假日数据或配置变化后调用，调度器会立即重新计算事件。"""
+        self._dirty = True
+        self._changed.set()
+
+    def pending(self) -> list[ScheduledEvent]:
+        """返回按时间排序的待执行事件。"""
+        return sorted(self._heap)
+
+    async def _replan(self):
+        self._dirty = False
+        self._changed.clear()
+        self._heap = list(await self.plan(self.clock()))
+        heapq.heapify(self._heap)
+        if self._heap:
+            nxt = self._heap[0]
+            logger.info(
+                f"已安排 {len(self._heap)} 个节假日事件，下一个：{nxt.when.strftime('%Y-%m-%d %H:%M:%S')} "
+                f"{nxt.kind} {nxt.holiday}".rstrip()
+            )
+
+    def _slice(self, remaining: float) -> float:
+        """返回距下一个事件还剩 `remaining` 秒时本次睡眠的秒数。"""
+        return min(remaining, max(self.min_slice, min(remaining / 2, self.max_slice)))
+
+    async def _sleep(self, seconds: float):
+        """睡眠至多 `seconds` 秒，数据变化时提前返回，并检查时钟跳变。"""
+        wall_start, mono_start = self.clock(), time.monotonic()
+        # 不用 wait_for：它在等待结束与取消同时发生时可能吞掉取消请求
+        waiter = asyncio.ensure_future(self._changed.wait())
+        try:
+            await asyncio.wait({waiter}, timeout=seconds)
+        finally:
+            waiter.cancel()
+        self.wakeups += 1
+        drift = (self.clock() - wall_start).total_seconds() - (time.monotonic() - mono_start)
+        if abs(drift) > 5:
+            logger.warning(f"检测到系统休眠或时钟调整（偏差 {drift:.0f} 秒），按当前时间重新计算。")
+
+    async def run(self):
+        """调度主循环，直到任务被取消。"""
+        logger.info("节假日事件调度器已启动。")
+        while True:
+            try:
+                if self._dirty:
+                    await self._replan()
+                if not self._heap:
+                    await self._sleep(self.max_slice)
+                    continue
+                now = self.clock()
+                event = self._heap[0]
+                if event.when <= now:
+                    heapq.heappop(self._heap)
+                    self.fired += 1
+                    await self.handle(event)
+                    continue
+                await self._sleep(self._slice((event.when - now).total_seconds()))
+            except asyncio.CancelledError:
+                logger.info("节假日事件调度器已停止。")
+                break
+            except Exception as e:
+                logger.error(f"节假日事件调度器发生错误: {e}")
+                await asyncio.sleep(60)
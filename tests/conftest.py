@@ -0,0 +1,19 @@
+"""
+测试公共配置。
+
+插件模块之间使用相对导入，这里把插件目录注册为一个包（`blessingholidays`），
+测试通过 `blessingholidays.<模块>` 导入。需在已安装 AstrBot 与 requirements.txt 依赖的环境中运行：
+
+    python -m pytest -q tests
+"""
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = 'blessingholidays'
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(ROOT)]
+    sys.modules[PACKAGE] = package
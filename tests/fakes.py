@@ -0,0 +1,76 @@
+"""测试用的假平台、假上下文与假事件，模拟 AstrBot 传给插件的对象。"""
+
+
+class FakeMeta:
+    def __init__(self, platform_id: str, name: str):
+        self.id = platform_id
+        self.name = name
+
+
+class FakeApi:
+    def __init__(self, friends, groups):
+        self.friends = list(friends)
+        self.groups = dict(groups)
+        self.calls = []
+
+    async def call_action(self, action, **kwargs):
+        self.calls.append(action)
+        if action == 'get_friend_list':
+            return [{'user_id': rid} for rid in self.friends]
+        return [{'group_id': rid, 'member_count': members} for rid, members in self.groups.items()]
+
+
+class FakeClient:
+    def __init__(self, api: FakeApi):
+        self.api = api
+
+
+class FakePlatform:
+    """
+    Args:
+        platform_id (str): 平台实例 ID，即 unified_msg_origin 的第一段。
+        name (str): 适配器名称。
+        friends: 好友 ID。
+        groups: 群号 -> 成员数。
+    """
+
+    def __init__(self, platform_id: str = 'default', name: str = 'aiocqhttp', friends=(), groups=None):
+        self.api = FakeApi(friends, groups or {})
+        self._client = FakeClient(self.api)
+        self._meta = FakeMeta(platform_id, name)
+
+    def get_client(self):
+        return self._client
+
+    def meta(self):
+        return self._meta
+
+
+class FakePlatformManager:
+    def __init__(self, platforms):
+        self.platforms = list(platforms)
+
+    def get_insts(self):
+        return self.platforms
+
+
+class FakeContext:
+    def __init__(self, data_dir, platforms=()):
+        self.data_dir = str(data_dir)
+        self.platform_manager = FakePlatformManager(platforms)
+        self.sent = []
+
+    def get_config(self):
+        return {'data_dir': self.data_dir}
+
+    async def send_message(self, session, chain):
+        self.sent.append(session)
+        return True
+
+
+class FakeEvent:
+    def __init__(self, origin: str):
+        self.unified_msg_origin = origin
+
+    def plain_result(self, text):
+        return text
@@ -0,0 +1,83 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from blessingholidays.broadcast import BroadcastEngine, BroadcastTarget
+from blessingholidays.broadcast_journal import BroadcastJournal
+
+SESSIONS = [f"qq:FriendMessage:{i}" for i in range(10)]
+
+
+def _targets():
+    return [BroadcastTarget('qq', s, 'chain', s) for s in SESSIONS]
+
+
+def _engine(send) -> BroadcastEngine:
+    # 单个发送协程，发送顺序与目标顺序一致，便于模拟在第几个会话时崩溃
+    return BroadcastEngine(send, concurrency=1, rate=1000, burst=1000)
+
+
+def test_resume_after_crash_sends_each_session_once(tmp_path):
+    journal_file = tmp_path / 'journal.jsonl'
+    delivered = Counter()
+
+    async def crashing_send(session, chain):
+        if session == SESSIONS[3]:
+            return False  # 明确失败，恢复时重试
+        delivered[session] += 1
+        if session == SESSIONS[5]:
+            # 已送达但结果尚未写入日志时进程被终止
+            raise asyncio.CancelledError()
+        return True
+
+    journal = BroadcastJournal(journal_file)
+    run = journal.begin('2025-10-01', 'start', '国庆节', {'friend': ['快乐'], 'group': ['快乐']})
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(_engine(crashing_send).run(_targets(), journal=journal, run=run))
+    journal.close()
+
+    async def send(session, chain):
+        delivered[session] += 1
+        return True
+
+    resumed = BroadcastJournal(journal_file)
+    run = resumed.get('2025-10-01:start')
+    assert run is not None and not run.done and resumed.pending_runs() == [run]
+    result = asyncio.run(_engine(send).run(_targets(), journal=resumed, run=run))
+    resumed.finish(run)
+    resumed.close()
+
+    assert delivered == Counter({s: 1 for s in SESSIONS})
+    # 0-2、4 已送达；5 结果未知按已投递处理；3 失败后重试
+    assert result.skipped == 5 and result.sent == 5
+    assert BroadcastJournal(journal_file).get(run.run_id).done
+
+
+def test_compact_keeps_recent_runs_and_their_state(tmp_path):
+    journal_file = tmp_path / 'journal.jsonl'
+    journal = BroadcastJournal(journal_file, keep_days=7)
+    old = journal.begin('2025-01-01', 'start', '元旦', {'friend': ['新年快乐']})
+    journal.attempt(old, 'a')
+    journal.record(old, 'a', True)
+    journal.finish(old)
+    recent = journal.begin('2025-10-01', 'start', '国庆节', {'friend': ['国庆快乐']})
+    for session, ok in (('a', True), ('b', False)):
+        journal.attempt(recent, session)
+        journal.record(recent, session, ok)
+    journal.attempt(recent, 'c')
+
+    journal.compact('2025-10-03')
+    # 压缩后仍可继续追加
+    journal.attempt(recent, 'd')
+    journal.close()
+
+    reloaded = BroadcastJournal(journal_file)
+    assert reloaded.get(old.run_id) is None
+    run = reloaded.get(recent.run_id)
+    assert run.texts == {'friend': ['国庆快乐']}
+    assert run.attempted == {'a', 'b', 'c', 'd'}
+    assert run.delivered == {'a'} and run.failed == {'b'}
+    assert [s for s in 'abcde' if run.should_send(s)] == ['b', 'e']
+    lines = journal_file.read_text(encoding='utf-8').splitlines()
+    assert all('2025-01-01' not in line for line in lines)
@@ -0,0 +1,41 @@
+import asyncio
+
+from blessingholidays.broadcast import BroadcastTarget
+from blessingholidays.delivery_queue import DeliveryQueue
+
+
+def _target(audience: str, rid: int, members: int = 0) -> BroadcastTarget:
+    return BroadcastTarget('qq', f"qq:{audience}:{rid}", None, f"{audience} {rid}", audience, members)
+
+
+def test_default_streams_without_collecting():
+    queue = DeliveryQueue.from_config({})
+    assert queue.order == 'listed' and queue.passthrough
+    produced = []
+
+    async def source():
+        for i in range(3):
+            produced.append(i)
+            yield _target('friend', i)
+
+    async def first():
+        async for target in queue.arrange(source()):
+            return target, list(produced)
+
+    target, seen = asyncio.run(first())
+    # 第一个目标在其余目标产出之前就已放行
+    assert target.session == 'qq:friend:0' and seen == [0]
+
+
+def test_groups_first_sorts_by_members():
+    queue = DeliveryQueue('groups_first', vip=['friend:9'])
+    targets = [_target('friend', 1), _target('group', 2, 10), _target('group', 3, 500), _target('friend', 9)]
+
+    async def source():
+        for target in targets:
+            yield target
+
+    async def collect():
+        return [t.session async for t in queue.arrange(source())]
+
+    assert asyncio.run(collect()) == ['qq:friend:9', 'qq:group:3', 'qq:group:2', 'qq:friend:1']
@@ -0,0 +1,33 @@
+from blessingholidays.generation import GenerationEngine, parse_variants
+
+
+def test_parse_json_array():
+    text = '好的：\n```json\n["祝大家国庆快乐，阖家幸福！", "国庆假期愉快，出行平安！"]\n```'
+    assert parse_variants(text, 2) == ["祝大家国庆快乐，阖家幸福！", "国庆假期愉快，出行平安！"]
+
+
+def test_bracket_without_strings_falls_back_to_lines():
+    text = "以下是 [3] 条祝福：\n1. 祝大家国庆快乐，阖家幸福！\n2. 国庆假期愉快，出行平安！\n3. 愿你假期吃好玩好，心情舒畅！"
+    assert parse_variants(text, 3) == [
+        "祝大家国庆快乐，阖家幸福！", "国庆假期愉快，出行平安！", "愿你假期吃好玩好，心情舒畅！",
+    ]
+
+
+def test_min_length_is_inclusive():
+    exact, short = "一" * 10, "一" * 9
+    assert parse_variants(f'["{exact}", "{short}"]', 2, min_length=10) == [exact]
+    # 单条生成与多条解析使用同一规则
+    engine = GenerationEngine(min_length=10)
+    assert engine._accept(exact) == exact
+    assert engine._accept(short) is None
+
+
+def test_duplicates_and_count():
+    text = '["祝大家国庆快乐，阖家幸福！", "祝大家国庆快乐，阖家幸福！", "国庆假期愉快，出行平安！"]'
+    assert parse_variants(text, 1) == ["祝大家国庆快乐，阖家幸福！"]
+    assert len(parse_variants(text, 5)) == 2
+
+
+def test_plain_lines_without_numbering():
+    text = "祝大家国庆快乐，阖家幸福！\n\n国庆假期愉快，出行平安！"
+    assert parse_variants(text, 3) == ["祝大家国庆快乐，阖家幸福！", "国庆假期愉快，出行平安！"]
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from blessingholidays.holiday_builder import calendar_meta
+from blessingholidays.holiday_snapshot import (HolidayBundle, HolidaySnapshot, SnapshotError, encode_bundle,
+                                               encode_snapshot, load_snapshot)
+from blessingholidays.holiday_year import HolidayYear
+from blessingholidays.main import get_year_holidays
+
+YEAR = 2025
+
+
+@pytest.fixture(scope='module')
+def records() -> list:
+    return [dict(h) for h in asyncio.run(get_year_holidays(YEAR))]
+
+
+def test_snapshot_round_trip(tmp_path, records):
+    path = tmp_path / 'holidays_2025.bin'
+    meta = calendar_meta(YEAR)
+    path.write_bytes(encode_snapshot(YEAR, records, meta))
+
+    assert load_snapshot(path) == (YEAR, records)
+    with HolidaySnapshot.open(path) as snap:
+        assert snap.meta == meta
+        assert snap.get(date(YEAR, 10, 1))['holiday_name'] == '国庆节'
+        assert list(HolidayYear.from_snapshot(snap)) == records
+
+
+def test_bundle_round_trip(tmp_path, records):
+    other = [dict(h) for h in asyncio.run(get_year_holidays(YEAR + 1))]
+    path = tmp_path / 'holidays.pack'
+    path.write_bytes(encode_bundle({YEAR: records, YEAR + 1: other}, {'chinese_calendar': 'test'},
+                                   {YEAR: {'source_hash': 'a'}}))
+
+    with HolidayBundle(path) as bundle:
+        assert bundle.years() == [YEAR, YEAR + 1]
+        assert bundle.meta == {'chinese_calendar': 'test'}
+        assert bundle.records(YEAR) == records
+        assert bundle.records(YEAR + 1) == other
+        assert bundle.records(YEAR + 2) is None
+        with bundle.snapshot(YEAR) as snap:
+            assert snap.meta == {'source_hash': 'a'}
+
+
+def test_corrupt_crc_is_rejected(records):
+    data = bytearray(encode_snapshot(YEAR, records))
+    data[-1] ^= 0xFF
+    with pytest.raises(SnapshotError):
+        HolidaySnapshot(bytes(data))
+
+
+def test_truncated_files_are_rejected(tmp_path, records):
+    data = encode_snapshot(YEAR, records)
+    with pytest.raises(SnapshotError):
+        HolidaySnapshot(data[:len(data) // 2])
+    path = tmp_path / 'holidays.pack'
+    bundle = encode_bundle({YEAR: records})
+    path.write_bytes(bundle[:-10])
+    with pytest.raises(SnapshotError):
+        HolidayBundle(path)
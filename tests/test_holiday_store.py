@@ -0,0 +1,102 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from blessingholidays.holiday_builder import calendar_meta, is_current
+from blessingholidays.holiday_snapshot import HolidaySnapshot, encode_snapshot
+from blessingholidays.holiday_store import HolidayStore
+from blessingholidays.main import get_year_holidays, refresh_year_holidays
+
+YEAR = 2025
+
+
+def _stale_records() -> list:
+    """2025 年的完整数据，但国庆节最后一天被改成工作日，模拟旧版 chinese_calendar 的安排。"""
+    records = [dict(h) for h in asyncio.run(get_year_holidays(YEAR))]
+    i = date(YEAR, 10, 8).timetuple().tm_yday - 1
+    records[i].update(is_holiday=False, is_workday=True, is_last_day=False, holiday_name='')
+    return records
+
+
+def _store(tmp_path, calls: list) -> HolidayStore:
+    async def refresher(year, old):
+        calls.append(year)
+        return await refresh_year_holidays(year, old)
+
+    return HolidayStore(tmp_path, get_year_holidays, refresher=refresher)
+
+
+def test_stale_meta_is_detected():
+    assert is_current(YEAR, calendar_meta(YEAR))
+    assert not is_current(YEAR, {'chinese_calendar': '0.0.0', 'source_hash': 'outdated'})
+    assert not is_current(YEAR, {})
+
+
+def test_stale_shard_is_refreshed_and_rewritten(tmp_path):
+    calls = []
+    store = _store(tmp_path, calls)
+    stale = {'chinese_calendar': '0.0.0', 'source_hash': 'outdated'}
+    store.binary_path_for(YEAR).write_bytes(encode_snapshot(YEAR, _stale_records(), stale))
+
+    holidays = asyncio.run(store.load_year(YEAR))
+
+    assert calls == [YEAR]
+    assert store.sources[YEAR] == 'refresh'
+    assert list(holidays) == asyncio.run(get_year_holidays(YEAR))
+    assert holidays.get(date(YEAR, 10, 8))['is_holiday']
+    with HolidaySnapshot.open(store.binary_path_for(YEAR)) as snap:
+        assert is_current(YEAR, snap.meta)
+
+    # 写回的分片已是最新，再次加载时不再更新
+    calls.clear()
+    reloaded = _store(tmp_path, calls)
+    asyncio.run(reloaded.load_year(YEAR))
+    assert calls == []
+    assert reloaded.sources[YEAR] == 'snapshot'
+
+
+def test_current_shard_is_not_refreshed(tmp_path):
+    calls = []
+    store = _store(tmp_path, calls)
+    records = asyncio.run(get_year_holidays(YEAR))
+    store.binary_path_for(YEAR).write_bytes(encode_snapshot(YEAR, records, calendar_meta(YEAR)))
+
+    holidays = asyncio.run(store.load_year(YEAR))
+
+    assert calls == []
+    assert store.sources[YEAR] == 'snapshot'
+    assert list(holidays) == records
+
+
+@pytest.mark.parametrize('damage', ['truncate', 'flip', 'empty'])
+def test_corrupt_shard_is_rebuilt(tmp_path, damage):
+    store = HolidayStore(tmp_path, get_year_holidays)
+    path = store.binary_path_for(YEAR)
+    data = encode_snapshot(YEAR, asyncio.run(get_year_holidays(YEAR)), calendar_meta(YEAR))
+    if damage == 'truncate':
+        data = data[:len(data) // 2]
+    elif damage == 'flip':
+        data = data[:40] + bytes([data[40] ^ 0xFF]) + data[41:]
+    else:
+        data = b''
+    path.write_bytes(data)
+
+    holidays = asyncio.run(store.get_year(YEAR))
+
+    assert store.sources[YEAR] == 'build'
+    assert list(holidays) == asyncio.run(get_year_holidays(YEAR))
+    # 重新生成的分片已覆盖损坏的文件
+    with HolidaySnapshot.open(path) as snap:
+        assert snap.year == YEAR
+
+
+def test_corrupt_bundle_falls_back_to_build(tmp_path):
+    bundle_file = tmp_path / 'holidays.pack'
+    bundle_file.write_bytes(b'BHPK' + b'\x00' * 3)
+    store = HolidayStore(tmp_path, get_year_holidays, bundle_file=bundle_file)
+
+    holidays = asyncio.run(store.get_year(YEAR))
+
+    assert store.sources[YEAR] == 'build'
+    assert holidays.get(date(YEAR, 1, 1))['holiday_name'] == '元旦'
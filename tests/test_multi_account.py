@@ -0,0 +1,35 @@
+import asyncio
+
+from blessingholidays.main import BlessingHolidaysPlugin
+
+from fakes import FakeContext, FakePlatform
+
+
+def test_accounts_on_same_adapter_keep_their_own_lists_and_buckets(tmp_path):
+    # 同一适配器的两个账号：名称相同，实例 ID 不同
+    first = FakePlatform('bot1', 'aiocqhttp', friends=[1, 2], groups={100: 5})
+    second = FakePlatform('bot2', 'aiocqhttp', friends=[3], groups={200: 8})
+    chains = {'friend': ['friend'], 'group': ['group']}
+
+    async def run():
+        plugin = BlessingHolidaysPlugin(FakeContext(tmp_path, [first, second]), {})
+        try:
+            rounds = []
+            for _ in range(2):  # 第二轮起命中会话列表缓存
+                rounds.append([(t.platform, t.session.rsplit(':', 1)[-1])
+                               async for t in plugin._iter_targets(chains)])
+            targets = [t async for t in plugin._iter_targets(chains)]
+            await plugin.broadcast_engine.run(targets)
+            return plugin, rounds
+        finally:
+            await plugin.terminate()
+
+    plugin, rounds = asyncio.run(run())
+    expected = sorted([('bot1', '1'), ('bot1', '2'), ('bot1', '100'), ('bot2', '3'), ('bot2', '200')])
+    assert sorted(rounds[0]) == expected
+    assert sorted(rounds[1]) == expected
+    # 每个账号只拉取一次自己的列表，第二轮来自各自的缓存
+    assert first.api.calls.count('get_friend_list') == 1
+    assert second.api.calls.count('get_friend_list') == 1
+    assert plugin.recipient_directory.hits == 4
+    assert set(plugin.broadcast_engine.rates()) == {'bot1', 'bot2'}
@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+from blessingholidays.persistence import WriteBehind, read_json
+
+
+def test_repeated_saves_are_coalesced_into_one_write(tmp_path):
+    path = tmp_path / 'cache.json'
+    state = {'n': 0}
+    renders = []
+
+    def render() -> bytes:
+        renders.append(state['n'])
+        return json.dumps(state).encode('utf-8')
+
+    async def run():
+        writer = WriteBehind(delay=0.05)
+        for n in range(1, 6):
+            state['n'] = n
+            writer.schedule(path, render)
+        await asyncio.sleep(0.2)
+        return writer
+
+    writer = asyncio.run(run())
+
+    # 五次保存只写一次，写入的是最新状态
+    assert renders == [5]
+    assert read_json(path) == {'n': 5}
+    assert writer.stats() == {'pending': 0, 'writes': 1, 'coalesced': 4, 'errors': 0}
+
+
+def test_flush_writes_pending_files_immediately(tmp_path):
+    paths = [tmp_path / 'a.json', tmp_path / 'b.json']
+
+    async def run():
+        writer = WriteBehind(delay=3600)
+        for i, path in enumerate(paths):
+            writer.schedule(path, lambda i=i: json.dumps({'i': i}).encode('utf-8'))
+        assert not any(p.exists() for p in paths)
+        await writer.flush()
+        return writer
+
+    writer = asyncio.run(run())
+
+    assert [read_json(p) for p in paths] == [{'i': 0}, {'i': 1}]
+    assert writer.stats()['pending'] == 0
+    assert writer.writes == 2
+
+
+def test_schedule_without_event_loop_writes_synchronously(tmp_path):
+    path = tmp_path / 'cache.json'
+    writer = WriteBehind()
+    writer.schedule(path, lambda: b'{"ok": true}')
+    assert read_json(path) == {'ok': True}
+    assert writer.writes == 1
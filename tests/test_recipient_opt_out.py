@@ -0,0 +1,25 @@
+import asyncio
+
+from blessingholidays.main import BlessingHolidaysPlugin
+
+from fakes import FakeContext, FakeEvent, FakePlatform
+
+
+def test_opt_out_from_event_is_skipped_by_broadcast(tmp_path):
+    # 平台实例 ID 与适配器名称不同，例如默认配置下的 aiocqhttp 实例
+    platform = FakePlatform('default', 'aiocqhttp', friends=[41, 42], groups={7001: 3})
+
+    async def run():
+        plugin = BlessingHolidaysPlugin(FakeContext(tmp_path, [platform]), {})
+        try:
+            replies = [r async for r in plugin.opt_out(FakeEvent('default:FriendMessage:42'))]
+            assert '退订' in replies[0]
+            chains = {'friend': ['friend'], 'group': ['group']}
+            return [target.session async for target in plugin._iter_targets(chains)]
+        finally:
+            await plugin.terminate()
+
+    sessions = asyncio.run(run())
+    assert not any(session.endswith(':42') for session in sessions)
+    assert any(session.endswith(':41') for session in sessions)
+    assert any(session.endswith(':7001') for session in sessions)
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from blessingholidays.recipients import RecipientDirectory
+
+from fakes import FakePlatform
+
+
+def _collect(directory, platform):
+    async def run():
+        return [(kind, rid) async for kind, rid, _info in
+                directory.iter_recipients('bot1', platform.get_client())]
+    return asyncio.run(run())
+
+
+def test_failed_fetch_falls_back_to_previous_list():
+    platform = FakePlatform('bot1', friends=[1, 2], groups={100: 5})
+    directory = RecipientDirectory(ttl_seconds=0)
+    assert _collect(directory, platform) == [('friend', '1'), ('friend', '2'), ('group', '100')]
+
+    async def failing(action, **kwargs):
+        if action == 'get_group_list':
+            raise RuntimeError("timeout")
+        return [{'user_id': 3}]
+
+    platform.api.call_action = failing
+    assert _collect(directory, platform) == [('friend', '3'), ('group', '100')]
+    assert set(directory.snapshot('bot1').members['friend']) == {'3'}
+
+
+def test_failed_fetch_without_previous_list_raises():
+    platform = FakePlatform('bot1')
+
+    async def failing(action, **kwargs):
+        raise RuntimeError("offline")
+
+    platform.api.call_action = failing
+    with pytest.raises(RuntimeError):
+        _collect(RecipientDirectory(), platform)
@@ -0,0 +1,39 @@
+import asyncio
+from datetime import date, datetime
+
+from blessingholidays.main import BlessingHolidaysPlugin
+
+from fakes import FakeContext
+
+
+def test_standby_year_plans_new_year_events_before_rollover(tmp_path):
+    # 禁用插件只是为了不启动后台调度，计划与切换仍可直接调用
+    now = datetime(2025, 12, 26, 9, 0)
+    new_year = date(2026, 1, 1)
+
+    async def run():
+        plugin = BlessingHolidaysPlugin(FakeContext(tmp_path), {'enabled': False})
+        try:
+            plugin.holidays = await plugin.holiday_store.get_year(2025)
+            before = await plugin._plan_events(now)
+            await plugin._prepare_standby(2026)
+            after = await plugin._plan_events(now)
+            await plugin._rollover(2026)
+            return plugin, before, after
+        finally:
+            await plugin.terminate()
+
+    plugin, before, after = asyncio.run(run())
+
+    assert [e.kind for e in before if e.day == new_year] == ['prepare', 'rollover']
+    # 备用数据就绪后，元旦的预生成安排在跨年零点之前
+    rollover = next(e for e in after if e.kind == 'rollover')
+    pregen = [e for e in after if e.kind == 'pregenerate' and e.day == new_year]
+    assert pregen and pregen[0].when < rollover.when
+    assert pregen[0].when == datetime(2025, 12, 29)
+    assert not any(e.kind == 'prepare' for e in after)
+
+    # 切换后数据与索引整体换成 2026 年，备用缓冲区清空
+    assert plugin.holidays.year == 2026
+    assert plugin.holiday_index.get(new_year)['holiday_name'] == '元旦'
+    assert plugin._standby is None
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from blessingholidays.scheduler import EventScheduler, ScheduledEvent
+
+
+class FakeTime:
+    """可控的墙上时钟；`sleep` 推进时钟并计数，`jump` 模拟系统休眠。"""
+
+    def __init__(self, now: datetime, end: datetime):
+        self.now = now
+        self.end = end
+        self.sleeps = 0
+        self.jump: timedelta | None = None
+
+    def clock(self) -> datetime:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.sleeps += 1
+        self.now += self.jump or timedelta(seconds=seconds)
+        self.jump = None
+        if self.now >= self.end:
+            raise asyncio.CancelledError
+
+
+def _run(fake: FakeTime, events: list[ScheduledEvent], on_fire=None) -> list[tuple[ScheduledEvent, datetime]]:
+    fired = []
+
+    async def plan(now):
+        return [e for e in events if e.when >= now]
+
+    async def handle(event):
+        fired.append((event, fake.now))
+        if on_fire is not None:
+            on_fire(event)
+
+    scheduler = EventScheduler(plan, handle, clock=fake.clock)
+    scheduler._sleep = fake.sleep
+    asyncio.run(scheduler.run())
+    return fired
+
+
+def test_a_year_of_events_needs_few_wakeups():
+    start = datetime(2025, 1, 1)
+    # 一年约 30 个事件，间隔 12 天
+    whens = [datetime(2025, 1, 5, 9, 0) + timedelta(days=12 * i) for i in range(30)]
+    events = [ScheduledEvent(when, 'start', when.date()) for when in whens]
+    fake = FakeTime(start, datetime(2026, 1, 1))
+
+    fired = _run(fake, events)
+
+    # 每个事件都在到期时刻准时执行
+    assert [e for e, _ in fired] == events
+    assert all(at == e.when for e, at in fired)
+    # 按固定 1 小时切片需要 8760 次唤醒
+    assert fake.sleeps < 1000
+
+
+def test_missed_event_runs_immediately_after_clock_jump():
+    start = datetime(2025, 9, 30, 9, 0)
+    event = ScheduledEvent(datetime(2025, 10, 1, 9, 0), 'start', date(2025, 10, 1), '国庆节')
+    later = ScheduledEvent(datetime(2025, 10, 8, 20, 0), 'end', date(2025, 10, 8), '国庆节')
+    fake = FakeTime(start, datetime(2025, 10, 9))
+    # 第一次睡眠期间系统休眠了 1 天 2 小时，醒来时已错过首日事件
+    fake.jump = timedelta(days=1, hours=2)
+    sleeps_at_fire = []
+
+    fired = _run(fake, [event, later], on_fire=lambda e: sleeps_at_fire.append(fake.sleeps))
+
+    assert fired[0] == (event, datetime(2025, 10, 1, 11, 0))
+    # 醒来后不再睡眠，直接执行
+    assert sleeps_at_fire[0] == 1
+    assert fired[1] == (later, later.when)
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from blessingholidays.broadcast import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_errors_halve_rate_down_to_floor_and_successes_recover():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=8, burst=4, min_rate=1, recover_step=0.25, clock=clock)
+
+    bucket.on_error()
+    assert bucket.rate == 4 and bucket.tokens == 0
+    for _ in range(5):
+        bucket.on_error()
+    assert bucket.rate == 1
+
+    rates = []
+    for _ in range(5):
+        bucket.on_success()
+        rates.append(bucket.rate)
+    # 每次成功恢复目标速率的 25%，不超过目标速率
+    assert rates == [3, 5, 7, 8, 8]
+
+
+def test_refill_follows_current_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=5, min_rate=1, clock=clock)
+
+    async def drain():
+        for _ in range(5):
+            await bucket.acquire()
+
+    asyncio.run(drain())
+    assert bucket.tokens == pytest.approx(0)
+
+    bucket.on_error()  # 速率降为 5 条/秒
+    clock.now += 0.4
+    bucket._refill()
+    assert bucket.tokens == pytest.approx(2)
+
+    clock.now += 10  # 积攒的令牌不超过容量
+    bucket._refill()
+    assert bucket.tokens == pytest.approx(5)
+
+
+def test_error_clears_accumulated_tokens():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=5, clock=clock)
+    clock.now += 1
+    bucket.on_error()
+    assert bucket.tokens == 0
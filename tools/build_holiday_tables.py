@@ -0,0 +1,68 @@
+"""
+预编译节假日数据表。
+
+为当前安装的 `chinese_calendar` 支持的每一个年份计算完整的逐日记录（含中文节日名称
+与首日/末日标记），打包为插件随附的快照合集 `data/holiday_tables.bin`。
+插件启动时直接读取该合集，无需在线计算或翻译。每一年的快照都记录了生成时的
+`chinese_calendar` 版本与该年源数据的哈希，升级后只有安排变化的年份会在运行时增量更新。
+升级 `chinese_calendar` 后重新运行：
+
+    python tools/build_holiday_tables.py [输出文件]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from holiday_builder import (  # noqa: E402
+    build_year_flags, calendar_meta, calendar_version, flags_to_records, supported_years,
+)
+from holiday_names import localize_holiday_name  # noqa: E402
+from holiday_snapshot import HolidayBundle, encode_bundle  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(ROOT, 'data', 'holiday_tables.bin')
+
+
+def build(output: str) -> dict:
+    """
+    构建快照合集并写入 `output`。
+
+    Returns:
+        dict: 合集的元数据。
+    """
+    years = {}
+    for year in supported_years():
+        flags = build_year_flags(year)
+        names = {n: localize_holiday_name(n) or n for n in set(flags.names.values())}
+        years[year] = flags_to_records(flags, names)
+    meta = {
+        'chinese_calendar': calendar_version(),
+        'years': [min(years), max(years)],
+    }
+    data = encode_bundle(years, meta, {year: calendar_meta(year) for year in years})
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp = output + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, output)
+    return meta
+
+
+def main():
+    output = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OUTPUT
+    t0 = time.perf_counter()
+    meta = build(output)
+    elapsed = time.perf_counter() - t0
+    with HolidayBundle(output) as bundle:
+        years = bundle.years()
+        for year in years:
+            # 逐年解码一次，确认校验和与索引无误
+            assert len(bundle.records(year)) in (365, 366), year
+    print(f"已生成 {output}: {years[0]}-{years[-1]} 共 {len(years)} 年，"
+          f"{os.path.getsize(output)} 字节，chinese_calendar {meta['chinese_calendar']}，耗时 {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
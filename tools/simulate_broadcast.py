@@ -0,0 +1,271 @@
+"""
+广播负载模拟器。
+
+用假的平台（可配置好友/群组数量、发送延迟与失败率）和假的 LLM 提供商（可配置生成延迟）
+驱动插件完成一次完整广播，报告吞吐量、尾延迟与内存占用，无需真实的 aiocqhttp 账号。
+需要在已安装 AstrBot 的环境中运行，例如估算 5 万个会话的耗时：
+
+    python tools/simulate_broadcast.py --friends 40000 --groups 10000 --rate 50 --concurrency 20
+
+广播参数（`--concurrency`、`--rate`、`--burst`、`--min-rate`）与配置项 `broadcast` 相同，
+填入线上配置即可得到接近真实的结果。
+
+`--instances N` 启动 N 个进程，通过同一个租约数据库（配置项 `coordination`）分片完成同一次广播，
+并检查是否有会话被重复发送或遗漏。`--crash-after K` 让第一个进程发送 K 条后直接退出，
+用于验证其他进程在租约过期后接管其分片：
+
+    python tools/simulate_broadcast.py --instances 3 --friends 3000 --groups 600 --lease 3 --crash-after 200
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from types import SimpleNamespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# 插件使用包内相对导入，需以包的形式导入
+sys.path.insert(0, os.path.dirname(ROOT))
+plugin_main = importlib.import_module(f"{os.path.basename(ROOT)}.main")
+
+
+class FakeApi:
+    def __init__(self, friends: int, groups: int, list_latency: float):
+        self.friends = friends
+        self.groups = groups
+        self.list_latency = list_latency
+
+    async def call_action(self, action: str, **kwargs):
+        await asyncio.sleep(self.list_latency)
+        if action == 'get_friend_list':
+            return [{'user_id': 10000 + i, 'nickname': f'friend{i}'} for i in range(self.friends)]
+        if action == 'get_group_list':
+            return [{'group_id': 90000 + i, 'group_name': f'group{i}', 'member_count': 50 + i % 450}
+                    for i in range(self.groups)]
+        raise ValueError(f"未模拟的接口: {action}")
+
+
+class FakePlatform:
+    def __init__(self, name: str, api: FakeApi):
+        self._meta = SimpleNamespace(name=name)
+        self._client = SimpleNamespace(api=api)
+
+    def meta(self):
+        return self._meta
+
+    def get_client(self):
+        return self._client
+
+
+class FakeProvider:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def text_chat(self, prompt: str = '', system_prompt: str = '', **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(completion_text=f"（模拟祝福）愿你节日愉快，万事顺意，阖家幸福安康！#{self.calls}")
+
+
+class FakeContext:
+    """提供插件用到的 Context 接口：数据目录、平台管理器、消息发送与 LLM 提供商。"""
+
+    def __init__(self, data_dir: str, platforms: list, provider: FakeProvider,
+                 send_latency: float, send_jitter: float, error_rate: float, seed: int, crash_after: int = 0):
+        self._config = {'data_dir': data_dir}
+        self.platform_manager = SimpleNamespace(get_insts=lambda: platforms)
+        self.provider = provider
+        self.send_latency = send_latency
+        self.send_jitter = send_jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.started = 0.0
+        self.call_latencies: list[float] = []
+        self.delivered_at: list[float] = []
+        self.errors = 0
+        self.sessions: list[str] = []
+        self.crash_after = crash_after
+
+    def get_config(self):
+        return self._config
+
+    def get_provider_by_id(self, provider_id=None):
+        return self.provider
+
+    def get_using_provider(self, umo=None):
+        return self.provider
+
+    async def send_message(self, session: str, chain):
+        t0 = time.perf_counter()
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.send_latency, self.send_jitter)))
+        self.call_latencies.append(time.perf_counter() - t0)
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            raise RuntimeError("模拟发送失败")
+        self.delivered_at.append(time.perf_counter() - self.started)
+        self.sessions.append(session)
+        if self.crash_after and len(self.sessions) >= self.crash_after:
+            # 模拟实例崩溃：不清理、不续约，直接退出
+            os._exit(3)
+        return True
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="节假日祝福广播负载模拟")
+    parser.add_argument('--platforms', type=int, default=1, help="平台实例数")
+    parser.add_argument('--friends', type=int, default=1000, help="每个平台的好友数")
+    parser.add_argument('--groups', type=int, default=200, help="每个平台的群组数")
+    parser.add_argument('--list-latency-ms', type=float, default=200, help="获取好友/群组列表的延迟")
+    parser.add_argument('--send-latency-ms', type=float, default=80, help="单条消息发送的平均延迟")
+    parser.add_argument('--send-jitter-ms', type=float, default=30, help="发送延迟的标准差")
+    parser.add_argument('--error-rate', type=float, default=0.01, help="发送失败的概率")
+    parser.add_argument('--llm-latency-ms', type=float, default=1500, help="LLM 生成一条祝福的延迟")
+    parser.add_argument('--kind', choices=('start', 'end'), default='start', help="广播类型")
+    parser.add_argument('--holiday', default='国庆节', help="节日名称")
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=100.0, help="每个平台每秒发送条数")
+    parser.add_argument('--burst', type=int, default=20)
+    parser.add_argument('--min-rate', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-tracemalloc', action='store_true', help="不统计 Python 内存峰值（tracemalloc 会拖慢运行）")
+    parser.add_argument('--verbose', action='store_true', help="输出插件日志（包括每条发送失败）")
+    parser.add_argument('--instances', type=int, default=1, help="以多个进程分片完成同一次广播")
+    parser.add_argument('--shards', type=int, default=16, help="多实例模式的分片数")
+    parser.add_argument('--lease', type=float, default=5.0, help="多实例模式的租约有效期（秒）")
+    parser.add_argument('--crash-after', type=int, default=0, help="多实例模式下第一个进程发送这么多条后直接退出")
+    parser.add_argument('--coordination-db', help=argparse.SUPPRESS)
+    parser.add_argument('--instance-id', default='', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+async def simulate(args) -> dict:
+    data_dir = tempfile.mkdtemp(prefix='blessing_sim_')
+    api = FakeApi(args.friends, args.groups, args.list_latency_ms / 1000)
+    platforms = [FakePlatform(f"sim{i}", api) for i in range(args.platforms)]
+    provider = FakeProvider(args.llm_latency_ms / 1000)
+    ctx = FakeContext(data_dir, platforms, provider, args.send_latency_ms / 1000,
+                      args.send_jitter_ms / 1000, args.error_rate, args.seed, args.crash_after)
+    config = {
+        # 不启动调度器等后台任务，只驱动一次广播
+        'enabled': False,
+        'blessing_pregenerate_days': 0,
+        'broadcast': {
+            'concurrency': args.concurrency,
+            'rate_per_second': args.rate,
+            'burst': args.burst,
+            'min_rate_per_second': args.min_rate,
+        },
+    }
+    if args.coordination_db:
+        config['coordination'] = {
+            'enabled': True, 'db_path': args.coordination_db, 'instance_id': args.instance_id,
+            'shards': args.shards, 'lease_seconds': args.lease,
+        }
+    plugin = plugin_main.BlessingHolidaysPlugin(ctx, config)
+    await asyncio.sleep(0)
+
+    ctx.started = time.perf_counter()
+    result = await plugin._run_broadcast(args.kind, args.holiday, date.today())
+    elapsed = time.perf_counter() - ctx.started
+    await plugin.terminate()
+    return {'result': result, 'elapsed': elapsed, 'ctx': ctx, 'provider': provider}
+
+
+def run_instances(args):
+    """启动多个进程共同完成一次广播，汇总各进程的送达会话并检查重复与遗漏。"""
+    work_dir = tempfile.mkdtemp(prefix='blessing_sim_multi_')
+    db = os.path.join(work_dir, 'coordination.db')
+    base, skip = [], False
+    for arg in sys.argv[1:]:
+        # 子进程的 --instances 与 --crash-after 由下面单独指定
+        if skip:
+            skip = False
+        elif arg in ('--instances', '--crash-after'):
+            skip = True
+        elif not arg.startswith(('--instances=', '--crash-after=')):
+            base.append(arg)
+    procs = []
+    for i in range(args.instances):
+        output = os.path.join(work_dir, f'instance{i}.json')
+        cmd = [sys.executable, os.path.abspath(__file__), *base, '--instances', '1', '--coordination-db', db,
+               '--instance-id', f'sim{i}', '--output', output, '--seed', str(args.seed + i)]
+        if i == 0 and args.crash_after:
+            cmd += ['--crash-after', str(args.crash_after)]
+        procs.append((f'sim{i}', output, subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)))
+    counts: dict[str, int] = {}
+    for name, output, proc in procs:
+        stdout, _ = proc.communicate()
+        print(f"===== {name}（退出码 {proc.returncode}）=====")
+        print(stdout.rstrip())
+        sessions = []
+        if os.path.exists(output):
+            with open(output, 'r', encoding='utf-8') as f:
+                sessions = json.load(f)
+        elif proc.returncode == 3:
+            print("（模拟崩溃，未写出送达记录）")
+        for session in sessions:
+            counts[session] = counts.get(session, 0) + 1
+    expected = args.platforms * (args.friends + args.groups)
+    duplicates = sum(1 for n in counts.values() if n > 1)
+    print(f"===== 汇总 =====\n存活进程送达 {len(counts)} 个会话（共 {expected} 个），重复发送 {duplicates} 个")
+    print("崩溃进程已送达的会话不在上述统计中；未重复发送即为正确。" if args.crash_after else "")
+
+
+def main():
+    args = parse_args()
+    if args.instances > 1:
+        run_instances(args)
+        return
+    if not args.verbose:
+        plugin_main.logger.setLevel(logging.CRITICAL)
+    total = args.platforms * (args.friends + args.groups)
+    print(f"模拟 {args.platforms} 个平台、共 {total} 个会话；并发 {args.concurrency}，每平台 {args.rate}/s，"
+          f"发送延迟 {args.send_latency_ms}±{args.send_jitter_ms} ms，失败率 {args.error_rate:.1%}")
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    out = asyncio.run(simulate(args))
+    peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+    tracemalloc.stop()
+
+    result, elapsed, ctx = out['result'], out['elapsed'], out['ctx']
+    if result is None:
+        print("广播未执行（祝福语生成失败或已完成）。")
+        sys.exit(1)
+    delivered = ctx.delivered_at
+    print(f"结果: 成功 {result.sent}，失败 {result.failed}，跳过 {result.skipped}，LLM 调用 {out['provider'].calls} 次")
+    print(f"总耗时: {elapsed:.2f} s，吞吐量: {result.sent / elapsed if elapsed else 0:.1f} 条/s")
+    print("单次发送延迟 (ms): " + "，".join(
+        f"p{p} {percentile(ctx.call_latencies, p) * 1000:.1f}" for p in (50, 95, 99)
+    ) + f"，max {max(ctx.call_latencies, default=0) * 1000:.1f}")
+    print("送达时间 (距广播开始, s): " + "，".join(
+        f"p{p} {percentile(delivered, p):.2f}" for p in (50, 95, 99)
+    ) + f"，最后一条 {max(delivered, default=0):.2f}")
+    if peak is not None:
+        print(f"Python 内存峰值 (tracemalloc): {peak / 1024 / 1024:.1f} MB")
+    print(f"进程最大常驻内存: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(ctx.sessions, f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+try:
+    from astrbot.api import logger
+except ImportError:
+    # 在插件之外（例如基准测试）使用时
+    import logging
+    logger = logging.getLogger(__name__)
+
+try:
+    from .persistence import WriteBehind, atomic_write, dump_json, read_json
+except ImportError:
+    # 作为独立脚本 holidays_get.py 的顶层模块导入时
+    from persistence import WriteBehind, atomic_write, dump_json, read_json
+
+
+class TranslationCache:
+    """
+    节日名称翻译的持久化缓存。
+
+    以 (原文, 目标语言) 为键，磁盘上保存一份 JSON 备忘录，内存中再放一层 LRU。
+    条目超过 TTL 后会在下次访问时重新翻译；重新翻译失败则继续沿用旧值。
+    翻译失败的结果只在内存中短暂记住，避免同一次构建里对同一名称反复请求网络。
+    """
+
+    def __init__(self, cache_file, max_entries: int = 256, ttl_seconds: float = 30 * 86400,
+                 negative_ttl_seconds: float = 600, writer: WriteBehind | None = None):
+        """
+        Args:
+            cache_file: 缓存文件路径。
+            max_entries (int): 内存 LRU 的最大条目数。
+            ttl_seconds (float): 条目的有效期（秒），过期后重新翻译。
+            negative_ttl_seconds (float): 翻译失败结果在内存中保留的时间（秒）。
+            writer (WriteBehind, optional): 延迟写盘器，缺省时同步原子写入。
+        """
+        self.cache_file = str(cache_file)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.writer = writer
+
+        self._lru: OrderedDict[str, dict] = OrderedDict()
+        self._disk: dict[str, dict] | None = None
+        self._failed: dict[str, float] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.calls = 0
+        self.errors = 0
+
+    @staticmethod
+    def _key(text: str, to_lang: str) -> str:
+        return f"{to_lang}\t{text}"
+
+    def _load_disk(self) -> dict:
+        """首次未命中时才读取磁盘备忘录。"""
+        if self._disk is None:
+            self._disk = {}
+            if os.path.exists(self.cache_file):
+                try:
+                    data = read_json(self.cache_file)
+                    self._disk = dict(data.get('entries', {}))
+                except Exception as e:
+                    logger.warning(f"读取翻译缓存 {self.cache_file} 失败，将重新建立: {e}")
+        return self._disk
+
+    def _save_disk(self):
+        render = lambda: dump_json({'version': 1, 'entries': self._load_disk()})
+        if self.writer is not None:
+            # 一次构建中翻译多个名称时合并为一次写盘
+            self.writer.schedule(self.cache_file, render)
+            return
+        try:
+            atomic_write(self.cache_file, render())
+        except Exception as e:
+            logger.error(f"保存翻译缓存到 {self.cache_file} 失败: {e}")
+
+    def _remember(self, key: str, entry: dict):
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _lookup(self, key: str) -> dict | None:
+        entry = self._lru.get(key)
+        if entry is not None:
+            self._lru.move_to_end(key)
+            return entry
+        entry = self._load_disk().get(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def peek(self, text: str, to_lang: str) -> str | None:
+        """仅查询缓存，不触发翻译；未命中返回 None。"""
+        entry = self._lookup(self._key(text, to_lang))
+        return entry['text'] if entry else None
+
+    async def get_or_translate(self, text: str, to_lang: str,
+                               fetch: Callable[[str], Awaitable[str | None]]) -> str | None:
+        """
+        返回缓存中的译文，未命中或已过期时调用 `fetch` 获取并写入缓存。
+
+        Args:
+            text (str): 原文。
+            to_lang (str): 目标语言。
+            fetch: 实际执行翻译的协程函数，失败时返回 None。
+
+        Returns:
+            str | None: 译文；从未成功翻译过时返回 None。
+        """
+        key = self._key(text, to_lang)
+        now = time.time()
+        entry = self._lookup(key)
+        if entry is not None and now - entry.get('ts', 0) < self.ttl_seconds:
+            self.hits += 1
+            return entry['text']
+
+        failed_at = self._failed.get(key)
+        if failed_at is not None and now - failed_at < self.negative_ttl_seconds:
+            self.hits += 1
+            return entry['text'] if entry else None
+
+        if entry is None:
+            self.misses += 1
+        else:
+            self.stale += 1
+
+        # 同一名称的并发请求共用一次翻译
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        result = entry['text'] if entry else None
+        try:
+            self.calls += 1
+            translated = await fetch(text)
+            if translated:
+                result = translated
+                new_entry = {'text': translated, 'ts': time.time()}
+                self._remember(key, new_entry)
+                self._load_disk()[key] = new_entry
+                self._failed.pop(key, None)
+                self._save_disk()
+            else:
+                self.errors += 1
+                self._failed[key] = time.time()
+        except Exception as e:
+            self.errors += 1
+            self._failed[key] = time.time()
+            logger.warning(f"翻译 '{text}' 失败: {e}")
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        """返回命中/未命中等计数。"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'calls': self.calls,
+            'errors': self.errors,
+            'entries': len(self._load_disk()),
+        }